@@ -0,0 +1,135 @@
+"""
+Content-addressed cache of finished audit results.
+
+Uploads are hashed while they are written to disk. The cache key combines the
+paper hash, the GitHub URL and the dataset hash with AUDIT_ENGINE_VERSION, so
+bumping the engine version invalidates every older entry.
+"""
+import datetime
+import hashlib
+import json
+import os
+from typing import BinaryIO, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import metrics
+import models
+import text_store
+from audit_engine import AUDIT_ENGINE_VERSION
+
+AUDIT_CACHE_MAX_ENTRIES = int(os.getenv('AUDIT_CACHE_MAX_ENTRIES', '5000'))
+AUDIT_CACHE_MAX_AGE_DAYS = int(os.getenv('AUDIT_CACHE_MAX_AGE_DAYS', '30'))
+AUDIT_CACHE_MAX_BYTES = int(os.getenv('AUDIT_CACHE_MAX_MB', '256')) * 1024 * 1024
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def save_upload(src: BinaryIO, dest_path: str) -> str:
+    """Stream an uploaded file to disk and return its SHA-256 hex digest"""
+    digest = hashlib.sha256()
+    with open(dest_path, "wb") as buffer:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            buffer.write(chunk)
+    return digest.hexdigest()
+
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 hex digest of a file already on disk"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(paper_hash: str, github_url: Optional[str] = None, dataset_hash: Optional[str] = None) -> str:
+    """Versioned cache key for one combination of audit inputs"""
+    parts = [AUDIT_ENGINE_VERSION, paper_hash, (github_url or '').strip(), dataset_hash or '']
+    return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+
+
+def get_cached_result(db: Session, cache_key: str) -> Optional[Dict]:
+    """Return the cached analyze_paper() output for a key, or None on a miss"""
+    entry = db.query(models.AuditCacheEntry).filter(
+        models.AuditCacheEntry.cache_key == cache_key,
+        models.AuditCacheEntry.engine_version == AUDIT_ENGINE_VERSION
+    ).first()
+    if entry is None:
+        metrics.AUDIT_CACHE_LOOKUPS.inc('miss')
+        return None
+
+    now = datetime.datetime.utcnow()
+    if entry.created_at and now - entry.created_at > datetime.timedelta(days=AUDIT_CACHE_MAX_AGE_DAYS):
+        db.delete(entry)
+        db.commit()
+        metrics.AUDIT_CACHE_LOOKUPS.inc('expired')
+        return None
+
+    entry.last_used_at = now
+    entry.hit_count = (entry.hit_count or 0) + 1
+    db.commit()
+    metrics.AUDIT_CACHE_LOOKUPS.inc('hit')
+    return json.loads(entry.results_json)
+
+
+def store_result(db: Session, cache_key: str, results: Dict, commit: bool = True) -> None:
+    """
+    Store a finished analyze_paper() output and evict old entries.
+    Pass commit=False to publish it only with the rest of the caller's transaction.
+    """
+    if results.get('simulated'):
+        # Never cache the random fallback report
+        return
+
+    results = dict(results)
+    if results.get('extracted_text'):
+        # The text itself is already in the text store under its content hash
+        results['extracted_text'] = text_store.without_data(results['extracted_text'])
+    payload = json.dumps(results)
+    now = datetime.datetime.utcnow()
+    entry = db.query(models.AuditCacheEntry).filter(models.AuditCacheEntry.cache_key == cache_key).first()
+    if entry is None:
+        entry = models.AuditCacheEntry(cache_key=cache_key, hit_count=0)
+        db.add(entry)
+    entry.engine_version = AUDIT_ENGINE_VERSION
+    entry.results_json = payload
+    entry.size_bytes = len(payload)
+    entry.created_at = now
+    entry.last_used_at = now
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+
+    evict(db, commit=commit)
+
+
+def evict(db: Session, commit: bool = True) -> int:
+    """Drop stale-version, expired and least recently used entries. Returns the number removed."""
+    Entry = models.AuditCacheEntry
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=AUDIT_CACHE_MAX_AGE_DAYS)
+
+    removed = db.query(Entry).filter(
+        (Entry.engine_version != AUDIT_ENGINE_VERSION) | (Entry.created_at < cutoff)
+    ).delete(synchronize_session=False)
+
+    count, total_bytes = db.query(func.count(Entry.cache_key), func.coalesce(func.sum(Entry.size_bytes), 0)).one()
+    if count > AUDIT_CACHE_MAX_ENTRIES or total_bytes > AUDIT_CACHE_MAX_BYTES:
+        # Walk from least recently used until both limits hold again
+        for cache_key, size_bytes in db.query(Entry.cache_key, Entry.size_bytes).order_by(Entry.last_used_at.asc()).all():
+            if count <= AUDIT_CACHE_MAX_ENTRIES and total_bytes <= AUDIT_CACHE_MAX_BYTES:
+                break
+            db.query(Entry).filter(Entry.cache_key == cache_key).delete(synchronize_session=False)
+            count -= 1
+            total_bytes -= size_bytes or 0
+            removed += 1
+
+    if commit:
+        db.commit()
+    return removed
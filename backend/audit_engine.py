@@ -1,25 +1,58 @@
+import hashlib
 import json
 import random
 import time
 import re
-import requests
-from typing import Optional, List, Dict
-import PyPDF2
+from typing import Optional, List, Dict, Union, Iterable
 from docx import Document
 import os
+import citation_verifier
+import reference_parser
+from citation_cache import normalize_citation
+import similarity_index
+import duplicate_detector
+import dataset_profiler
+import keyphrases
+import metrics
+import pdf_extraction
+import text_store
+from pdf_extraction import ExtractedDocument
+from audit_pipeline import Stage, run_pipeline
+from text_features import TextFeatures, ensure_features
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from PDF file"""
+# Bump whenever analyzer output changes so cached audit results are invalidated
+AUDIT_ENGINE_VERSION = "12"
+
+# How citations are resolved: 'remote' (Crossref API only), 'local_first'
+# (offline Crossref index, then the API on a miss) or 'local_only'
+CITATION_RESOLVER = os.getenv('CITATION_RESOLVER', 'local_first')
+
+# Citations checked per paper
+MAX_REFERENCES = 50
+
+# Phrases the analyzers look for, counted in one pass by TextFeatures
+FORMAL_PHRASES = ['it is important to note', 'in conclusion', 'furthermore', 'moreover', 'delve into']
+PERSONAL_PRONOUNS = ['i', 'we', 'our', 'my']
+AUDIT_KEYWORDS = [
+    'sample size', 'n=', 'control group', 'experiment', 'p-value', 'p <',
+    'github.com', 'code available', 'data available', 'hyperparameter', 'parameter',
+] + FORMAL_PHRASES
+
+def build_text_features(text: str) -> TextFeatures:
+    """Precompute the features every analyzer reads"""
+    return TextFeatures(text, keywords=AUDIT_KEYWORDS, words=PERSONAL_PRONOUNS)
+
+def extract_document_from_pdf(file_path: str) -> ExtractedDocument:
+    """Extract PDF text page by page (in parallel for long documents)"""
     try:
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+        return pdf_extraction.extract_pdf(file_path)
     except Exception as e:
         print(f"Error extracting PDF: {e}")
-        return ""
+        return ExtractedDocument([])
+
+def extract_text_from_pdf(file_path: str) -> str:
+    """Extract text from PDF file"""
+    return extract_document_from_pdf(file_path).text
 
 def extract_text_from_docx(file_path: str) -> str:
     """Extract text from DOCX file"""
@@ -31,107 +64,84 @@ def extract_text_from_docx(file_path: str) -> str:
         print(f"Error extracting DOCX: {e}")
         return ""
 
-def extract_text(file_path: str) -> str:
-    """Extract text based on file extension"""
+def extract_document(file_path: str) -> ExtractedDocument:
+    """Extract text with page boundaries based on file extension. DOCX files count as one page."""
     if file_path.endswith('.pdf'):
-        return extract_text_from_pdf(file_path)
+        return extract_document_from_pdf(file_path)
     elif file_path.endswith('.docx'):
-        return extract_text_from_docx(file_path)
+        text = extract_text_from_docx(file_path)
+        return ExtractedDocument([text] if text else [])
     else:
-        return ""
+        return ExtractedDocument([])
 
-def extract_references(text: str) -> List[str]:
-    """Extract references from text using pattern matching"""
-    # Look for common reference patterns
-    patterns = [
-        r'\[\d+\]\s*([A-Z][^.]+\.\s*\d{4})',  # [1] Author et al. 2023
-        r'(?:References|REFERENCES|Bibliography)(.*?)(?=\n\n|\Z)',  # References section
-    ]
-    
-    references = []
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.DOTALL)
-        references.extend(matches)
-    
-    # If no references found, return empty list
-    if not references:
-        # Try to find year patterns as fallback
-        year_pattern = r'([A-Z][a-z]+(?:\s+et\s+al\.?)?\s*\(\d{4}\))'
-        references = re.findall(year_pattern, text)
-    
-    return references[:50]  # Limit to first 50 references
+def extract_text(file_path: str) -> str:
+    """Extract text based on file extension"""
+    return extract_document(file_path).text
+
+def extract_references(text: str) -> List[Dict]:
+    """Parsed reference entries (text, doi, title, year), at most MAX_REFERENCES"""
+    return reference_parser.parse_references(text, limit=MAX_REFERENCES)
 
 def check_citation_crossref(citation_text: str) -> Dict:
-    """Check citation against Crossref API (FREE!)"""
-    try:
-        # Clean citation text
-        citation_text = citation_text.strip()[:200]  # Limit length
-        
-        # Query Crossref API
-        url = f"https://api.crossref.org/works"
-        params = {
-            'query': citation_text,
-            'rows': 1
-        }
-        headers = {
-            'User-Agent': 'ResearchSentinel/1.0 (mailto:research@sentinel.com)'
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('message', {}).get('items'):
-                item = data['message']['items'][0]
-                return {
-                    'found': True,
-                    'title': item.get('title', [''])[0],
-                    'year': item.get('published', {}).get('date-parts', [[None]])[0][0],
-                    'doi': item.get('DOI', ''),
-                    'score': item.get('score', 0)
-                }
-        
-        return {'found': False}
-    except Exception as e:
-        print(f"Crossref API error: {e}")
-        return {'found': False}
+    """Check citation against Crossref API (FREE!), answering from the citation cache when possible"""
+    result = citation_verifier.verify_citations([citation_text], resolver=CITATION_RESOLVER)[0]
+    result.pop('latency_ms', None)
+    return result
 
-def analyze_citations(references: List[str]) -> Dict:
-    """Analyze citations using Crossref API"""
+def analyze_citations(references: List[Dict]) -> Dict:
+    """Analyze parsed reference entries using Crossref API"""
     total_checked = len(references)
     verified = 0
     broken = 0
+    unverified = 0
     issues = []
-    
-    # Check first 10 references (to avoid rate limiting)
-    for i, ref in enumerate(references[:10]):
-        result = check_citation_crossref(ref)
+    lookups = []
+    
+    # Check every reference concurrently over one pooled client
+    started = time.perf_counter()
+    # References with a DOI are resolved exactly; only the rest go through fuzzy search
+    results = citation_verifier.verify_citations(
+        [ref['text'] for ref in references],
+        resolver=CITATION_RESOLVER,
+        dois=[ref['doi'] for ref in references]
+    )
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    
+    for i, (ref, result) in enumerate(zip(references, results)):
+        lookups.append({
+            'id': i + 1,
+            'doi': ref['doi'],
+            'year': ref['year'],
+            'match': result.get('match') or result.get('source'),
+            'found': result['found'],
+            'latency_ms': result.get('latency_ms')
+        })
         if result['found']:
             verified += 1
             if result.get('score', 0) < 50:  # Low confidence match
                 issues.append({
                     'id': i + 1,
-                    'text': ref[:100],
+                    'text': ref['text'][:100],
                     'issue': 'Low confidence match',
                     'severity': 'low'
                 })
+        elif 'error' in result:
+            # Lookup failed (e.g. Crossref unreachable); don't report the citation as broken
+            unverified += 1
+            issues.append({
+                'id': i + 1,
+                'text': ref['text'][:100],
+                'issue': 'Citation could not be verified (lookup failed)',
+                'severity': 'low'
+            })
         else:
             broken += 1
             issues.append({
                 'id': i + 1,
-                'text': ref[:100],
+                'text': ref['text'][:100],
                 'issue': 'Citation not found in Crossref database',
                 'severity': 'high'
             })
-        
-        time.sleep(0.1)  # Be nice to the API
-    
-    # Estimate for remaining references
-    if total_checked > 10:
-        verified_rate = verified / 10
-        broken_rate = broken / 10
-        verified += int((total_checked - 10) * verified_rate)
-        broken += int((total_checked - 10) * broken_rate)
     
     citation_score = max(0, min(100, int((verified / max(total_checked, 1)) * 100)))
     
@@ -139,19 +149,23 @@ def analyze_citations(references: List[str]) -> Dict:
         'total_checked': total_checked,
         'verified_count': verified,
         'broken_count': broken,
+        'unverified_count': unverified,
         'score': citation_score,
-        'issues': issues
+        'issues': issues,
+        'lookups': lookups,
+        'lookup_time_ms': elapsed_ms
     }
 
-def analyze_methodology(text: str) -> Dict:
+def analyze_methodology(text: Union[str, TextFeatures]) -> Dict:
     """Analyze methodology using keyword detection"""
+    features = ensure_features(text, AUDIT_KEYWORDS, PERSONAL_PRONOUNS)
     issues = []
     score = 85  # Start with high score
     
     # Check for common methodology issues
-    if 'sample size' in text.lower() or 'n=' in text.lower():
+    if features.has('sample size') or features.has('n='):
         # Try to extract sample size
-        n_match = re.search(r'n\s*=\s*(\d+)', text.lower())
+        n_match = re.search(r'n\s*=\s*(\d+)', features.lower)
         if n_match:
             n = int(n_match.group(1))
             if n < 30:
@@ -162,7 +176,7 @@ def analyze_methodology(text: str) -> Dict:
                 })
                 score -= 15
     
-    if 'control group' not in text.lower() and 'experiment' in text.lower():
+    if not features.has('control group') and features.has('experiment'):
         issues.append({
             'type': 'Control Group',
             'description': 'No explicit control group mentioned.',
@@ -170,9 +184,9 @@ def analyze_methodology(text: str) -> Dict:
         })
         score -= 10
     
-    if 'p-value' in text.lower() or 'p <' in text.lower():
+    if features.has('p-value') or features.has('p <'):
         # Check for p-hacking indicators
-        p_values = re.findall(r'p\s*[<>=]\s*0\.0\d+', text.lower())
+        p_values = re.findall(r'p\s*[<>=]\s*0\.0\d+', features.lower)
         if len(p_values) > 5:
             issues.append({
                 'type': 'Statistical Testing',
@@ -186,13 +200,14 @@ def analyze_methodology(text: str) -> Dict:
         'issues': issues
     }
 
-def analyze_reproducibility(text: str, github_url: Optional[str], dataset_path: Optional[str]) -> Dict:
+def analyze_reproducibility(text: Union[str, TextFeatures], github_url: Optional[str], dataset_path: Optional[str]) -> Dict:
     """Analyze reproducibility"""
+    features = ensure_features(text, AUDIT_KEYWORDS, PERSONAL_PRONOUNS)
     checklist = []
     score = 50  # Base score
     
     # Check for code availability
-    if github_url or 'github.com' in text.lower() or 'code available' in text.lower():
+    if github_url or features.has('github.com') or features.has('code available'):
         checklist.append({
             'item': 'Code Available',
             'status': 'Provided',
@@ -207,7 +222,7 @@ def analyze_reproducibility(text: str, github_url: Optional[str], dataset_path:
         })
     
     # Check for data availability
-    if dataset_path or 'data available' in text.lower():
+    if dataset_path or features.has('data available'):
         checklist.append({
             'item': 'Data Available',
             'status': 'Provided',
@@ -222,7 +237,7 @@ def analyze_reproducibility(text: str, github_url: Optional[str], dataset_path:
         })
     
     # Check for methodology details
-    if 'hyperparameter' in text.lower() or 'parameter' in text.lower():
+    if features.has('hyperparameter') or features.has('parameter'):
         checklist.append({
             'item': 'Parameters Documented',
             'status': 'Provided',
@@ -241,29 +256,28 @@ def analyze_reproducibility(text: str, github_url: Optional[str], dataset_path:
         'checklist': checklist
     }
 
-def estimate_ai_content(text: str) -> Dict:
+def estimate_ai_content(text: Union[str, TextFeatures]) -> Dict:
     """Estimate AI-generated content probability using heuristics"""
+    features = ensure_features(text, AUDIT_KEYWORDS, PERSONAL_PRONOUNS)
     # Simple heuristic-based detection
     ai_indicators = 0
     total_indicators = 10
     sections_flagged = []
     
     # Check for overly formal language
-    formal_phrases = ['it is important to note', 'in conclusion', 'furthermore', 'moreover', 'delve into']
-    for phrase in formal_phrases:
-        if phrase in text.lower():
+    for phrase in FORMAL_PHRASES:
+        if features.has(phrase):
             ai_indicators += 1
     
     # Check for repetitive sentence structures
-    sentences = text.split('.')
-    if len(sentences) > 10:
-        avg_length = sum(len(s.split()) for s in sentences) / len(sentences)
+    if features.sentence_count > 10:
+        avg_length = features.word_count / features.sentence_count
         if 15 < avg_length < 25:  # AI tends to generate medium-length sentences
             ai_indicators += 1
     
     # Check for lack of personal pronouns (AI often avoids "I", "we")
-    personal_pronouns = len(re.findall(r'\b(I|we|our|my)\b', text, re.IGNORECASE))
-    if personal_pronouns < 5 and len(text) > 1000:
+    personal_pronouns = features.word_count_of(*PERSONAL_PRONOUNS)
+    if personal_pronouns < 5 and len(features.text) > 1000:
         ai_indicators += 1
         sections_flagged.append('Introduction')
     
@@ -277,14 +291,150 @@ def estimate_ai_content(text: str) -> Dict:
         'sections_flagged': sections_flagged
     }
 
-def analyze_paper(file_path: str, github_url: Optional[str] = None, dataset_path: Optional[str] = None):
+def analyze_novelty(text: Union[str, TextFeatures], k: int = 5, exclude: Iterable[int] = ()) -> Dict:
+    """Score novelty from the most similar prior submissions in the local similarity index"""
+    features = ensure_features(text, AUDIT_KEYWORDS, PERSONAL_PRONOUNS)
+    index = similarity_index.get_index()
+    tf = similarity_index.term_frequencies(features.lower)
+    similar = index.query(tf, k, exclude=exclude)
+    top_similarity = similar[0]['similarity'] if similar else 0.0
+    
+    return {
+        'score': max(0, min(100, round(100 * (1 - top_similarity)))),
+        'similar_works': [
+            {
+                'submission_id': work['doc_id'],
+                'title': work['title'],
+                'year': work['year'],
+                'similarity': f"{round(work['similarity'] * 100)}%"
+            }
+            for work in similar
+        ],
+        # Stored in the index once the audit completes (all terms count towards df); not part of the report
+        'index_terms': tf
+    }
+
+def extract_metadata(text: Union[str, TextFeatures]) -> Dict:
+    """Abstract and keyphrases, read later by the reference recommendations"""
+    features = ensure_features(text, AUDIT_KEYWORDS, PERSONAL_PRONOUNS)
+    return keyphrases.extract_metadata(features.text, features.lower)
+
+def analyze_duplicates(text: str, exclude: Iterable[int] = ()) -> Dict:
+    """Find earlier submissions this paper reuses passages from"""
+    started = time.perf_counter()
+    fingerprint = duplicate_detector.fingerprint_text(text)
+    matches = duplicate_detector.get_index().find(text, fingerprint, exclude=exclude)
+    
+    return {
+        'match_count': len(matches),
+        'matches': matches,
+        'lookup_time_ms': round((time.perf_counter() - started) * 1000, 1),
+        # Stored in the index once the audit completes; not part of the report
+        'index_entry': {
+            'signature': fingerprint['signature'],
+            'fingerprints': fingerprint['fingerprints'],
+            'shingle_count': fingerprint['shingle_count']
+        }
+    }
+
+# Stages whose output is stored under the same key in the report, so a revision can reuse it
+REUSABLE_STAGES = ('citations', 'methodology', 'reproducibility', 'ai_content', 'metadata')
+
+def input_key(*parts) -> str:
+    """Fingerprint of a stage's inputs; includes the engine version so analyzer changes never reuse old output"""
+    payload = json.dumps([AUDIT_ENGINE_VERSION, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def revision_inputs(document: ExtractedDocument, references: List[Dict]) -> Dict:
+    """Per-page and per-reference hashes kept in the report so the next revision can diff against them"""
+    return {
+        'page_hashes': [input_key(page) for page in document.pages],
+        'reference_hashes': sorted({input_key(normalize_citation(ref['text'])) for ref in references})
+    }
+
+def previous_outputs(parent_report: Dict) -> Dict[str, Dict]:
+    """Reusable stage outputs of a parent report, in the form run_pipeline() expects"""
+    keys = parent_report.get('pipeline', {}).get('inputs', {})
+    previous = {
+        name: {'key': keys[name], 'output': parent_report[name]}
+        for name in REUSABLE_STAGES
+        if name in keys and name in parent_report
+    }
+    if parent_report.get('citations', {}).get('unverified_count'):
+        # Lookups failed last time; try them again
+        previous.pop('citations', None)
+    return previous
+
+def diff_revision(parent_report: Dict, inputs: Dict) -> Dict:
+    """What changed between a parent report's inputs and this revision's"""
+    parent_inputs = parent_report.get('pipeline', {}).get('revision_inputs', {})
+    parent_pages = set(parent_inputs.get('page_hashes', []))
+    parent_refs = set(parent_inputs.get('reference_hashes', []))
+    refs = set(inputs['reference_hashes'])
+    return {
+        'pages_total': len(inputs['page_hashes']),
+        'pages_changed': sum(1 for h in inputs['page_hashes'] if h not in parent_pages),
+        'references_added': len(refs - parent_refs),
+        'references_removed': len(parent_refs - refs)
+    }
+
+def compute_integrity_score(citation_score: float, methodology_score: float, reproducibility_score: float,
+                            novelty_score: float) -> int:
+    return int(
+        citation_score * 0.3 +
+        methodology_score * 0.25 +
+        reproducibility_score * 0.25 +
+        novelty_score * 0.2
+    )
+
+def risk_level(integrity_score: int) -> str:
+    return 'Low' if integrity_score > 85 else 'Medium' if integrity_score > 70 else 'High'
+
+def refresh_corpus_stages(results: Dict, text: str, exclude: Iterable[int] = ()) -> Dict:
+    """
+    Cached analyze_paper() output with the novelty and duplicate stages rerun against the
+    current indexes. Both compare the paper with the rest of the corpus, so an identical
+    upload must not inherit them from the audit its result was cached from.
+    """
+    report = json.loads(results['json_content'])
+    novelty_analysis = analyze_novelty(text, exclude=exclude)
+    similarity_terms = novelty_analysis.pop('index_terms')
+    duplicate_analysis = analyze_duplicates(text, exclude=exclude)
+    duplicate_entry = duplicate_analysis.pop('index_entry')
+
+    integrity_score = compute_integrity_score(
+        results['citation_score'], results['methodology_score'], results['reproducibility_score'],
+        novelty_analysis['score']
+    )
+    report['novelty'] = novelty_analysis
+    report['duplicates'] = duplicate_analysis
+    report['summary'].update(integrity_score=integrity_score, risk_level=risk_level(integrity_score))
+    return dict(
+        results,
+        integrity_score=integrity_score,
+        novelty_score=novelty_analysis['score'],
+        json_content=json.dumps(report),
+        similarity_terms=similarity_terms,
+        duplicate_fingerprint=duplicate_entry
+    )
+
+def analyze_paper(file_path: str, github_url: Optional[str] = None, dataset_path: Optional[str] = None,
+                  revision_base: Optional[Dict] = None):
     """
     Complete AI audit process with REAL text extraction and citation checking
+
+    revision_base audits the file as a revision of an earlier submission:
+    {'parent_id': ..., 'parent_report': <its report JSON>, 'exclude': <ids of all its ancestors>}.
+    Stages whose inputs did not change reuse the parent's output, and the ancestors
+    are left out of the novelty and duplicate comparisons.
     """
     
     # Extract text from paper
     print(f"Extracting text from {file_path}...")
-    text = extract_text(file_path)
+    extract_started = time.perf_counter()
+    document = extract_document(file_path)
+    extract_ms = round((time.perf_counter() - extract_started) * 1000, 1)
+    text = document.text
     
     if not text:
         # Fallback to simulation if extraction fails
@@ -293,60 +443,82 @@ def analyze_paper(file_path: str, github_url: Optional[str] = None, dataset_path
     
     print(f"Extracted {len(text)} characters")
     
-    # Extract and analyze references
-    print("Analyzing citations...")
-    references = extract_references(text)
-    citation_analysis = analyze_citations(references)
-    
-    # Analyze methodology
-    print("Analyzing methodology...")
-    methodology_analysis = analyze_methodology(text)
-    
-    # Analyze reproducibility
-    print("Analyzing reproducibility...")
-    reproducibility_analysis = analyze_reproducibility(text, github_url, dataset_path)
-    
-    # Estimate AI-generated content
-    print("Checking for AI-generated content...")
-    ai_analysis = estimate_ai_content(text)
-    
-    # Calculate novelty score (simplified - would need embeddings for real similarity)
-    novelty_score = random.randint(60, 90)
+    parent_report = (revision_base or {}).get('parent_report') or {}
+    exclude = (revision_base or {}).get('exclude', [])
+    text_key = input_key(text)
+    
+    # Citation lookups wait on the network, so they run alongside the CPU analyzers
+    print("Running audit stages...")
+    pipeline = run_pipeline([
+        Stage('features', lambda: build_text_features(text)),
+        Stage('references', lambda: extract_references(text)),
+        Stage('citations', lambda references: analyze_citations(references), deps=['references'], kind='io',
+              key=lambda references: input_key(references)),
+        Stage('methodology', lambda features: analyze_methodology(features), deps=['features'],
+              key=lambda features: text_key),
+        Stage('reproducibility', lambda features: analyze_reproducibility(features, github_url, dataset_path), deps=['features'],
+              key=lambda features: input_key(text_key, github_url, bool(dataset_path))),
+        Stage('ai_content', lambda features: estimate_ai_content(features), deps=['features'],
+              key=lambda features: text_key),
+        Stage('metadata', lambda features: extract_metadata(features), deps=['features'],
+              key=lambda features: text_key),
+        # Compared against the corpus as it is now, so always rerun
+        Stage('novelty', lambda features: analyze_novelty(features, exclude=exclude), deps=['features']),
+        Stage('duplicates', lambda: analyze_duplicates(text, exclude=exclude)),
+        Stage('dataset', lambda: dataset_profiler.profile_dataset(dataset_path)),
+    ], previous=previous_outputs(parent_report))
+    metrics.AUDIT_STAGE_DURATION.observe(extract_ms / 1000, 'extract')
+    for name, timing in pipeline.timings.items():
+        if timing.get('reused'):
+            metrics.AUDIT_STAGES_REUSED.inc(name)
+        else:
+            metrics.AUDIT_STAGE_DURATION.observe(timing['wall_ms'] / 1000, name)
+    inputs = revision_inputs(document, pipeline['references'])
+    features = pipeline['features']
+    citation_analysis = pipeline['citations']
+    methodology_analysis = pipeline['methodology']
+    reproducibility_analysis = pipeline['reproducibility']
+    ai_analysis = pipeline['ai_content']
+    novelty_analysis = dict(pipeline['novelty'])
+    similarity_terms = novelty_analysis.pop('index_terms')
+    duplicate_analysis = dict(pipeline['duplicates'])
+    duplicate_entry = duplicate_analysis.pop('index_entry')
+    
+    novelty_score = novelty_analysis['score']
     
     # Calculate overall integrity score
-    integrity_score = int(
-        citation_analysis['score'] * 0.3 +
-        methodology_analysis['score'] * 0.25 +
-        reproducibility_analysis['score'] * 0.25 +
-        novelty_score * 0.2
+    integrity_score = compute_integrity_score(
+        citation_analysis['score'], methodology_analysis['score'], reproducibility_analysis['score'], novelty_score
     )
     
     # Generate comprehensive report
     report = {
         'summary': {
             'integrity_score': integrity_score,
-            'risk_level': 'Low' if integrity_score > 85 else 'Medium' if integrity_score > 70 else 'High',
+            'risk_level': risk_level(integrity_score),
             'audit_date': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-            'word_count': len(text.split()),
-            'page_count': len(text) // 3000  # Rough estimate
+            'word_count': features.word_count,
+            'page_count': document.page_count if file_path.endswith('.pdf') else len(text) // 3000,  # DOCX has no real pages
+            'failed_pages': document.failed_pages
         },
         'citations': citation_analysis,
         'methodology': methodology_analysis,
         'reproducibility': reproducibility_analysis,
-        'novelty': {
-            'score': novelty_score,
-            'similar_works': [
-                {'title': 'Deep Learning for Research Audits', 'year': 2022, 'similarity': '85%'},
-                {'title': 'Automated Peer Review Systems', 'year': 2021, 'similarity': '72%'}
-            ]
-        },
+        'novelty': novelty_analysis,
+        'duplicates': duplicate_analysis,
         'ai_content': ai_analysis,
-        'dataset_analysis': {
-            'status': 'Analyzed' if dataset_path else 'Skipped',
-            'anomalies': [] if not dataset_path else ['Dataset provided for analysis']
-        },
-        'suggestions': generate_suggestions(citation_analysis, methodology_analysis, reproducibility_analysis)
+        'dataset_analysis': pipeline['dataset'],
+        'metadata': pipeline['metadata'],
+        'suggestions': generate_suggestions(citation_analysis, methodology_analysis, reproducibility_analysis),
+        'pipeline': dict(pipeline.to_dict(), extract_ms=extract_ms, revision_inputs=inputs)
     }
+    if revision_base:
+        report['revision'] = dict(
+            diff_revision(parent_report, inputs),
+            parent_id=revision_base.get('parent_id'),
+            reused_stages=pipeline.reused,
+            rerun_stages=sorted(set(pipeline.timings) - set(pipeline.reused))
+        )
     
     return {
         'integrity_score': integrity_score,
@@ -355,7 +527,11 @@ def analyze_paper(file_path: str, github_url: Optional[str] = None, dataset_path
         'reproducibility_score': reproducibility_analysis['score'],
         'novelty_score': novelty_score,
         'ai_probability_score': ai_analysis['probability'],
-        'json_content': json.dumps(report)
+        'json_content': json.dumps(report),
+        'similarity_terms': similarity_terms,
+        'duplicate_fingerprint': duplicate_entry,
+        # Compressed here, in the worker process; saved once by save_audit_report
+        'extracted_text': text_store.pack_document(document)
     }
 
 def generate_suggestions(citation_analysis, methodology_analysis, reproducibility_analysis) -> List[str]:
@@ -430,5 +606,6 @@ def simulate_audit():
         'reproducibility_score': reproducibility_score,
         'novelty_score': novelty_score,
         'ai_probability_score': ai_probability_score,
-        'json_content': json.dumps(report)
+        'json_content': json.dumps(report),
+        'simulated': True
     }
@@ -0,0 +1,109 @@
+"""
+Process-pool executor for CPU-heavy audits.
+
+PDF parsing and the regex analyzers run in separate worker processes so the
+API process only enqueues audits and keeps serving requests. Audit workers
+(see audit_worker) wait on the returned futures and save the results.
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+import audit_engine
+import metrics
+import pdf_extraction
+
+AUDIT_WORKERS = int(os.getenv('AUDIT_WORKERS', '2'))
+# Address-space limit per worker process in MB (0 disables the limit)
+AUDIT_WORKER_MEMORY_MB = int(os.getenv('AUDIT_WORKER_MEMORY_MB', '2048'))
+
+
+def _init_worker(memory_mb: int, workers: int):
+    if not os.getenv('PDF_EXTRACT_WORKERS'):
+        # Each audit process extracts PDFs with its own pool; share the CPUs between them
+        pdf_extraction.PDF_EXTRACT_WORKERS = pdf_extraction.default_workers(workers)
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows; run without a limit
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_audit(file_path: str, github_url: Optional[str], dataset_path: Optional[str],
+               revision_base: Optional[Dict] = None) -> Dict:
+    results = audit_engine.analyze_paper(file_path, github_url, dataset_path, revision_base)
+    # Samples recorded in this worker process travel back with the result; see take_metrics()
+    results['metrics'] = metrics.drain()
+    return results
+
+
+def take_metrics(results: Dict) -> Dict:
+    """Merge the metrics a worker process sent with its result into this process's registry"""
+    metrics.merge(results.pop('metrics', None))
+    return results
+
+
+class AuditExecutor:
+    """Runs analyze_paper() in worker processes with a per-worker memory limit"""
+
+    def __init__(self, workers: int = AUDIT_WORKERS, memory_mb: int = AUDIT_WORKER_MEMORY_MB):
+        self.workers = max(1, workers)
+        self.memory_mb = memory_mb
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        # spawn avoids forking the API process with its threads and open connections
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.memory_mb, self.workers)
+        )
+
+    def submit(self, file_path: str, github_url: Optional[str] = None, dataset_path: Optional[str] = None,
+               revision_base: Optional[Dict] = None) -> concurrent.futures.Future:
+        """Queue an audit; the future's result goes through take_metrics()"""
+        with self._lock:
+            try:
+                future = self._pool.submit(_run_audit, file_path, github_url, dataset_path, revision_base)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for exceeding memory); start a fresh pool
+                print("Audit worker pool broken, restarting it")
+                self._pool.shutdown(wait=False)
+                self._pool = self._new_pool()
+                future = self._pool.submit(_run_audit, file_path, github_url, dataset_path, revision_base)
+        return future
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            self._pool.shutdown(wait=wait)
+
+
+_executor: Optional[AuditExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> AuditExecutor:
+    """Process-wide executor, started on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = AuditExecutor()
+    return _executor
+
+
+def shutdown_executor(wait: bool = True):
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
@@ -0,0 +1,144 @@
+"""
+Stage-graph runner for the audit.
+
+Each stage declares the stages it depends on. A stage starts as soon as all
+of its dependencies have finished, on a thread pool, so network-bound stages
+(Crossref lookups) overlap with the CPU-bound analyzers and the audit takes
+about as long as its slowest path rather than the sum of all stages.
+
+A stage may also declare a key function that fingerprints its inputs. When
+a previous run (e.g. the audit of a submission's parent revision) recorded
+the same key, its output is reused instead of running the stage again.
+"""
+import concurrent.futures
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class Stage:
+    """A named unit of audit work. fn receives the outputs of its dependencies as keyword arguments."""
+
+    def __init__(self, name: str, fn: Callable[..., Any], deps: Iterable[str] = (), kind: str = 'cpu',
+                 key: Optional[Callable[..., str]] = None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.kind = kind  # 'cpu' or 'io'; informational
+        self.key = key  # Called like fn; returns a fingerprint of the stage's inputs. None: never reused
+
+
+class PipelineResult:
+    def __init__(self, outputs: Dict[str, Any], timings: Dict[str, Dict], total_ms: float,
+                 keys: Optional[Dict[str, str]] = None):
+        self.outputs = outputs
+        self.timings = timings
+        self.total_ms = total_ms
+        self.keys = keys or {}
+
+    @property
+    def reused(self) -> List[str]:
+        return sorted(name for name, timing in self.timings.items() if timing.get('reused'))
+
+    def __getitem__(self, name: str) -> Any:
+        return self.outputs[name]
+
+    def to_dict(self) -> Dict:
+        """Timing summary for the report JSON"""
+        return {
+            'total_ms': self.total_ms,
+            'stages': self.timings,
+            'inputs': self.keys
+        }
+
+
+def _check_graph(stages: List[Stage]):
+    names = {s.name for s in stages}
+    if len(names) != len(stages):
+        raise ValueError("Duplicate stage names in audit pipeline")
+    for stage in stages:
+        missing = set(stage.deps) - names
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stages {sorted(missing)}")
+
+    # Kahn's algorithm: every stage must be reachable without a cycle
+    remaining = {s.name: set(s.deps) for s in stages}
+    while remaining:
+        ready = [n for n, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cycle in audit pipeline between {sorted(remaining)}")
+        for n in ready:
+            del remaining[n]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_pipeline(stages: List[Stage], max_workers: Optional[int] = None,
+                 initial: Optional[Dict[str, Any]] = None,
+                 previous: Optional[Dict[str, Dict]] = None) -> PipelineResult:
+    """
+    Run stages as their dependencies complete. A failing stage aborts the pipeline with its exception.
+    previous maps stage names to {'key': ..., 'output': ...} from an earlier run; a keyed stage whose
+    key matches takes that output without running.
+    """
+    _check_graph(stages)
+    outputs: Dict[str, Any] = dict(initial or {})
+    timings: Dict[str, Dict] = {}
+    keys: Dict[str, str] = {}
+    previous = previous or {}
+    by_name = {s.name: s for s in stages}
+    waiting = {s.name for s in stages if s.name not in outputs}
+    started = time.perf_counter()
+
+    def run(stage: Stage):
+        stage_started = time.perf_counter()
+        result = stage.fn(**{d: outputs[d] for d in stage.deps})
+        finished = time.perf_counter()
+        return result, stage_started, finished
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(stages),
+                                               thread_name_prefix='audit-stage') as pool:
+        running: Dict[concurrent.futures.Future, Stage] = {}
+
+        def launch_ready() -> bool:
+            launched = False
+            for name in sorted(waiting):
+                stage = by_name[name]
+                if not all(d in outputs for d in stage.deps):
+                    continue
+                waiting.discard(name)
+                launched = True
+                if stage.key is not None:
+                    keys[name] = stage.key(**{d: outputs[d] for d in stage.deps})
+                    earlier = previous.get(name)
+                    if earlier is not None and earlier.get('key') == keys[name]:
+                        outputs[name] = earlier['output']
+                        timings[name] = {
+                            'kind': stage.kind,
+                            'deps': list(stage.deps),
+                            'start_ms': round((time.perf_counter() - started) * 1000, 1),
+                            'wall_ms': 0.0,
+                            'reused': True
+                        }
+                        continue
+                running[pool.submit(run, stage)] = stage
+            return launched
+
+        # Reused outputs can make further stages ready straight away
+        while launch_ready():
+            pass
+        while running:
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                result, stage_started, finished = future.result()
+                outputs[stage.name] = result
+                timings[stage.name] = {
+                    'kind': stage.kind,
+                    'deps': list(stage.deps),
+                    'start_ms': round((stage_started - started) * 1000, 1),
+                    'wall_ms': round((finished - stage_started) * 1000, 1)
+                }
+            while launch_ready():
+                pass
+
+    return PipelineResult(outputs, timings, round((time.perf_counter() - started) * 1000, 1), keys)
@@ -0,0 +1,292 @@
+"""
+Audit worker: claims jobs from the durable queue and runs them.
+
+Each worker thread opens its own database sessions, leases one job at a time,
+runs the audit on the process-pool executor and heartbeats the lease while it
+waits. Run any number of these next to the API:
+
+    python audit_worker.py --concurrency 4
+
+The API also starts AUDIT_EMBEDDED_WORKERS worker threads in-process (set it
+to 0 when running standalone workers).
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+import audit_cache
+import audit_engine
+import audit_executor
+import duplicate_detector
+import job_queue
+import metrics
+import models
+import similarity_index
+import text_store
+from database import Base, SessionLocal, add_missing_columns, add_missing_indexes, engine
+from email_service import send_audit_complete_email
+
+AUDIT_EMBEDDED_WORKERS = int(os.getenv('AUDIT_EMBEDDED_WORKERS', '1'))
+AUDIT_POLL_SECONDS = float(os.getenv('AUDIT_POLL_SECONDS', '2'))
+AUDIT_HEARTBEAT_SECONDS = float(os.getenv('AUDIT_HEARTBEAT_SECONDS', '30'))
+# Port for a standalone worker's /metrics endpoint (0 disables it)
+AUDIT_WORKER_METRICS_PORT = int(os.getenv('AUDIT_WORKER_METRICS_PORT', '0'))
+# Longest parent chain followed when excluding earlier revisions from comparisons
+MAX_REVISION_DEPTH = 50
+
+
+def save_audit_report(submission_id: int, results: dict, db: Session, commit: bool = True) -> models.Submission:
+    """Persist analyze_paper() output and mark the submission completed. Pass commit=False to stay in the caller's transaction."""
+    report = models.AuditReport(
+        submission_id=submission_id,
+        integrity_score=results["integrity_score"],
+        citation_score=results["citation_score"],
+        methodology_score=results["methodology_score"],
+        reproducibility_score=results["reproducibility_score"],
+        novelty_score=results["novelty_score"],
+        ai_probability_score=results["ai_probability_score"],
+        json_content=results["json_content"]
+    )
+
+    db.add(report)
+    if results.get("extracted_text"):
+        text_store.save_text(db, submission_id, results["extracted_text"])
+
+    submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
+    submission.status = models.SubmissionStatus.COMPLETED
+    if commit:
+        db.commit()
+        db.refresh(submission)
+    return submission
+
+
+def notify_audit_complete(user_email: str, user_name: Optional[str], submission_id: int, paper_title: str, integrity_score: float):
+    report_url = f"http://localhost:3000/report/{submission_id}"
+    send_audit_complete_email(
+        user_email=user_email,
+        user_name=user_name or "Researcher",
+        paper_title=paper_title,
+        integrity_score=int(integrity_score),
+        report_url=report_url
+    )
+
+
+def load_revision_base(db: Session, submission_id: int) -> Optional[dict]:
+    """Parent report and ancestor ids for a revision, or None for a first upload"""
+    submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
+    if submission is None or submission.parent_id is None:
+        return None
+    parent = db.query(models.Submission).filter(models.Submission.id == submission.parent_id).first()
+    if parent is None:
+        return None
+
+    ancestors = []
+    node = parent
+    while node is not None and node.id not in ancestors and len(ancestors) < MAX_REVISION_DEPTH:
+        ancestors.append(node.id)
+        node = db.query(models.Submission).filter(models.Submission.id == node.parent_id).first() if node.parent_id else None
+
+    parent_report = {}
+    if parent.report is not None and parent.report.json_content:
+        parent_report = json.loads(parent.report.json_content)
+    return {"parent_id": parent.id, "parent_report": parent_report, "exclude": ancestors}
+
+
+def index_submission(submission: models.Submission, results: dict):
+    try:
+        similarity_index.get_index().add(
+            submission.id,
+            results.get("similarity_terms") or {},
+            title=submission.title,
+            year=submission.created_at.year if submission.created_at else None
+        )
+    except Exception as e:
+        print(f"Similarity indexing failed for submission {submission.id}: {e}")
+
+    entry = results.get("duplicate_fingerprint")
+    if entry:
+        try:
+            duplicate_detector.get_index().add(
+                submission.id,
+                entry["signature"],
+                entry["fingerprints"],
+                entry["shingle_count"],
+                title=submission.title
+            )
+        except Exception as e:
+            print(f"Duplicate indexing failed for submission {submission.id}: {e}")
+
+
+def finish_from_cache(db: Session, submission_id: int, cached: dict, cache_key: Optional[str] = None) -> Optional[dict]:
+    """
+    Complete a new submission from a cached audit result. The novelty and duplicate stages are
+    rerun against the current indexes instead of being copied, and the submission is indexed
+    like any audited one. If that is not possible a full audit is queued instead.
+    Returns the saved results, or None when an audit was queued.
+    """
+    try:
+        content_hash = (cached.get("extracted_text") or {}).get("content_hash")
+        text = text_store.load_stored_text(db, content_hash) if content_hash else None
+        if text is None:
+            raise ValueError("text of the cached audit is not stored")
+        revision_base = load_revision_base(db, submission_id) or {}
+        results = audit_engine.refresh_corpus_stages(cached, text, exclude=revision_base.get("exclude", []))
+        submission = save_audit_report(submission_id, results, db)
+    except Exception as e:
+        print(f"Cached audit not reusable for submission {submission_id}, queueing a full audit: {e}")
+        db.rollback()
+        submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
+        job_queue.enqueue(db, submission_id, submission.file_path, submission.github_url, submission.dataset_path, cache_key)
+        return None
+
+    index_submission(submission, results)
+    return results
+
+
+class AuditWorker:
+    """Pool of threads that each lease and run one audit job at a time"""
+
+    def __init__(self, concurrency: int = 1, executor: Optional[audit_executor.AuditExecutor] = None):
+        self.concurrency = max(1, concurrency)
+        self.executor = executor or audit_executor.get_executor()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._base_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self):
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, args=(f"{self._base_id}:{i}",),
+                                      name=f"audit-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def request_stop(self):
+        self._stop.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        self.request_stop()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def wait(self):
+        for thread in self._threads:
+            while thread.is_alive():
+                thread.join(1)
+
+    def _loop(self, worker_id: str):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                job = job_queue.claim(db, worker_id)
+                if job is None:
+                    db.close()
+                    self._stop.wait(AUDIT_POLL_SECONDS)
+                    continue
+                self.run_job(db, job, worker_id)
+            except Exception as e:
+                print(f"Audit worker {worker_id} error: {e}")
+                self._stop.wait(AUDIT_POLL_SECONDS)
+            finally:
+                db.close()
+
+    def run_job(self, db: Session, job: models.AuditJob, worker_id: str):
+        job_id, submission_id, cache_key = job.id, job.submission_id, job.cache_key
+        print(f"Worker {worker_id} running audit job {job_id} (attempt {job.attempts})")
+        if job.available_at:
+            metrics.AUDIT_QUEUE_WAIT.observe(max((datetime.datetime.utcnow() - job.available_at).total_seconds(), 0))
+        started = time.perf_counter()
+        future = self.executor.submit(job.file_path, job.github_url, job.dataset_path,
+                                      revision_base=load_revision_base(db, submission_id))
+
+        while True:
+            try:
+                results = audit_executor.take_metrics(future.result(timeout=AUDIT_HEARTBEAT_SECONDS))
+                break
+            except concurrent.futures.TimeoutError:
+                if not job_queue.heartbeat(db, job_id, worker_id):
+                    print(f"Worker {worker_id} lost the lease on job {job_id}")
+                    metrics.AUDITS.inc('lease_lost')
+                    # A running process-pool task cannot be cancelled: the audit runs to the end
+                    # in its worker process and its result is discarded
+                    return
+            except Exception as e:
+                print(f"Audit failed: {e}")
+                metrics.AUDITS.inc('failed')
+                db.rollback()
+                job_queue.fail(db, job_id, worker_id, repr(e))
+                return
+        metrics.AUDIT_DURATION.observe(time.perf_counter() - started)
+
+        try:
+            if not job_queue.complete(db, job_id, worker_id, commit=False):
+                # Lease was lost and another worker owns the job now
+                metrics.AUDITS.inc('lease_lost')
+                db.rollback()
+                return
+            if cache_key:
+                # Committed with the report, so only by the worker that still holds the lease
+                audit_cache.store_result(db, cache_key, results, commit=False)
+            submission = save_audit_report(submission_id, results, db)
+        except Exception as e:
+            print(f"Saving audit {job_id} failed: {e}")
+            metrics.AUDITS.inc('save_failed')
+            db.rollback()
+            job_queue.fail(db, job_id, worker_id, repr(e))
+            return
+        metrics.AUDITS.inc('completed')
+
+        # Later audits compare themselves against this submission
+        index_submission(submission, results)
+
+        # Cohort uploads are followed on the batch progress endpoint instead of one email per paper
+        if submission.batch_id is not None:
+            return
+
+        # Send audit complete email
+        user = db.query(models.User).filter(models.User.id == submission.owner_id).first()
+        if user:
+            notify_audit_complete(user.email, user.full_name, submission_id, submission.title, results["integrity_score"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ResearchSentinel audit workers")
+    parser.add_argument('--concurrency', type=int, default=audit_executor.AUDIT_WORKERS,
+                        help="Audits to run at once (also the number of worker processes)")
+    parser.add_argument('--metrics-port', type=int, default=AUDIT_WORKER_METRICS_PORT,
+                        help="Serve Prometheus metrics on this port (0 disables)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
+    executor = audit_executor.AuditExecutor(workers=args.concurrency)
+    worker = AuditWorker(concurrency=args.concurrency, executor=executor)
+
+    def handle_signal(signum, frame):
+        print("Stopping audit workers...")
+        worker.request_stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        print(f"Serving metrics on port {args.metrics_port}")
+
+    print(f"Audit worker started with concurrency {args.concurrency}")
+    worker.start()
+    worker.wait()
+    executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Bulk intake for cohort uploads.
+
+A batch arrives either as one zip archive or as several files, optionally
+with a manifest (CSV or JSON) giving per-file metadata. Zip entries are
+streamed straight from the spooled upload to disk one at a time, hashing on
+the way, so the archive is never held in memory.
+"""
+import csv
+import io
+import json
+import os
+import uuid
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import audit_cache
+
+BATCH_MAX_FILES = int(os.getenv('BATCH_MAX_FILES', '500'))
+MAX_FILE_SIZE_MB = int(os.getenv('MAX_FILE_SIZE_MB', '50'))
+PAPER_EXTENSIONS = ('.pdf', '.docx')
+MANIFEST_NAMES = ('manifest.csv', 'manifest.json')
+MAX_MANIFEST_BYTES = 5 * 1024 * 1024
+MANIFEST_FIELDS = ('title', 'domain', 'degree_level', 'github_url', 'owner_email')
+
+
+class BatchError(ValueError):
+    """The batch cannot be accepted as a whole"""
+
+
+class SavedPaper:
+    """One paper written to the upload directory"""
+
+    def __init__(self, name: str, file_path: str, content_hash: str):
+        self.name = name
+        self.file_path = file_path
+        self.content_hash = content_hash
+        self.meta: Dict[str, str] = {}
+
+
+class _LimitedReader:
+    """File wrapper that raises BatchError once more than max_bytes have been read"""
+
+    def __init__(self, src: BinaryIO, name: str, max_bytes: int):
+        self.src = src
+        self.name = name
+        self.remaining = max_bytes
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.src.read(size)
+        self.remaining -= len(chunk)
+        if self.remaining < 0:
+            raise BatchError(f"{self.name} is larger than {MAX_FILE_SIZE_MB} MB")
+        return chunk
+
+
+def read_manifest(src: BinaryIO, filename: str) -> bytes:
+    """A standalone manifest upload, read up to MAX_MANIFEST_BYTES"""
+    data = src.read(MAX_MANIFEST_BYTES + 1)
+    if len(data) > MAX_MANIFEST_BYTES:
+        raise BatchError(f"{filename} is too large for a manifest")
+    return data
+
+
+def parse_manifest(data: bytes, filename: str) -> Dict[str, Dict[str, str]]:
+    """Map each paper's file name (without directories) to its metadata"""
+    text = data.decode('utf-8-sig', errors='replace')
+    if filename.lower().endswith('.json'):
+        try:
+            rows = json.loads(text)
+        except ValueError:
+            raise BatchError(f"{filename} is not valid JSON")
+        if isinstance(rows, dict):
+            if not all(isinstance(meta, dict) for meta in rows.values()):
+                raise BatchError("A JSON manifest object must map file names to objects")
+            rows = [dict(meta, filename=name) for name, meta in rows.items()]
+        elif not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise BatchError("A JSON manifest must be a list of objects or an object keyed by file name")
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+    manifest = {}
+    for row in rows:
+        name = os.path.basename((row.get('filename') or row.get('file') or '').strip())
+        if not name:
+            raise BatchError("Every manifest row needs a filename")
+        manifest[name] = {k: str(row[k]).strip() for k in MANIFEST_FIELDS if row.get(k)}
+    return manifest
+
+
+def _is_paper(name: str) -> bool:
+    base = os.path.basename(name)
+    return bool(base) and not base.startswith('.') and '__MACOSX' not in name and base.lower().endswith(PAPER_EXTENSIONS)
+
+
+def _save(src: BinaryIO, name: str, upload_dir: str) -> SavedPaper:
+    ext = os.path.splitext(name)[1].lower()
+    file_path = os.path.join(upload_dir, f"{uuid.uuid4()}{ext}")
+    # Counted while streaming: plain uploads have no declared size and a zip entry's can be wrong
+    limited = _LimitedReader(src, name, MAX_FILE_SIZE_MB * 1024 * 1024)
+    try:
+        content_hash = audit_cache.save_upload(limited, file_path)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return SavedPaper(os.path.basename(name), file_path, content_hash)
+
+
+def iter_zip(archive: BinaryIO, upload_dir: str) -> Iterator[Tuple[str, Optional[SavedPaper], Optional[bytes]]]:
+    """
+    Yield (entry name, saved paper, None) for papers and (entry name, None, manifest bytes)
+    for a manifest. Other entries are yielded as (entry name, None, None).
+    """
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise BatchError("Upload is not a valid zip archive")
+
+    with zf:
+        infos = [info for info in zf.infolist() if not info.is_dir()]
+        if sum(1 for info in infos if _is_paper(info.filename)) > BATCH_MAX_FILES:
+            raise BatchError(f"At most {BATCH_MAX_FILES} papers per batch")
+        for info in infos:
+            base = os.path.basename(info.filename).lower()
+            if base in MANIFEST_NAMES:
+                if info.file_size > MAX_MANIFEST_BYTES:
+                    raise BatchError(f"{info.filename} is too large for a manifest")
+                yield info.filename, None, zf.read(info)
+            elif not _is_paper(info.filename):
+                yield info.filename, None, None
+            elif info.file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
+                raise BatchError(f"{info.filename} is larger than {MAX_FILE_SIZE_MB} MB")
+            else:
+                with zf.open(info) as src:
+                    yield info.filename, _save(src, info.filename, upload_dir), None
+
+
+def collect(uploads: List[Tuple[str, BinaryIO]], upload_dir: str,
+            manifest_upload: Optional[Tuple[str, bytes]] = None) -> Tuple[List[SavedPaper], List[str]]:
+    """
+    Save every paper in the uploads (plain files or zip archives) and attach manifest metadata.
+    Returns the saved papers and the names of skipped entries.
+    """
+    papers: List[SavedPaper] = []
+    skipped: List[str] = []
+    manifest_data = manifest_upload
+    try:
+        _collect_into(uploads, upload_dir, papers, skipped, manifest_data)
+    except Exception:
+        # Nothing from a rejected batch stays on disk
+        for paper in papers:
+            if os.path.exists(paper.file_path):
+                os.remove(paper.file_path)
+        raise
+    return papers, skipped
+
+
+def _collect_into(uploads: List[Tuple[str, BinaryIO]], upload_dir: str, papers: List[SavedPaper],
+                  skipped: List[str], manifest_data: Optional[Tuple[str, bytes]]):
+    for filename, fileobj in uploads:
+        lower = filename.lower()
+        if lower.endswith('.zip'):
+            for name, paper, manifest in iter_zip(fileobj, upload_dir):
+                if paper is not None:
+                    papers.append(paper)
+                elif manifest is not None and manifest_data is None:
+                    manifest_data = (name, manifest)
+                else:
+                    skipped.append(name)
+        elif os.path.basename(lower) in MANIFEST_NAMES and manifest_data is None:
+            manifest_data = (filename, read_manifest(fileobj, filename))
+        elif _is_paper(filename):
+            papers.append(_save(fileobj, filename, upload_dir))
+        else:
+            skipped.append(filename)
+        if len(papers) > BATCH_MAX_FILES:
+            raise BatchError(f"At most {BATCH_MAX_FILES} papers per batch")
+
+    if manifest_data is not None:
+        manifest = parse_manifest(manifest_data[1], manifest_data[0])
+        for paper in papers:
+            paper.meta = manifest.get(paper.name, {})
@@ -0,0 +1,195 @@
+"""
+Per-stage wall time of the audit engine on a synthetic paper corpus.
+
+Generates PDF and DOCX papers for every combination of --pages, --references
+and --ref-styles, then times extract_text, extract_references,
+analyze_citations, analyze_methodology, estimate_ai_content and the full
+analyze_paper on each. Citations are verified against a local mock Crossref
+server (see mock_crossref.py) with --latency-ms per request, and the citation
+cache is emptied before every run unless --warm-cache is given. The sidecar
+indexes (citation cache, Crossref index, similarity, duplicates) live in a temporary
+directory, so a run never touches the real ones.
+
+Results are written as JSON: "meta" records the commit, engine version and
+arguments, "results" holds one row per paper and stage with every run in
+milliseconds. --compare prints the change against an earlier results file.
+
+Usage (from backend/):
+    python benchmarks/bench_audit.py [--pages 5,20] [--references 20,80] [--repeat 3]
+        [--output bench_audit.json] [--compare previous.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from mock_crossref import MockCrossref  # noqa: E402
+from synthetic_corpus import REFERENCE_STYLES, generate_paper  # noqa: E402
+
+FORMATS = ('pdf', 'docx')
+STAGES = ('extract_text', 'extract_references', 'analyze_citations', 'analyze_methodology',
+          'estimate_ai_content', 'analyze_paper')
+
+
+def int_list(value: str):
+    return [int(v) for v in value.split(',') if v]
+
+
+def choice_list(choices):
+    def parse(value: str):
+        items = [v for v in value.split(',') if v]
+        unknown = set(items) - set(choices)
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown value(s) {sorted(unknown)}; expected {choices}")
+        return items
+    return parse
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def clear_citation_cache():
+    import citation_cache
+    conn = citation_cache.get_cache()._conn()
+    conn.execute("DELETE FROM citation_cache")
+    conn.commit()
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    value = fn(*args)
+    return round((time.perf_counter() - started) * 1000, 2), value
+
+
+def bench_paper(audit_engine, path: str, repeat: int, warm_cache: bool):
+    """Milliseconds per stage for each run, plus the pipeline timings of the last full audit"""
+    runs = {stage: [] for stage in STAGES}
+    pipeline = {}
+    for _ in range(repeat):
+        ms, text = timed(audit_engine.extract_text, path)
+        runs['extract_text'].append(ms)
+        ms, references = timed(audit_engine.extract_references, text)
+        runs['extract_references'].append(ms)
+        if not warm_cache:
+            clear_citation_cache()
+        runs['analyze_citations'].append(timed(audit_engine.analyze_citations, references)[0])
+        runs['analyze_methodology'].append(timed(audit_engine.analyze_methodology, text)[0])
+        runs['estimate_ai_content'].append(timed(audit_engine.estimate_ai_content, text)[0])
+        if not warm_cache:
+            clear_citation_cache()
+        ms, result = timed(audit_engine.analyze_paper, path)
+        runs['analyze_paper'].append(ms)
+        pipeline = json.loads(result['json_content']).get('pipeline', {})
+    return runs, {'references_found': len(references), 'characters': len(text), 'pipeline': pipeline}
+
+
+def summarize(runs):
+    return {
+        'runs_ms': runs,
+        'median_ms': round(statistics.median(runs), 2),
+        'min_ms': min(runs)
+    }
+
+
+def compare(previous_path: str, results):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    key = lambda row: (row['format'], row['pages'], row['references'], row['ref_style'], row['stage'])
+    before = {key(row): row for row in previous.get('results', [])}
+    print(f"\nAgainst {previous_path} (commit {previous.get('meta', {}).get('commit', '?')}):")
+    print(f"{'paper':<26}{'stage':<22}{'before ms':>11}{'after ms':>11}{'change':>9}")
+    for row in results:
+        old = before.get(key(row))
+        if old is None or not old['median_ms']:
+            continue
+        change = (row['median_ms'] - old['median_ms']) / old['median_ms'] * 100
+        paper = f"{row['format']} {row['pages']}p {row['references']}r {row['ref_style']}"
+        print(f"{paper:<26}{row['stage']:<22}{old['median_ms']:>11.1f}{row['median_ms']:>11.1f}{change:>+8.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int_list, default=[5, 20], help="Comma-separated page counts")
+    parser.add_argument('--references', type=int_list, default=[20, 80], help="Comma-separated reference counts")
+    parser.add_argument('--formats', type=choice_list(FORMATS), default=list(FORMATS))
+    parser.add_argument('--ref-styles', type=choice_list(REFERENCE_STYLES), default=['numbered', 'doi'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Mock Crossref delay per request")
+    parser.add_argument('--warm-cache', action='store_true', help="Keep citation cache entries between runs")
+    parser.add_argument('--output', default='bench_audit.json')
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_audit_') as workdir, \
+            MockCrossref(latency_ms=args.latency_ms) as crossref:
+        # Read by the modules at import time, so set before importing the engine
+        os.environ.update({
+            'CROSSREF_API_URL': crossref.url,
+            'CITATION_RESOLVER': 'remote',
+            'CITATION_CACHE_PATH': os.path.join(workdir, 'citation_cache.db'),
+            'CROSSREF_INDEX_PATH': os.path.join(workdir, 'crossref_index.db'),
+            'SIMILARITY_INDEX_PATH': os.path.join(workdir, 'similarity_index.db'),
+            'DUPLICATE_INDEX_PATH': os.path.join(workdir, 'duplicate_index.db'),
+        })
+        import audit_engine
+
+        results = []
+        print(f"{'paper':<26}{'stage':<22}{'median ms':>11}{'min ms':>10}")
+        for fmt in args.formats:
+            for pages in args.pages:
+                for references in args.references:
+                    for style in args.ref_styles:
+                        path, size = generate_paper(workdir, fmt, pages, references, style)
+                        runs, info = bench_paper(audit_engine, path, args.repeat, args.warm_cache)
+                        paper = f"{fmt} {pages}p {references}r {style}"
+                        for stage in STAGES:
+                            row = dict({
+                                'format': fmt, 'pages': pages, 'references': references, 'ref_style': style,
+                                'file_bytes': size, 'stage': stage,
+                            }, **summarize(runs[stage]))
+                            if stage == 'analyze_paper':
+                                row.update(info)
+                            else:
+                                row['references_found'] = info['references_found']
+                            results.append(row)
+                            print(f"{paper:<26}{stage:<22}{row['median_ms']:>11.1f}{row['min_ms']:>10.1f}")
+                        os.remove(path)
+        requests = crossref.requests
+
+    output = {
+        'meta': {
+            'commit': git_commit(),
+            'engine_version': audit_engine.AUDIT_ENGINE_VERSION,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'crossref_requests': requests,
+            'args': vars(args),
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nWrote {len(results)} rows to {args.output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
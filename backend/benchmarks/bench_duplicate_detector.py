@@ -0,0 +1,52 @@
+"""
+Fingerprinting time of the duplicate detector on one long paper.
+
+Times fingerprint_text() (tokenizing, shingle hashing, MinHash and the
+fingerprint sample) and minhash() alone on a synthetic paper, and fails when
+MinHash exceeds its budget. MinHash is one vectorized pass per block of
+shingles; at 100k words the earlier per-permutation Python loop took ~4 s.
+
+Usage (from backend/):
+    python benchmarks/bench_duplicate_detector.py [--words 100000] [--repeat 3] [--max-ms 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import duplicate_detector  # noqa: E402
+from bench_text_features import synthetic_text  # noqa: E402
+
+
+def best_ms(fn, arg, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--words', type=int, default=100_000, help="Length of the synthetic paper")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-ms', type=float, default=1000.0, help="Fail when minhash() takes longer")
+    args = parser.parse_args()
+
+    words = synthetic_text(args.words * 6 / 1_000_000).split()[:args.words]
+    text = ' '.join(words)
+    hashes = duplicate_detector.shingle_hashes(duplicate_detector.tokenize(text)[0])
+
+    minhash_ms = best_ms(duplicate_detector.minhash, hashes, args.repeat)
+    fingerprint_ms = best_ms(duplicate_detector.fingerprint_text, text, args.repeat)
+    print(f"words:             {len(words)} ({len(set(hashes))} distinct shingles)")
+    print(f"minhash:           {minhash_ms:.1f} ms")
+    print(f"fingerprint_text:  {fingerprint_ms:.1f} ms")
+    assert minhash_ms <= args.max_ms, f"minhash took {minhash_ms:.0f} ms, budget {args.max_ms:.0f} ms"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Runtime of reference extraction on pathological inputs of growing size.
+
+"regex" is the previous extract_references implementation (whole-document
+lazy DOTALL patterns); "parser" is reference_parser.parse_references. The
+regex version is skipped at sizes where its previous size already exceeded
+--budget seconds, since it grows quadratically on these inputs.
+
+Usage (from backend/):
+    python benchmarks/bench_reference_parser.py [--max-kb 1024] [--budget 5]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reference_parser  # noqa: E402
+
+
+def regex_extract_references(text):
+    patterns = [
+        r'\[\d+\]\s*([A-Z][^.]+\.\s*\d{4})',
+        r'(?:References|REFERENCES|Bibliography)(.*?)(?=\n\n|\Z)',
+    ]
+    references = []
+    for pattern in patterns:
+        references.extend(re.findall(pattern, text, re.DOTALL))
+    if not references:
+        references = re.findall(r'([A-Z][a-z]+(?:\s+et\s+al\.?)?\s*\(\d{4}\))', text)
+    return references[:50]
+
+
+def bracket_markers(size: int) -> str:
+    """'[1] A' markers with no period: every marker scans to the end of the text"""
+    unit = "[1] Abc def ghi "
+    return unit * (size // len(unit))
+
+
+def heading_storm(size: int) -> str:
+    """'References' repeated with single newlines only"""
+    unit = "References\nSmith, J. (2020). A title without end\n"
+    return unit * (size // len(unit))
+
+
+def long_reference_list(size: int) -> str:
+    """A realistic but very long numbered reference section"""
+    lines = ["Introduction", "Body text.", "", "References"]
+    i = 1
+    while sum(len(line) + 1 for line in lines) < size:
+        lines.append(f"[{i % 999 + 1}] A. Author and B. Writer, \"Title number {i} of a paper,\" "
+                     f"Journal {i % 7}, vol. {i % 30}, {1990 + i % 30}. doi: 10.1000/j.{i}")
+        i += 1
+    return "\n".join(lines)
+
+
+INPUTS = {
+    'bracket_markers': bracket_markers,
+    'heading_storm': heading_storm,
+    'long_reference_list': long_reference_list,
+}
+
+
+def timed(fn, text):
+    started = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-kb', type=int, default=1024)
+    parser.add_argument('--budget', type=float, default=5.0, help="Stop timing the regex version past this many seconds")
+    args = parser.parse_args()
+
+    print(f"{'input':<22}{'size KB':>9}{'regex s':>10}{'parser s':>10}")
+    for name, make in INPUTS.items():
+        size_kb = 16
+        regex_over_budget = False
+        while size_kb <= args.max_kb:
+            text = make(size_kb * 1024)
+            regex_s = None
+            if not regex_over_budget:
+                regex_s = timed(regex_extract_references, text)
+                regex_over_budget = regex_s > args.budget
+            parser_s = timed(reference_parser.parse_references, text)
+            regex_col = f"{regex_s:.3f}" if regex_s is not None else "skipped"
+            print(f"{name:<22}{size_kb:>9}{regex_col:>10}{parser_s:>10.3f}")
+            size_kb *= 2
+
+
+if __name__ == '__main__':
+    main()
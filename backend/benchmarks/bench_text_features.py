@@ -0,0 +1,81 @@
+"""
+Per-paper CPU time of the text analyzers with and without a shared TextFeatures.
+
+"per-analyzer" hands each analyzer the raw string, so every analyzer builds
+its own lowercase copy, token list and keyword counts. "shared" builds one
+TextFeatures up front, as analyze_paper does.
+
+Usage (from backend/):
+    python benchmarks/bench_text_features.py [--mb 3] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audit_engine  # noqa: E402
+
+VOCAB = (
+    "the of and to in a is that for it as was with be by on not this are or from at which "
+    "but have an they were their has would when if so no will more can who out about into "
+    "than then some could other only its also time two these may first any over such most "
+    "after many before through years where well should because each those how between both "
+    "results model data method analysis study approach we our significant observed measured"
+).split()
+
+
+def synthetic_text(megabytes: float, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    words = []
+    size = 0
+    while size < megabytes * 1_000_000:
+        word = rng.choice(VOCAB)
+        if rng.random() < 0.06:
+            word += '.'
+        words.append(word)
+        size += len(word) + 1
+    words.append("hyperparameter experiment p < 0.01 sample size n=120 github.com")
+    return " ".join(words)
+
+
+def per_analyzer(text: str):
+    audit_engine.analyze_methodology(text)
+    audit_engine.analyze_reproducibility(text, None, None)
+    audit_engine.estimate_ai_content(text)
+
+
+def shared(text: str):
+    features = audit_engine.build_text_features(text)
+    audit_engine.analyze_methodology(features)
+    audit_engine.analyze_reproducibility(features, None, None)
+    audit_engine.estimate_ai_content(features)
+
+
+def cpu_time(fn, text: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        fn(text)
+        best = min(best, time.process_time() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mb', type=float, default=3.0, help="Size of the synthetic paper in MB")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    text = synthetic_text(args.mb)
+    before = cpu_time(per_analyzer, text, args.repeat)
+    after = cpu_time(shared, text, args.repeat)
+    print(f"text size:     {len(text) / 1_000_000:.1f} MB")
+    print(f"per-analyzer:  {before * 1000:.1f} ms CPU")
+    print(f"shared:        {after * 1000:.1f} ms CPU ({(1 - after / before) * 100:.0f}% less)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Local stand-in for the Crossref /works endpoint.
+
+Answers the two request shapes citation_verifier sends: DOI filter lookups
+("filter=doi:a,doi:b") and bibliographic searches ("query.bibliographic=...").
+Every request waits latency_ms first, so citation verification costs roughly
+what it would against the real API without depending on the network.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from synthetic_corpus import DOI_PREFIX
+
+
+def _item(doi: str, title: str, score: float) -> dict:
+    return {
+        'DOI': doi,
+        'title': [title],
+        'score': score,
+        'published': {'date-parts': [[2020]]}
+    }
+
+
+class MockCrossref:
+    """
+    Threaded HTTP server on 127.0.0.1; use as a context manager.
+    is_known decides which DOIs resolve (by default those of the synthetic corpus).
+    """
+
+    def __init__(self, latency_ms: float = 50.0, is_known: Optional[Callable[[str], bool]] = None):
+        self.latency = latency_ms / 1000
+        self.is_known = is_known or (lambda doi: doi.startswith(DOI_PREFIX))
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _respond(self, query: dict) -> dict:
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        if 'filter' in query:
+            dois = [part[4:] for part in query['filter'][0].split(',') if part.startswith('doi:')]
+            items = [_item(doi, f"Work {doi}", 1.0) for doi in dois if self.is_known(doi)]
+        else:
+            text = query.get('query.bibliographic', [''])[0]
+            items = [_item('10.5555/search.' + str(abs(hash(text)) % 10 ** 6), text[:80], 60.0)]
+        return {'status': 'ok', 'message': {'items': items, 'total-results': len(items)}}
+
+    def __enter__(self) -> 'MockCrossref':
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path.rstrip('/') != '/works':
+                    self.send_error(404)
+                    return
+                body = json.dumps(mock._respond(parse_qs(parsed.query))).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # The default backlog of 5 drops connections from concurrent lookups, which then retry after 1s
+            request_queue_size = 128
+            daemon_threads = True
+
+        self._server = Server(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
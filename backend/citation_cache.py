@@ -0,0 +1,178 @@
+"""
+Persistent citation-resolution cache in a sidecar SQLite file.
+
+Resolved citations are keyed on their normalized text and, when known, their
+DOI. Positive and negative results expire on separate TTLs, the table is
+capped with least-recently-used eviction, and hit/miss counters are kept per
+process.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import metrics
+
+CITATION_CACHE_PATH = os.getenv('CITATION_CACHE_PATH', './citation_cache.db')
+CITATION_CACHE_POSITIVE_TTL = int(os.getenv('CITATION_CACHE_POSITIVE_TTL_DAYS', '90')) * 86400
+CITATION_CACHE_NEGATIVE_TTL = int(os.getenv('CITATION_CACHE_NEGATIVE_TTL_HOURS', '24')) * 3600
+CITATION_CACHE_MAX_ENTRIES = int(os.getenv('CITATION_CACHE_MAX_ENTRIES', '200000'))
+
+_NUMBERING = re.compile(r'^\s*(?:\[\d+\]|\d+[.)])\s*')
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_citation(text: str) -> str:
+    """Lowercase, drop list numbering and punctuation, collapse whitespace"""
+    text = _NUMBERING.sub('', text)
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def text_key(text: str) -> str:
+    return 'text:' + hashlib.sha1(normalize_citation(text).encode('utf-8')).hexdigest()
+
+
+def doi_key(doi: str) -> str:
+    return 'doi:' + doi.strip().lower()
+
+
+class CitationCache:
+    """Key/value store of Crossref resolution results with TTL and LRU eviction"""
+
+    def __init__(self, path: str = CITATION_CACHE_PATH, max_entries: int = CITATION_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._writes_since_evict = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS citation_cache ("
+            " key TEXT PRIMARY KEY,"
+            " result TEXT NOT NULL,"
+            " found INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_citation_cache_last_used ON citation_cache (last_used)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: Iterable[str], track: bool = True) -> Dict[str, Dict]:
+        """Look up several keys at once. Expired rows count as misses."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        conn = self._conn()
+        found = {}
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = conn.execute(
+                f"SELECT key, result FROM citation_cache WHERE key IN ({placeholders}) AND expires_at > ?",
+                (*batch, now)
+            ).fetchall()
+            found.update((key, json.loads(result)) for key, result in rows)
+        if found:
+            conn.executemany("UPDATE citation_cache SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            conn.commit()
+        if track:
+            self.record(len(found), len(keys) - len(found))
+        return found
+
+    def record(self, hits: int, misses: int) -> None:
+        """Update hit/miss counters for callers that look up several keys per citation"""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        metrics.CITATION_CACHE_LOOKUPS.inc('hit', amount=hits)
+        metrics.CITATION_CACHE_LOOKUPS.inc('miss', amount=misses)
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, entries: Dict[str, Dict]) -> None:
+        """Store results; positive and negative results get their own TTL"""
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for key, result in entries.items():
+            found = bool(result.get('found'))
+            ttl = CITATION_CACHE_POSITIVE_TTL if found else CITATION_CACHE_NEGATIVE_TTL
+            rows.append((key, json.dumps(result), int(found), now + ttl, now))
+        conn = self._conn()
+        conn.executemany("INSERT OR REPLACE INTO citation_cache VALUES (?, ?, ?, ?, ?)", rows)
+        conn.commit()
+
+        with self._lock:
+            self._writes_since_evict += len(rows)
+            should_evict = self._writes_since_evict >= 1000
+            if should_evict:
+                self._writes_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def put(self, key: str, result: Dict) -> None:
+        self.put_many({key: result})
+
+    def evict(self) -> int:
+        """Drop expired rows, then least recently used rows above max_entries"""
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM citation_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        (count,) = conn.execute("SELECT COUNT(*) FROM citation_cache").fetchone()
+        if count > self.max_entries:
+            removed += conn.execute(
+                "DELETE FROM citation_cache WHERE key IN "
+                "(SELECT key FROM citation_cache ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,)
+            ).rowcount
+        conn.commit()
+        return removed
+
+    def stats(self) -> Dict:
+        (entries,) = self._conn().execute("SELECT COUNT(*) FROM citation_cache").fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_default_cache: Optional[CitationCache] = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> CitationCache:
+    """Process-wide cache instance, opened on first use"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = CitationCache()
+    return _default_cache
+
+
+def cache_keys(citation_text: str, doi: Optional[str] = None) -> List[str]:
+    """Keys a citation can be found under, most specific first"""
+    keys = [doi_key(doi)] if doi else []
+    keys.append(text_key(citation_text))
+    return keys
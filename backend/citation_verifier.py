@@ -0,0 +1,301 @@
+"""
+Concurrent citation verification against the Crossref API.
+
+Citations are first looked up in the persistent citation cache, then, in the
+local_first and local_only resolver modes, in the offline Crossref index. The
+remaining misses share a single pooled keep-alive HTTP client, and an asyncio
+semaphore bounds how many requests are in flight at once.
+
+Citations that carry a DOI are resolved exactly, many per request, with a
+Crossref doi: filter. Only citations without a DOI, or whose DOI Crossref
+does not know, fall back to a fuzzy bibliographic search.
+
+Every work Crossref returns is harvested into the local Crossref index, so
+later audits and recommendation searches can be answered from it.
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional
+
+import httpx
+
+import citation_cache
+import crossref_index
+import metrics
+
+CROSSREF_API_URL = os.getenv('CROSSREF_API_URL', 'https://api.crossref.org').rstrip('/')
+CROSSREF_EMAIL = os.getenv('CROSSREF_EMAIL', 'research@sentinel.com')
+CITATION_CONCURRENCY = int(os.getenv('CITATION_CONCURRENCY', '8'))
+CITATION_TIMEOUT = float(os.getenv('CITATION_TIMEOUT', '5'))
+# DOIs resolved per filter request
+CROSSREF_DOI_BATCH = int(os.getenv('CROSSREF_DOI_BATCH', '20'))
+
+DOI_PATTERN = re.compile(r'\b10\.\d{4,9}/[^\s"<>]+', re.IGNORECASE)
+
+RESOLVER_MODES = ('remote', 'local_first', 'local_only')
+
+HEADERS = {
+    'User-Agent': f'ResearchSentinel/1.0 (mailto:{CROSSREF_EMAIL})'
+}
+
+
+def extract_doi(text: str) -> Optional[str]:
+    """Return the first DOI found in a citation string"""
+    match = DOI_PATTERN.search(text)
+    if not match:
+        return None
+    return match.group(0).rstrip('.,;)]}').lower()
+
+
+def parse_crossref_item(item: Dict) -> Dict:
+    """Convert a Crossref work item into the citation result dict"""
+    return {
+        'found': True,
+        'title': (item.get('title') or [''])[0],
+        'year': item.get('published', {}).get('date-parts', [[None]])[0][0],
+        'doi': item.get('DOI', ''),
+        'score': item.get('score', 0)
+    }
+
+
+async def _request_works(client: httpx.AsyncClient, params: Dict, kind: str) -> httpx.Response:
+    started = time.perf_counter()
+    try:
+        response = await client.get(f"{CROSSREF_API_URL}/works", params=params)
+    except Exception:
+        metrics.CROSSREF_REQUESTS.inc(kind, 'error')
+        raise
+    metrics.CROSSREF_REQUESTS.inc(kind, str(response.status_code))
+    metrics.CROSSREF_REQUEST_DURATION.observe(time.perf_counter() - started, kind)
+    return response
+
+
+async def get_works(client: httpx.AsyncClient, params: Dict, kind: str) -> httpx.Response:
+    """GET /works, retrying once on 429. kind labels the request in the Crossref metrics."""
+    response = await _request_works(client, params, kind)
+    if response.status_code == 429:
+        # Crossref asks us to slow down; honour Retry-After once
+        await asyncio.sleep(min(float(response.headers.get('Retry-After', 1)), 5))
+        response = await _request_works(client, params, kind)
+    return response
+
+
+_shared_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = weakref.WeakKeyDictionary()
+
+
+def shared_client() -> httpx.AsyncClient:
+    """
+    Pooled keep-alive client for Crossref requests made from the API's event loop.
+    Clients are bound to the loop that created them, so there is one per running loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(max_connections=CITATION_CONCURRENCY, max_keepalive_connections=CITATION_CONCURRENCY)
+        client = _shared_clients[loop] = httpx.AsyncClient(headers=HEADERS, timeout=CITATION_TIMEOUT, limits=limits)
+    return client
+
+
+async def close_shared_client():
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def _query_crossref(client: httpx.AsyncClient, citation_text: str, harvested: List[Dict]) -> Dict:
+    params = {
+        'query.bibliographic': citation_text.strip()[:300],
+        'rows': 1
+    }
+    response = await get_works(client, params, 'search')
+    if response.status_code != 200:
+        # A rate limit or server error says nothing about the citation: not cached, reported as unverified
+        return {'found': False, 'error': f'HTTP {response.status_code}'}
+    items = response.json().get('message', {}).get('items')
+    if items:
+        harvested.extend(items)
+        return dict(parse_crossref_item(items[0]), match='search')
+    return {'found': False}
+
+
+async def _query_dois(client: httpx.AsyncClient, dois: List[str], harvested: List[Dict]) -> Dict[str, Dict]:
+    """
+    Exact lookup of several DOIs in one request; DOIs Crossref does not know are absent.
+    When Crossref fails (rate limit, server error) every DOI maps to an error result instead.
+    """
+    params = {
+        'filter': ','.join(f'doi:{doi}' for doi in dois),
+        'rows': len(dois)
+    }
+    response = await get_works(client, params, 'doi')
+    if response.status_code == 400:
+        # A malformed DOI in the batch; its citations fall back to bibliographic search
+        return {}
+    if response.status_code != 200:
+        return {doi: {'found': False, 'error': f'HTTP {response.status_code}'} for doi in dois}
+    found = {}
+    items = response.json().get('message', {}).get('items') or []
+    harvested.extend(items)
+    for item in items:
+        # An exact DOI match is certain, whatever the relevance score
+        found[item.get('DOI', '').lower()] = dict(parse_crossref_item(item), score=100, match='doi')
+    return found
+
+
+async def _verify_doi_batch(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, dois: List[str],
+                            harvested: List[Dict]) -> Dict[str, Dict]:
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            found = await _query_dois(client, dois, harvested)
+        except Exception as e:
+            print(f"Crossref API error: {e}")
+            found = {}
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        return {doi: dict(result, latency_ms=latency_ms) for doi, result in found.items()}
+
+
+async def _verify_one(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, citation_text: str,
+                      harvested: List[Dict]) -> Dict:
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            result = await _query_crossref(client, citation_text, harvested)
+        except Exception as e:
+            print(f"Crossref API error: {e}")
+            result = {'found': False, 'error': str(e)}
+        result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+
+async def _resolve_remote(citations: List[str], dois: List[Optional[str]], pending: List[int],
+                          concurrency: int, harvested: List[Dict]) -> Dict[int, Dict]:
+    """
+    DOI batches and bibliographic searches over the loop's shared client; DOI misses are searched afterwards.
+    Raw Crossref items from every response are appended to harvested.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    client = shared_client()
+    with_doi = [i for i in pending if dois[i]]
+    unique_dois = list(dict.fromkeys(dois[i] for i in with_doi))
+    batches = [unique_dois[n:n + CROSSREF_DOI_BATCH] for n in range(0, len(unique_dois), CROSSREF_DOI_BATCH)]
+
+    async def search(indices: List[int]) -> List[Dict]:
+        return await asyncio.gather(*(_verify_one(client, semaphore, citations[i], harvested) for i in indices))
+
+    searched = [i for i in pending if not dois[i]]
+    by_doi_parts, search_results = await asyncio.gather(
+        asyncio.gather(*(_verify_doi_batch(client, semaphore, batch, harvested) for batch in batches)),
+        search(searched)
+    )
+    by_doi = {doi: result for part in by_doi_parts for doi, result in part.items()}
+
+    results = dict(zip(searched, search_results))
+    fallback = []
+    for i in with_doi:
+        if dois[i] in by_doi:
+            results[i] = dict(by_doi[dois[i]])
+        else:
+            fallback.append(i)
+    for i, result in zip(fallback, await search(fallback)):
+        result['doi_resolved'] = False
+        results[i] = result
+    return results
+
+
+async def verify_citations_async(citations: List[str], concurrency: Optional[int] = None, resolver: str = 'remote',
+                                 dois: Optional[List[Optional[str]]] = None) -> List[Dict]:
+    """
+    Check every citation against the cache, the local index and then Crossref, preserving input order.
+    dois optionally gives each citation's already-parsed DOI; otherwise it is extracted from the text.
+    """
+    if not citations:
+        return []
+    if resolver not in RESOLVER_MODES:
+        raise ValueError(f"Unknown citation resolver {resolver!r}; expected one of {RESOLVER_MODES}")
+
+    if dois is None:
+        dois = [extract_doi(c) for c in citations]
+    else:
+        dois = [doi.lower() if doi else extract_doi(c) for c, doi in zip(citations, dois)]
+    cache = citation_cache.get_cache()
+    keys = [citation_cache.cache_keys(c, doi) for c, doi in zip(citations, dois)]
+    cached = cache.get_many((k for ks in keys for k in ks), track=False)
+
+    results: List[Optional[Dict]] = [None] * len(citations)
+    pending = []
+    for i, ks in enumerate(keys):
+        hit = next((cached[k] for k in ks if k in cached), None)
+        if hit is not None:
+            results[i] = dict(hit, cached=True, latency_ms=0.0)
+        else:
+            pending.append(i)
+    cache.record(len(citations) - len(pending), len(pending))
+
+    index = crossref_index.get_index() if resolver != 'remote' else None
+    if index is not None and pending:
+        still_pending = []
+        for i in pending:
+            started = time.perf_counter()
+            local = index.resolve(citations[i], dois[i])
+            if local is not None:
+                local['latency_ms'] = round((time.perf_counter() - started) * 1000, 3)
+                results[i] = local
+            else:
+                still_pending.append(i)
+        pending = still_pending
+
+    if resolver == 'local_only':
+        for i in pending:
+            results[i] = {'found': False, 'source': 'local_index', 'latency_ms': 0.0}
+        pending = []
+
+    if pending:
+        harvested = []
+        fetched = await _resolve_remote(citations, dois, pending, concurrency or CITATION_CONCURRENCY, harvested)
+
+        to_store = {}
+        for i in pending:
+            result = fetched[i]
+            results[i] = result
+            if 'error' in result:
+                # Transport failures are not evidence that the citation is missing
+                continue
+            stored = {k: v for k, v in result.items() if k != 'latency_ms'}
+            to_store[citation_cache.text_key(citations[i])] = stored
+            doi = result.get('doi') or dois[i]
+            if doi and result['found']:
+                to_store[citation_cache.doi_key(doi)] = stored
+        cache.put_many(to_store)
+        crossref_index.harvest(harvested)
+
+    return results
+
+
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop on a daemon thread for synchronous callers. It outlives each call, so its
+    shared_client() keeps connections to Crossref open from one audit to the next.
+    """
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='citation-verifier', daemon=True).start()
+            _sync_loop = loop
+    return _sync_loop
+
+
+def verify_citations(citations: List[str], concurrency: Optional[int] = None, resolver: str = 'remote',
+                     dois: Optional[List[Optional[str]]] = None) -> List[Dict]:
+    """Synchronous entry point for verify_citations_async(); safe to call from inside an event loop"""
+    coroutine = verify_citations_async(citations, concurrency, resolver, dois)
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop()).result()
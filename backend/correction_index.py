@@ -0,0 +1,138 @@
+"""
+Precomputed writing-issue index for the suggest-corrections endpoint.
+
+One compiled scanner finds every check in a single pass over the text
+(passive voice, weak verbs, redundant phrases, informal language). Matches
+are kept only as (start, length) pairs per check, delta-encoded and
+zlib-compressed, so a long thesis with tens of thousands of hits is stored in
+a few kilobytes next to its text. Context snippets and suggestions are built
+only for the page of matches a request asks for.
+"""
+import heapq
+import itertools
+import re
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bump when the checks change so stored indexes are rebuilt
+CORRECTIONS_VERSION = "1"
+
+# Also the order of matches that start at the same offset
+CORRECTION_TYPES = ('passive_voice', 'weak_verbs', 'redundancy', 'informal_language')
+
+_SCANNER = re.compile(
+    r"\b(?:"
+    r"(?P<be>is|are|was|were|been|being)(?P<passive>\s+\w+ed)?"
+    r"|(?P<weak>seems|appears)"
+    r"|(?P<redundancy>very unique|completely finished|absolutely essential|past history)"
+    r"|(?P<informal>a lot of|kind of|sort of|basically|actually)"
+    r")\b",
+    re.IGNORECASE
+)
+# "been"/"being" only count as part of a passive construction
+_WEAK_BE = frozenset(('is', 'are', 'was', 'were'))
+_MAX_LENGTH = 0xFFFF
+
+Span = Tuple[int, int, str]  # start, end, correction type
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _stream(starts: array, lengths: array, rank: int, first: int):
+    for i in range(first, len(starts)):
+        yield starts[i], rank, lengths[i]
+
+
+class CorrectionIndex:
+    """Sorted start offsets and match lengths for each correction type"""
+
+    def __init__(self, spans: Dict[str, Tuple[array, array]]):
+        self.spans = spans
+
+    @classmethod
+    def build(cls, text: str) -> 'CorrectionIndex':
+        starts = {t: array('I') for t in CORRECTION_TYPES}
+        lengths = {t: array('H') for t in CORRECTION_TYPES}
+
+        def add(kind: str, start: int, end: int):
+            starts[kind].append(start)
+            lengths[kind].append(min(end - start, _MAX_LENGTH))
+
+        for match in _SCANNER.finditer(text):
+            be = match.group('be')
+            if be is not None:
+                if match.group('passive') is not None:
+                    add('passive_voice', match.start(), match.end())
+                if be.lower() in _WEAK_BE:
+                    add('weak_verbs', match.start(), match.end('be'))
+            elif match.group('weak') is not None:
+                add('weak_verbs', match.start(), match.end())
+            elif match.group('redundancy') is not None:
+                add('redundancy', match.start(), match.end())
+            else:
+                add('informal_language', match.start(), match.end())
+        return cls({t: (starts[t], lengths[t]) for t in CORRECTION_TYPES})
+
+    def counts(self) -> Dict[str, int]:
+        return {t: len(self.spans[t][0]) for t in CORRECTION_TYPES}
+
+    def to_bytes(self) -> bytes:
+        """Per type: delta-encoded uint32 starts then uint16 lengths, little-endian, zlib-compressed"""
+        parts = []
+        for kind in CORRECTION_TYPES:
+            starts, lengths = self.spans[kind]
+            deltas = array('I', (b - a for a, b in zip(itertools.chain((0,), starts), starts)))
+            parts.append(_little_endian(deltas).tobytes())
+            parts.append(_little_endian(lengths).tobytes())
+        return zlib.compress(b''.join(parts), 6)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, counts: Dict[str, int]) -> 'CorrectionIndex':
+        raw = zlib.decompress(blob)
+        spans = {}
+        offset = 0
+        for kind in CORRECTION_TYPES:
+            n = counts.get(kind, 0)
+            deltas = array('I')
+            deltas.frombytes(raw[offset:offset + 4 * n])
+            offset += 4 * n
+            lengths = array('H')
+            lengths.frombytes(raw[offset:offset + 2 * n])
+            offset += 2 * n
+            spans[kind] = (array('I', itertools.accumulate(_little_endian(deltas))), _little_endian(lengths))
+        return cls(spans)
+
+    def page(self, types: Iterable[str], after: Optional[Tuple[int, int]] = None, limit: int = 50) -> List[Span]:
+        """
+        Up to limit matches of the given types in text order, starting after the
+        (start, type rank) position of the previous page's last match.
+        """
+        after_start, after_rank = after if after is not None else (-1, -1)
+        streams = []
+        for kind in types:
+            rank = CORRECTION_TYPES.index(kind)
+            starts, lengths = self.spans[kind]
+            # Same start offset: types ranked after the cursor's type still come after it
+            first = bisect_left(starts, after_start) if rank > after_rank else bisect_right(starts, after_start)
+            streams.append(_stream(starts, lengths, rank, first))
+        merged = heapq.merge(*streams)
+        return [(start, start + length, CORRECTION_TYPES[rank])
+                for start, rank, length in itertools.islice(merged, limit)]
+
+
+def build_index(text: str) -> Dict:
+    """Stored form of the text's correction index (see text_store.pack_document)"""
+    index = CorrectionIndex.build(text)
+    return {
+        'version': CORRECTIONS_VERSION,
+        'counts': index.counts(),
+        'data': index.to_bytes()
+    }
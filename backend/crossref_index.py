@@ -0,0 +1,345 @@
+"""
+Offline Crossref index built from metadata dumps.
+
+Works are stored in a local SQLite file with an exact DOI lookup table and an
+FTS5 full-text index over title, authors and venue ranked with BM25. Audits
+can resolve citations against it without network access.
+
+Besides dump imports, every work returned by a live Crossref request
+(citation checks and recommendation searches) is harvested into the index,
+so citation lookups and reference recommendations are increasingly served
+locally as the corpus grows. Rows record where they came from: harvested
+works include loose search hits, so a fuzzy title match against one only
+verifies a citation that also names its year or an author.
+
+Usage:
+    python crossref_index.py import crossref-dump.jsonl[.gz] [--index PATH]
+    python crossref_index.py stats [--index PATH]
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import math
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import metrics
+
+CROSSREF_INDEX_PATH = os.getenv('CROSSREF_INDEX_PATH', './crossref_index.db')
+
+# Fraction of a candidate's title tokens that must appear in the citation
+MATCH_THRESHOLD = float(os.getenv('CROSSREF_INDEX_MATCH_THRESHOLD', '0.6'))
+# Save works from live Crossref responses into the index (creating it if needed)
+CROSSREF_HARVEST = os.getenv('CROSSREF_HARVEST', '1') != '0'
+# Fraction of the query terms a recommended work's title and venue must contain
+RECOMMEND_MIN_COVERAGE = float(os.getenv('RECOMMEND_MIN_COVERAGE', '0.4'))
+# BM25 column weights for recommendations: title, authors, venue
+RECOMMEND_WEIGHTS = (3.0, 1.0, 0.5)
+
+# works.source: imported metadata dump, or harvested from a citation check or a recommendation search
+SOURCE_DUMP = 'dump'
+SOURCE_CITATION = 'citation'
+SOURCE_SEARCH = 'search'
+
+_TOKEN = re.compile(r'\w+')
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'by', 'for', 'from', 'in', 'into', 'is',
+    'of', 'on', 'or', 'the', 'to', 'with', 'et', 'al', 'pp', 'vol', 'no', 'doi'
+}
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def _stem(token: str) -> str:
+    # Close enough to the porter tokenizer to count "graphs" as covering "graph"
+    return token[:-1] if len(token) > 3 and token.endswith('s') else token
+
+
+def _surname(author: str) -> Optional[str]:
+    tokens = _tokens(author)
+    return tokens[-1] if tokens else None
+
+
+def work_from_item(item: Dict) -> Optional[Dict]:
+    """Flatten a Crossref work item into an index row"""
+    doi = (item.get('DOI') or '').strip().lower()
+    if not doi:
+        return None
+    authors = []
+    for author in item.get('author', []) or []:
+        name = " ".join(p for p in (author.get('given'), author.get('family')) if p)
+        if name:
+            authors.append(name)
+    year = None
+    for field in ('published', 'published-print', 'published-online', 'issued'):
+        parts = (item.get(field) or {}).get('date-parts') or [[None]]
+        if parts and parts[0] and parts[0][0]:
+            year = parts[0][0]
+            break
+    return {
+        'doi': doi,
+        'title': ((item.get('title') or ['']) or [''])[0] or '',
+        'authors': "; ".join(authors),
+        'venue': ((item.get('container-title') or ['']) or [''])[0] or '',
+        'year': year
+    }
+
+
+def iter_dump(path: str) -> Iterator[Dict]:
+    """Yield work items from a JSONL dump (optionally gzipped).
+
+    Each line may be a single work item, a Crossref API response
+    ({"message": {...}}) or a page of results ({"items": [...]}).
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            record = record.get('message', record)
+            if 'items' in record:
+                yield from record['items']
+            else:
+                yield record
+
+
+class CrossrefIndex:
+    """DOI and BM25 title/author lookups over a local SQLite file"""
+
+    def __init__(self, path: str = CROSSREF_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS works ("
+            " rowid INTEGER PRIMARY KEY,"
+            " doi TEXT NOT NULL UNIQUE,"
+            " title TEXT, authors TEXT, venue TEXT, year INTEGER, source TEXT);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5("
+            " title, authors, venue, content='works', content_rowid='rowid',"
+            " tokenize='porter unicode61');"
+            "CREATE TRIGGER IF NOT EXISTS works_ai AFTER INSERT ON works BEGIN"
+            " INSERT INTO works_fts(rowid, title, authors, venue)"
+            " VALUES (new.rowid, new.title, new.authors, new.venue); END;"
+            "CREATE TRIGGER IF NOT EXISTS works_ad AFTER DELETE ON works BEGIN"
+            " INSERT INTO works_fts(works_fts, rowid, title, authors, venue)"
+            " VALUES ('delete', old.rowid, old.title, old.authors, old.venue); END;"
+        )
+        if 'source' not in {row[1] for row in conn.execute("PRAGMA table_info(works)")}:
+            # Built before sources were recorded; its rows get the stricter harvested-work matching
+            conn.execute("ALTER TABLE works ADD COLUMN source TEXT")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_items(self, items: Iterable[Dict], batch_size: int = 5000, replace: bool = True,
+                  source: str = SOURCE_DUMP) -> int:
+        """
+        Insert Crossref work items, replacing works already indexed under the same DOI
+        (or, with replace=False, leaving those untouched). Returns the number written.
+        """
+        conn = self._conn()
+        written = 0
+        batch = []
+
+        def flush() -> int:
+            rows = list({w['doi']: w for w in batch}.values())
+            if replace:
+                # Delete first so the FTS delete trigger sees the old row
+                conn.executemany("DELETE FROM works WHERE doi = ?", [(w['doi'],) for w in rows])
+            else:
+                placeholders = ','.join('?' * len(rows))
+                known = {doi for (doi,) in conn.execute(
+                    f"SELECT doi FROM works WHERE doi IN ({placeholders})", [w['doi'] for w in rows]
+                )}
+                rows = [w for w in rows if w['doi'] not in known]
+            conn.executemany(
+                "INSERT INTO works (doi, title, authors, venue, year, source)"
+                " VALUES (:doi, :title, :authors, :venue, :year, :source)",
+                [dict(w, source=source) for w in rows]
+            )
+            conn.commit()
+            return len(rows)
+
+        for item in items:
+            work = work_from_item(item)
+            if work is None:
+                continue
+            batch.append(work)
+            if len(batch) >= batch_size:
+                written += flush()
+                batch = []
+        if batch:
+            written += flush()
+        return written
+
+    def lookup_doi(self, doi: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT doi, title, authors, venue, year, source FROM works WHERE doi = ?", (doi.strip().lower(),)
+        ).fetchone()
+        return self._row(row) if row else None
+
+    def search(self, text: str, limit: int = 5) -> List[Dict]:
+        """BM25-ranked candidates for free text; best first"""
+        terms = list(dict.fromkeys(_tokens(text)))[:32]
+        if not terms:
+            return []
+        query = " OR ".join(f'"{t}"' for t in terms)
+        rows = self._conn().execute(
+            "SELECT w.doi, w.title, w.authors, w.venue, w.year, w.source, bm25(works_fts) AS rank"
+            " FROM works_fts JOIN works w ON w.rowid = works_fts.rowid"
+            " WHERE works_fts MATCH ? ORDER BY rank LIMIT ?",
+            (query, limit)
+        ).fetchall()
+        return [dict(self._row(r[:6]), bm25=-r[6]) for r in rows]
+
+    def recommend(self, text: str, limit: int = 5, min_coverage: float = RECOMMEND_MIN_COVERAGE) -> List[Dict]:
+        """
+        Works related to free text (keywords or a title), best first. Ranked with BM25 weighted
+        towards titles; works whose title and venue contain too few of the query terms are dropped.
+        """
+        terms = list(dict.fromkeys(_tokens(text)))[:32]
+        if not terms:
+            return []
+        query = " OR ".join(f'"{t}"' for t in terms)
+        rows = self._conn().execute(
+            "SELECT w.doi, w.title, w.authors, w.venue, w.year, w.source, bm25(works_fts, ?, ?, ?) AS rank"
+            " FROM works_fts JOIN works w ON w.rowid = works_fts.rowid"
+            " WHERE works_fts MATCH ? ORDER BY rank LIMIT ?",
+            (*RECOMMEND_WEIGHTS, query, limit * 10)
+        ).fetchall()
+
+        wanted = {_stem(t) for t in terms}
+        needed = max(1, math.ceil(len(wanted) * min_coverage))
+        works = []
+        for row in rows:
+            work = self._row(row[:6])
+            covered = wanted & {_stem(t) for t in _tokens(f"{work['title']} {work['venue']}")}
+            if len(covered) >= needed:
+                works.append(dict(work, bm25=-row[6], coverage=round(len(covered) / len(wanted), 2)))
+                if len(works) >= limit:
+                    break
+        return works
+
+    def resolve(self, citation_text: str, doi: Optional[str] = None) -> Optional[Dict]:
+        """Resolve a citation to a citation result dict, or None when the index has no good match"""
+        if doi:
+            work = self.lookup_doi(doi)
+            if work:
+                return self._result(work, 100)
+
+        cited = set(_tokens(citation_text))
+        for work in self.search(citation_text):
+            title_tokens = set(_tokens(work['title']))
+            if not title_tokens:
+                continue
+            coverage = len(title_tokens & cited) / len(title_tokens)
+            if coverage < MATCH_THRESHOLD:
+                continue
+            # A harvested search hit with a short title matches too much on its own
+            if work['source'] != SOURCE_DUMP and not self._names_work(work, cited):
+                continue
+            return self._result(work, int(coverage * 100))
+        return None
+
+    @staticmethod
+    def _names_work(work: Dict, cited: set) -> bool:
+        """Whether citation tokens include the work's year or one of its authors' surnames"""
+        if work['year'] and str(work['year']) in cited:
+            return True
+        return any(_surname(author) in cited for author in (work['authors'] or '').split(';'))
+
+    def optimize(self) -> None:
+        """Merge FTS segments after a large import"""
+        conn = self._conn()
+        conn.execute("INSERT INTO works_fts(works_fts) VALUES ('optimize')")
+        conn.commit()
+
+    def stats(self) -> Dict:
+        (works,) = self._conn().execute("SELECT COUNT(*) FROM works").fetchone()
+        return {'path': self.path, 'works': works}
+
+    @staticmethod
+    def _row(row) -> Dict:
+        doi, title, authors, venue, year, source = row
+        return {'doi': doi, 'title': title, 'authors': authors, 'venue': venue, 'year': year, 'source': source}
+
+    @staticmethod
+    def _result(work: Dict, score: int) -> Dict:
+        return {
+            'found': True,
+            'title': work['title'],
+            'year': work['year'],
+            'doi': work['doi'],
+            'score': score,
+            'source': 'local_index'
+        }
+
+
+_default_index: Optional[CrossrefIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_index(create: bool = False) -> Optional[CrossrefIndex]:
+    """Process-wide index, or None when no index file has been built (unless create is set)"""
+    global _default_index
+    if _default_index is None:
+        if not create and not os.path.exists(CROSSREF_INDEX_PATH):
+            return None
+        with _default_lock:
+            if _default_index is None:
+                _default_index = CrossrefIndex()
+    return _default_index
+
+
+def harvest(items: Iterable[Dict], source: str = SOURCE_CITATION) -> int:
+    """Add works from a live Crossref response to the index, keeping ones already there. Never raises."""
+    items = [item for item in items if item]
+    if not CROSSREF_HARVEST or not items:
+        return 0
+    try:
+        written = get_index(create=True).add_items(items, replace=False, source=source)
+    except sqlite3.Error as e:
+        print(f"Crossref harvest failed: {e}")
+        return 0
+    metrics.CROSSREF_HARVESTED.inc(amount=written)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the offline Crossref index")
+    parser.add_argument('command', choices=['import', 'stats'])
+    parser.add_argument('dump', nargs='*', help="JSONL dump files to import")
+    parser.add_argument('--index', default=CROSSREF_INDEX_PATH, help="Index file path")
+    args = parser.parse_args()
+
+    index = CrossrefIndex(args.index)
+    if args.command == 'import':
+        for path in args.dump:
+            started = time.time()
+            written = index.add_items(iter_dump(path))
+            print(f"Imported {written} works from {path} in {time.time() - started:.1f}s")
+        index.optimize()
+    print(index.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,396 @@
+"""
+Streaming profiler for uploaded CSV datasets.
+
+The file is read in row chunks and each column of a chunk is converted to a
+NumPy array once; all statistics are merged chunk by chunk, so memory stays
+bounded by the chunk size whatever the size of the file:
+
+- missing values, numeric mean/std/min/max (merged with Chan's formula)
+- quantiles and outliers (IQR fences) from a fixed-size reservoir sample
+- duplicate rows via a Bloom filter sized from the estimated row count (approximate)
+- Benford first-digit and terminal-digit preference tests
+- impossible values for columns whose names imply a range (age, percent, p-value, ...)
+
+A chunk that takes longer than DATASET_CHUNK_SECONDS halves the chunk size for
+the next one, and the whole profile stops after DATASET_MAX_SECONDS with the
+rows read so far.
+"""
+import csv
+import datetime
+import math
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DATASET_CHUNK_ROWS = int(os.getenv('DATASET_CHUNK_ROWS', '50000'))
+DATASET_MIN_CHUNK_ROWS = 1000
+DATASET_CHUNK_SECONDS = float(os.getenv('DATASET_CHUNK_SECONDS', '2'))
+DATASET_MAX_SECONDS = float(os.getenv('DATASET_MAX_SECONDS', '120'))
+DATASET_MAX_COLUMNS = int(os.getenv('DATASET_MAX_COLUMNS', '200'))
+# Bloom filter for duplicate rows: 16 bits per estimated row (~0.2% false positives with
+# 4 hashes), between 2^20 bits and the memory budget
+DUPLICATE_FILTER_BITS_PER_ROW = 16
+DUPLICATE_FILTER_MIN_BITS = 1 << 20
+DUPLICATE_FILTER_MAX_BITS = int(os.getenv('DATASET_DUPLICATE_FILTER_MB', '64')) * 8 * 1024 * 1024
+DUPLICATE_FILTER_HASHES = 4
+RESERVOIR_SIZE = 10000
+MAX_DISTINCT_TRACKED = 1000
+# Columns become fixed-width arrays as wide as their longest cell, so longer cells are cut.
+# The marker keeps a cut cell from parsing as a (different) number.
+MAX_CELL_CHARS = 64
+TRUNCATED_MARKER = '…'
+
+MISSING_TOKENS = ['', 'na', 'n/a', 'nan', 'null', 'none', '-', '?', 'NA', 'N/A', 'NaN', 'NULL', 'None']
+# Share of non-missing values that must parse for a column to count as numeric
+NUMERIC_THRESHOLD = 0.95
+MIN_VALUES_FOR_DIGIT_TESTS = 100
+
+# Chi-square critical values at p = 0.001. With large files chi-square flags trivial
+# deviations, so an effect size must also be exceeded: Nigrini's first-digit MAD
+# nonconformity level, or a terminal digit 1.5x as common as expected
+CHI2_CRITICAL_DF8 = 26.12
+CHI2_CRITICAL_DF9 = 27.88
+BENFORD_MAD_NONCONFORMING = 0.015
+DIGIT_PREFERENCE_RATIO = 1.5
+BENFORD = np.log10(1 + 1 / np.arange(1, 10))
+
+# (column name pattern, lowest valid value, highest valid value)
+IMPOSSIBLE_RULES = [
+    (re.compile(r'\bage\b|_age$|^age_', re.I), 0, 130),
+    (re.compile(r'percent|pct|percentage', re.I), 0, 100),
+    (re.compile(r'p[_ ]?val|probability|^prob', re.I), 0, 1),
+    (re.compile(r'count|^n_|_n$|^num_|number of|size', re.I), 0, math.inf),
+    (re.compile(r'\byear\b|_year$|^year', re.I), 1800, datetime.date.today().year + 1),
+    (re.compile(r'weight|height|length|duration|price|income|salary', re.I), 0, math.inf),
+]
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class ColumnStats:
+    """Running statistics for one column"""
+
+    def __init__(self, name: str, rng: np.random.Generator):
+        self.name = name
+        self.values = 0
+        self.missing = 0
+        self.numeric = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.first_digits = np.zeros(10, dtype=np.int64)
+        self.last_digits = np.zeros(10, dtype=np.int64)
+        self.integers = 0
+        self.out_of_range = 0
+        self.distinct = set()
+        self.reservoir = np.empty(0, dtype=np.float64)
+        self.seen_numeric = 0
+        self.rng = rng
+        self.valid_range = next(((lo, hi) for pattern, lo, hi in IMPOSSIBLE_RULES if pattern.search(name)), None)
+
+    def update(self, raw: List[str]):
+        cells = [cell if len(cell) <= MAX_CELL_CHARS else cell[:MAX_CELL_CHARS] + TRUNCATED_MARKER
+                 for cell in map(str.strip, raw)]
+        arr = np.asarray(cells, dtype=str)
+        missing = np.isin(arr, MISSING_TOKENS)
+        present = arr[~missing]
+        self.values += len(arr)
+        self.missing += int(missing.sum())
+
+        numbers = _to_float(present)
+        numbers = numbers[np.isfinite(numbers)]
+        self.numeric += len(numbers)
+        if len(self.distinct) <= MAX_DISTINCT_TRACKED:
+            self.distinct.update(np.unique(present).tolist())
+        if not len(numbers):
+            return
+
+        # Chan et al. parallel update of mean and sum of squared deviations
+        n_a, n_b = self.seen_numeric, len(numbers)
+        mean_b = float(numbers.mean())
+        m2_b = float(((numbers - mean_b) ** 2).sum())
+        delta = mean_b - self.mean
+        total = n_a + n_b
+        self.mean += delta * n_b / total
+        self.m2 += m2_b + delta * delta * n_a * n_b / total
+        self.minimum = min(self.minimum, float(numbers.min()))
+        self.maximum = max(self.maximum, float(numbers.max()))
+
+        magnitude = np.abs(numbers)
+        nonzero = magnitude[magnitude > 0]
+        if len(nonzero):
+            first = (nonzero / 10 ** np.floor(np.log10(nonzero))).astype(np.int64)
+            self.first_digits += np.bincount(np.clip(first, 1, 9), minlength=10)
+        whole = magnitude[(magnitude == np.floor(magnitude)) & (magnitude < 1e15)]
+        self.integers += len(whole)
+        if len(whole):
+            self.last_digits += np.bincount((whole % 10).astype(np.int64), minlength=10)
+
+        if self.valid_range is not None:
+            lo, hi = self.valid_range
+            self.out_of_range += int(((numbers < lo) | (numbers > hi)).sum())
+
+        self._sample(numbers)
+        self.seen_numeric = total
+
+    def _sample(self, numbers: np.ndarray):
+        """Reservoir sampling (Algorithm R, vectorized per chunk)"""
+        room = RESERVOIR_SIZE - len(self.reservoir)
+        if room > 0:
+            self.reservoir = np.concatenate([self.reservoir, numbers[:room]])
+            numbers = numbers[room:]
+        if not len(numbers):
+            return
+        seen_before = self.seen_numeric + max(room, 0)
+        positions = seen_before + np.arange(1, len(numbers) + 1)
+        slots = (self.rng.random(len(numbers)) * positions).astype(np.int64)
+        keep = slots < RESERVOIR_SIZE
+        self.reservoir[slots[keep]] = numbers[keep]
+
+    @property
+    def is_numeric(self) -> bool:
+        present = self.values - self.missing
+        return present > 0 and self.numeric >= NUMERIC_THRESHOLD * present
+
+    def to_dict(self) -> Dict:
+        summary = {
+            'name': self.name,
+            'missing': self.missing,
+            'missing_rate': round(self.missing / max(self.values, 1), 4),
+            'type': 'numeric' if self.is_numeric else 'text',
+            'distinct': len(self.distinct) if len(self.distinct) <= MAX_DISTINCT_TRACKED else f"{MAX_DISTINCT_TRACKED}+"
+        }
+        if not self.is_numeric or not self.seen_numeric:
+            return summary
+
+        std = math.sqrt(self.m2 / (self.seen_numeric - 1)) if self.seen_numeric > 1 else 0.0
+        q1, median, q3 = np.percentile(self.reservoir, [25, 50, 75])
+        iqr = q3 - q1
+        fences = (q1 - 3 * iqr, q3 + 3 * iqr)
+        outlier_rate = float(((self.reservoir < fences[0]) | (self.reservoir > fences[1])).mean()) if iqr > 0 else 0.0
+        summary.update({
+            'mean': round(self.mean, 6),
+            'std': round(std, 6),
+            'min': self.minimum,
+            'max': self.maximum,
+            'median': round(float(median), 6),
+            'outlier_rate': round(outlier_rate, 4),  # Estimated from the reservoir sample
+            'out_of_range': self.out_of_range,
+            'benford': self._benford(),
+            'digit_preference': self._digit_preference()
+        })
+        return summary
+
+    def _benford(self) -> Optional[Dict]:
+        counts = self.first_digits[1:]
+        n = int(counts.sum())
+        # Benford only applies to data spanning several orders of magnitude
+        if n < MIN_VALUES_FOR_DIGIT_TESTS or self.minimum <= 0 or self.maximum / self.minimum < 100:
+            return None
+        expected = BENFORD * n
+        chi2 = float(((counts - expected) ** 2 / expected).sum())
+        mad = float(np.abs(counts / n - BENFORD).mean())
+        return {
+            'chi2': round(chi2, 2),
+            'mad': round(mad, 4),
+            'deviates': chi2 > CHI2_CRITICAL_DF8 and mad > BENFORD_MAD_NONCONFORMING
+        }
+
+    def _digit_preference(self) -> Optional[Dict]:
+        n = int(self.last_digits.sum())
+        # Terminal digits of small integers (Likert scales, counts) are not expected to be uniform
+        if n < MIN_VALUES_FOR_DIGIT_TESTS or self.integers < 0.9 * self.seen_numeric or self.maximum - self.minimum < 100:
+            return None
+        expected = n / 10
+        chi2 = float(((self.last_digits - expected) ** 2 / expected).sum())
+        preferred = [int(d) for d in np.flatnonzero(self.last_digits > DIGIT_PREFERENCE_RATIO * expected)]
+        return {
+            'chi2': round(chi2, 2),
+            'preferred_digits': preferred,
+            'deviates': chi2 > CHI2_CRITICAL_DF9 and bool(preferred)
+        }
+
+
+def _to_float(values: np.ndarray) -> np.ndarray:
+    try:
+        return values.astype(np.float64)
+    except ValueError:
+        # Mixed column: convert what parses, NaN for the rest
+        out = np.empty(len(values), dtype=np.float64)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                out[i] = np.nan
+        return out
+
+
+class DuplicateFilter:
+    """Bloom filter over row hashes; counts approximate duplicate rows"""
+
+    def __init__(self, bits: int = DUPLICATE_FILTER_MIN_BITS, hashes: int = DUPLICATE_FILTER_HASHES):
+        self.bits = bits // 8 * 8
+        self.hashes = hashes
+        self.array = np.zeros(self.bits // 8, dtype=np.uint8)
+
+    @classmethod
+    def for_rows(cls, expected_rows: int) -> 'DuplicateFilter':
+        bits = expected_rows * DUPLICATE_FILTER_BITS_PER_ROW
+        return cls(min(max(bits, DUPLICATE_FILTER_MIN_BITS), DUPLICATE_FILTER_MAX_BITS))
+
+    def false_positive_rate(self) -> float:
+        """Chance that a new row is reported as seen, at the filter's current fill"""
+        fill = 0
+        for start in range(0, len(self.array), 1 << 24):
+            fill += int(_POPCOUNT[self.array[start:start + (1 << 24)]].sum(dtype=np.int64))
+        return (fill / self.bits) ** self.hashes
+
+    def add_rows(self, rows: List[List[str]]) -> int:
+        """Add a chunk of rows; returns how many were already seen"""
+        h1 = np.array([hash('\x1f'.join(row)) for row in rows], dtype=np.int64).view(np.uint64)
+        unique, first = np.unique(h1, return_index=True)
+        duplicates = len(h1) - len(unique)
+
+        with np.errstate(over='ignore'):
+            h2 = (unique * np.uint64(0x9E3779B97F4A7C15)) & _MASK64
+            h2 = (h2 >> np.uint64(29)) | np.uint64(1)
+            positions = [(unique + np.uint64(i) * h2) % np.uint64(self.bits) for i in range(self.hashes)]
+        seen = np.ones(len(unique), dtype=bool)
+        for pos in positions:
+            seen &= (self.array[(pos >> np.uint64(3)).astype(np.int64)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1 == 1
+        for pos in positions:
+            np.bitwise_or.at(self.array, (pos >> np.uint64(3)).astype(np.int64),
+                             (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)))
+        return duplicates + int(seen.sum())
+
+
+def estimate_rows(path: str, chunk: List[List[str]]) -> int:
+    """Rows in the whole file, from its size and the average row length in a chunk"""
+    # Cells plus one delimiter or line break each
+    chars = sum(sum(len(cell) for cell in row) + len(row) for row in chunk)
+    return math.ceil(os.path.getsize(path) * len(chunk) / max(chars, 1))
+
+
+def _read_chunks(reader, width: int, started: float, state: Dict):
+    chunk_rows = DATASET_CHUNK_ROWS
+    chunk: List[List[str]] = []
+    for row in reader:
+        if len(row) != width:
+            if not any(cell.strip() for cell in row):
+                continue
+            state['ragged_rows'] += 1
+            row = (row + [''] * width)[:width]
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            chunk_started = time.perf_counter()
+            yield chunk
+            if time.perf_counter() - chunk_started > DATASET_CHUNK_SECONDS:
+                chunk_rows = max(DATASET_MIN_CHUNK_ROWS, chunk_rows // 2)
+            chunk = []
+            if time.perf_counter() - started > DATASET_MAX_SECONDS:
+                state['truncated'] = True
+                return
+    if chunk:
+        yield chunk
+
+
+def profile_csv(path: str) -> Dict:
+    """Stream a CSV file and return per-column stats plus a list of anomalies"""
+    started = time.perf_counter()
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        header = next(reader, None)
+        if not header:
+            return {'status': 'Empty', 'rows': 0, 'columns': [], 'anomalies': ['Dataset file is empty']}
+
+        # Rows are checked against the full header; only the first DATASET_MAX_COLUMNS are profiled
+        width = len(header)
+        header = [h.strip() or f"column_{i + 1}" for i, h in enumerate(header)][:DATASET_MAX_COLUMNS]
+        rng = np.random.default_rng(0)
+        columns = [ColumnStats(name, rng) for name in header]
+        duplicates: Optional[DuplicateFilter] = None
+        state = {'ragged_rows': 0, 'truncated': False}
+        rows = 0
+        duplicate_rows = 0
+        chunks = 0
+
+        for chunk in _read_chunks(reader, width, started, state):
+            rows += len(chunk)
+            chunks += 1
+            if duplicates is None:
+                duplicates = DuplicateFilter.for_rows(estimate_rows(path, chunk))
+            duplicate_rows += duplicates.add_rows(chunk)
+            # zip stops at the last profiled column
+            for stats, values in zip(columns, zip(*chunk)):
+                stats.update(values)
+
+    column_summaries = [c.to_dict() for c in columns]
+    # Rows the filter may have flagged without a real duplicate (an upper bound: the fill only grew)
+    false_duplicates = round(duplicates.false_positive_rate() * rows) if duplicates is not None else 0
+    return {
+        'status': 'Analyzed',
+        'rows': rows,
+        'column_count': len(columns),
+        'chunks': chunks,
+        'truncated': state['truncated'],
+        'ragged_rows': state['ragged_rows'],
+        'duplicate_rows': duplicate_rows,  # Approximate (Bloom filter)
+        'duplicate_false_positives': false_duplicates,  # Estimated share of duplicate_rows
+        'columns': column_summaries,
+        'anomalies': find_anomalies(rows, duplicate_rows - false_duplicates, state, column_summaries),
+        'profile_time_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def find_anomalies(rows: int, duplicate_rows: int, state: Dict, columns: List[Dict]) -> List[str]:
+    anomalies = []
+    if state['truncated']:
+        anomalies.append(f"Profiling stopped after {rows} rows (time limit); statistics cover those rows only")
+    if state['ragged_rows']:
+        anomalies.append(f"{state['ragged_rows']} rows have a different number of fields than the header")
+    if rows and duplicate_rows / rows > 0.01:
+        anomalies.append(f"About {duplicate_rows} duplicate rows ({duplicate_rows / rows:.1%})")
+
+    for col in columns:
+        name = col['name']
+        if col['missing_rate'] > 0.2:
+            anomalies.append(f"Column '{name}' is {col['missing_rate']:.0%} missing")
+        if col['type'] != 'numeric':
+            continue
+        if col['out_of_range']:
+            anomalies.append(f"Column '{name}' has {col['out_of_range']} impossible values for its name")
+        if col['outlier_rate'] > 0.01:
+            anomalies.append(f"Column '{name}' has ~{col['outlier_rate']:.1%} extreme outliers")
+        if col['std'] == 0 and rows > 1:
+            anomalies.append(f"Column '{name}' is constant")
+        if col['benford'] and col['benford']['deviates']:
+            anomalies.append(f"Column '{name}' first digits deviate from Benford's law (chi2={col['benford']['chi2']})")
+        preference = col['digit_preference']
+        if preference and preference['deviates']:
+            digits = ', '.join(str(d) for d in preference['preferred_digits'])
+            anomalies.append(f"Column '{name}' shows terminal digit preference for {digits} (chi2={preference['chi2']})")
+    return anomalies
+
+
+def profile_dataset(path: Optional[str]) -> Dict:
+    """dataset_analysis section of the audit report"""
+    if not path:
+        return {'status': 'Skipped', 'anomalies': []}
+    if not path.lower().endswith(('.csv', '.tsv', '.txt')):
+        return {'status': 'Unsupported', 'anomalies': [f"Only CSV datasets are profiled (got {os.path.basename(path)})"]}
+    try:
+        return profile_csv(path)
+    except Exception as e:
+        print(f"Error profiling dataset: {e}")
+        return {'status': 'Failed', 'anomalies': [f"Dataset could not be read: {e}"]}
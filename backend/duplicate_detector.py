@@ -0,0 +1,316 @@
+"""
+Near-duplicate and text-reuse detection across submissions.
+
+Every completed submission is reduced to a MinHash signature over its word
+shingles and a sample of shingle fingerprints with their word positions.
+Signatures are split into LSH bands whose buckets live in a sidecar SQLite
+file, so a new paper only meets the few stored documents that share a bucket
+with it instead of every document on the platform. Whole-document MinHash
+misses a long passage copied into an otherwise new paper, so a sparser,
+content-defined subset of the fingerprints (anchors) is also kept in an
+inverted index. Candidates from either source are scored from their
+signatures, and the shared fingerprints are merged into the overlapping
+passages.
+"""
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DUPLICATE_INDEX_PATH = os.getenv('DUPLICATE_INDEX_PATH', './duplicate_index.db')
+SHINGLE_WORDS = int(os.getenv('DUPLICATE_SHINGLE_WORDS', '5'))
+NUM_PERM = 128
+# 64 bands of 2 rows: documents sharing ~15% of their shingles are likely candidates
+LSH_BANDS = 64
+LSH_ROWS = NUM_PERM // LSH_BANDS
+# Keep one fingerprint in FINGERPRINT_SAMPLE for passage location
+FINGERPRINT_SAMPLE = int(os.getenv('DUPLICATE_FINGERPRINT_SAMPLE', '4'))
+# Anchors are the fingerprints whose hash is divisible by ANCHOR_SAMPLE (a multiple of FINGERPRINT_SAMPLE)
+ANCHOR_SAMPLE = int(os.getenv('DUPLICATE_ANCHOR_SAMPLE', '32'))
+MIN_SHARED_ANCHORS = int(os.getenv('DUPLICATE_MIN_SHARED_ANCHORS', '3'))
+# Candidates verified per query, most shared buckets first
+MAX_CANDIDATES = int(os.getenv('DUPLICATE_MAX_CANDIDATES', '50'))
+MIN_SIMILARITY = float(os.getenv('DUPLICATE_MIN_SIMILARITY', '0.05'))
+MIN_PASSAGE_WORDS = int(os.getenv('DUPLICATE_MIN_PASSAGE_WORDS', '30'))
+
+_WORD = re.compile(r'\w+')
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(0x5eed)
+# Fixed seed: signatures must stay comparable across processes and restarts
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+# a*h overflows 64 bits, so a is split at bit 32: a*h = (a_hi*h << 32) + a_lo*h, each part reduced mod _PRIME
+_A_HI = np.array([[a >> 32] for a, _ in _PERMUTATIONS], dtype=np.uint64)
+_A_LO = np.array([[a & _MAX_HASH] for a, _ in _PERMUTATIONS], dtype=np.uint64)
+_B = np.array([[b] for _, b in _PERMUTATIONS], dtype=np.uint64)
+_P = np.uint64(_PRIME)
+# Shingles hashed per step; keeps the (NUM_PERM, n) intermediates around 1 MB, in cache
+_MINHASH_CHUNK = 1024
+
+
+def tokenize(text: str) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Lowercased words and their character spans in text"""
+    words, spans = [], []
+    for match in _WORD.finditer(text.lower()):
+        words.append(match.group())
+        spans.append(match.span())
+    return words, spans
+
+
+def shingle_hashes(words: Sequence[str], k: int = SHINGLE_WORDS) -> List[int]:
+    """32-bit hash of every k-word shingle, indexed by its first word"""
+    return [zlib.crc32(' '.join(words[i:i + k]).encode()) for i in range(len(words) - k + 1)]
+
+
+def _fold(x: np.ndarray) -> np.ndarray:
+    # x mod 2**61 - 1 up to one extra _PRIME: bits above 61 wrap around to the bottom
+    return (x & _P) + (x >> np.uint64(61))
+
+
+def _permute(h: np.ndarray) -> np.ndarray:
+    """(a*h + b) % _PRIME for every permutation (rows) and 32-bit hash (columns), exactly"""
+    high = _A_HI * h  # < 2**61
+    high = (high >> np.uint64(29)) + ((high & np.uint64((1 << 29) - 1)) << np.uint64(32))  # high << 32, folded
+    total = _fold(high + _fold(_A_LO * h) + _B)  # a_lo*h < 2**64; the sum stays below 2**63
+    return np.where(total >= _P, total - _P, total)
+
+
+def minhash(hashes: Sequence[int]) -> List[int]:
+    unique = np.unique(np.asarray(hashes, dtype=np.uint64))
+    if not unique.size:
+        return [_MAX_HASH] * NUM_PERM
+    signature = np.minimum.reduce([
+        _permute(unique[start:start + _MINHASH_CHUNK]).min(axis=1)
+        for start in range(0, unique.size, _MINHASH_CHUNK)
+    ])
+    return (signature & np.uint64(_MAX_HASH)).tolist()
+
+
+def band_keys(signature: Sequence[int]) -> List[int]:
+    """One signed 64-bit bucket key per LSH band"""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = array('I', signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+        digest = hashlib.blake2b(band.to_bytes(2, 'little') + rows.tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def fingerprints(hashes: Sequence[int]) -> List[Tuple[int, int]]:
+    """(hash, word position) for the sampled shingles"""
+    return [(h, pos) for pos, h in enumerate(hashes) if h % FINGERPRINT_SAMPLE == 0]
+
+
+def _anchors(prints: Sequence[Sequence[int]]) -> List[int]:
+    return [h for h, _ in prints if h % ANCHOR_SAMPLE == 0]
+
+
+def fingerprint_text(text: str) -> Dict:
+    """Everything the index stores for a document, plus the tokens used to quote passages"""
+    words, spans = tokenize(text)
+    hashes = shingle_hashes(words)
+    return {
+        'signature': minhash(hashes),
+        'fingerprints': fingerprints(hashes),
+        'shingle_count': len(set(hashes)),
+        'spans': spans
+    }
+
+
+def _passages(matches: List[Tuple[int, int]], text: str, spans: List[Tuple[int, int]]) -> List[Dict]:
+    """Merge (query position, source position) fingerprint matches into contiguous passages"""
+    passages = []
+    max_gap = SHINGLE_WORDS * FINGERPRINT_SAMPLE * 2
+    run: List[Tuple[int, int]] = []
+    for match in sorted(matches) + [None]:
+        if match is not None and run and match[0] - run[-1][0] <= max_gap:
+            run.append(match)
+            continue
+        if run:
+            start, end = run[0][0], run[-1][0] + SHINGLE_WORDS
+            if end - start >= MIN_PASSAGE_WORDS:
+                end = min(end, len(spans))
+                excerpt = text[spans[start][0]:spans[end - 1][1]]
+                passages.append({
+                    'start_word': start,
+                    'end_word': end,
+                    'source_start_word': min(s for _, s in run),
+                    'words': end - start,
+                    'excerpt': excerpt[:300] + ('...' if len(excerpt) > 300 else '')
+                })
+        run = [match] if match is not None else []
+    return passages
+
+
+class DuplicateIndex:
+    """LSH index of submission signatures and fingerprints"""
+
+    def __init__(self, path: str = DUPLICATE_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " doc_id INTEGER PRIMARY KEY, title TEXT, shingles INTEGER NOT NULL,"
+            " signature BLOB NOT NULL, fingerprints BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " key INTEGER NOT NULL, doc_id INTEGER NOT NULL, PRIMARY KEY (key, doc_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS ix_buckets_doc ON buckets (doc_id);"
+            "CREATE TABLE IF NOT EXISTS anchors ("
+            " hash INTEGER NOT NULL, doc_id INTEGER NOT NULL, PRIMARY KEY (hash, doc_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS ix_anchors_doc ON anchors (doc_id);"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, doc_id: int, signature: Sequence[int], prints: Sequence[Sequence[int]],
+            shingle_count: int, title: str = '') -> None:
+        """Insert or replace a document"""
+        conn = self._conn()
+        self.remove(doc_id, commit=False)
+        if not shingle_count:
+            conn.commit()
+            return
+        flat = array('I', (v for pair in prints for v in pair))
+        conn.execute(
+            "INSERT INTO docs (doc_id, title, shingles, signature, fingerprints) VALUES (?, ?, ?, ?, ?)",
+            (doc_id, title, shingle_count, array('I', signature).tobytes(), flat.tobytes())
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO buckets (key, doc_id) VALUES (?, ?)",
+            [(key, doc_id) for key in band_keys(signature)]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO anchors (hash, doc_id) VALUES (?, ?)",
+            [(h, doc_id) for h in _anchors(prints)]
+        )
+        conn.commit()
+
+    def remove(self, doc_id: int, commit: bool = True) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM buckets WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM anchors WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+        if commit:
+            conn.commit()
+
+    def doc_count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def candidates(self, signature: Sequence[int], prints: Sequence[Sequence[int]],
+                   exclude: Iterable[int] = ()) -> List[int]:
+        """Stored documents sharing an LSH bucket or enough anchors, strongest first"""
+        conn = self._conn()
+        exclude = set(exclude)
+        keys = band_keys(signature)
+        placeholders = ','.join('?' * len(keys))
+        near = conn.execute(
+            f"SELECT doc_id, COUNT(*) AS shared FROM buckets WHERE key IN ({placeholders})"
+            f" GROUP BY doc_id ORDER BY shared DESC LIMIT ?",
+            keys + [MAX_CANDIDATES + len(exclude)]
+        ).fetchall()
+
+        reuse = []
+        anchors = sorted(set(_anchors(prints)))
+        for i in range(0, len(anchors), 500):
+            batch = anchors[i:i + 500]
+            placeholders = ','.join('?' * len(batch))
+            reuse.extend(conn.execute(
+                f"SELECT doc_id, COUNT(*) FROM anchors WHERE hash IN ({placeholders}) GROUP BY doc_id", batch
+            ))
+        shared_anchors: Dict[int, int] = {}
+        for doc_id, count in reuse:
+            shared_anchors[doc_id] = shared_anchors.get(doc_id, 0) + count
+        reuse = sorted(
+            (doc_id for doc_id, count in shared_anchors.items() if count >= MIN_SHARED_ANCHORS),
+            key=shared_anchors.get, reverse=True
+        )
+
+        doc_ids = []
+        for doc_id in [doc_id for doc_id, _ in near] + reuse:
+            if doc_id not in exclude and doc_id not in doc_ids:
+                doc_ids.append(doc_id)
+        return doc_ids[:MAX_CANDIDATES]
+
+    def find(self, text: str, fingerprint: Optional[Dict] = None, exclude: Iterable[int] = ()) -> List[Dict]:
+        """Stored documents that share text with this one, with the overlapping passages"""
+        fingerprint = fingerprint or fingerprint_text(text)
+        if not fingerprint['shingle_count']:
+            return []
+        signature = fingerprint['signature']
+        doc_ids = self.candidates(signature, fingerprint['fingerprints'], exclude)
+        if not doc_ids:
+            return []
+
+        query_prints: Dict[int, List[int]] = {}
+        for h, pos in fingerprint['fingerprints']:
+            query_prints.setdefault(h, []).append(pos)
+
+        placeholders = ','.join('?' * len(doc_ids))
+        matches = []
+        for doc_id, title, shingles, sig_blob, fp_blob in self._conn().execute(
+            f"SELECT doc_id, title, shingles, signature, fingerprints FROM docs WHERE doc_id IN ({placeholders})",
+            doc_ids
+        ):
+            stored = array('I')
+            stored.frombytes(sig_blob)
+            similarity = sum(1 for a, b in zip(signature, stored) if a == b) / NUM_PERM
+
+            flat = array('I')
+            flat.frombytes(fp_blob)
+            shared = []
+            for i in range(0, len(flat), 2):
+                for pos in query_prints.get(flat[i], ()):
+                    shared.append((pos, flat[i + 1]))
+            passages = _passages(shared, text, fingerprint['spans'])
+            if similarity < MIN_SIMILARITY and not passages:
+                continue
+            matches.append({
+                'submission_id': doc_id,
+                'title': title,
+                'similarity': round(similarity, 3),
+                # Share of this paper's sampled shingles that also occur in the earlier one
+                'containment': round(len({pos for pos, _ in shared}) / max(len(fingerprint['fingerprints']), 1), 3),
+                'shared_fingerprints': len(shared),
+                'passages': passages
+            })
+
+        matches.sort(key=lambda m: (m['similarity'], m['containment']), reverse=True)
+        return matches
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        return {
+            'documents': self.doc_count(),
+            'buckets': conn.execute("SELECT COUNT(*) FROM buckets").fetchone()[0],
+            'anchors': conn.execute("SELECT COUNT(*) FROM anchors").fetchone()[0]
+        }
+
+
+_default_index: Optional[DuplicateIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_index() -> DuplicateIndex:
+    """Process-wide index, opened on first use"""
+    global _default_index
+    if _default_index is None:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = DuplicateIndex()
+    return _default_index
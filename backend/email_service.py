@@ -7,6 +7,8 @@ import sib_api_v3_sdk
 from sib_api_v3_sdk.rest import ApiException
 from dotenv import load_dotenv
 
+import metrics
+
 load_dotenv()
 
 # Configure Brevo API
@@ -24,7 +26,8 @@ def send_email(
     to_name: str,
     subject: str,
     html_content: str,
-    text_content: Optional[str] = None
+    text_content: Optional[str] = None,
+    template: str = "other"
 ) -> bool:
     """
     Send an email using Brevo API
@@ -35,6 +38,7 @@ def send_email(
         subject: Email subject
         html_content: HTML email content
         text_content: Plain text email content (optional)
+        template: Which kind of email this is, for the send metrics
     
     Returns:
         bool: True if email sent successfully, False otherwise
@@ -50,13 +54,16 @@ def send_email(
         
         api_response = api_instance.send_transac_email(send_smtp_email)
         print(f"Email sent successfully to {to_email}: {api_response}")
+        metrics.EMAILS.inc(template, "sent")
         return True
         
     except ApiException as e:
         print(f"Exception when sending email: {e}")
+        metrics.EMAILS.inc(template, "api_error")
         return False
     except Exception as e:
         print(f"Unexpected error sending email: {e}")
+        metrics.EMAILS.inc(template, "error")
         return False
 
 
@@ -180,7 +187,7 @@ def send_welcome_email(user_email: str, user_name: str, user_role: str) -> bool:
     ResearchSentinel - Ensuring research integrity, one paper at a time.
     """
     
-    return send_email(user_email, user_name, subject, html_content, text_content)
+    return send_email(user_email, user_name, subject, html_content, text_content, template="welcome")
 
 
 def send_audit_complete_email(
@@ -319,7 +326,7 @@ def send_audit_complete_email(
     ResearchSentinel - Ensuring research integrity, one paper at a time.
     """
     
-    return send_email(user_email, user_name, subject, html_content, text_content)
+    return send_email(user_email, user_name, subject, html_content, text_content, template="audit_complete")
 
 
 def send_password_reset_email(user_email: str, user_name: str, reset_token: str) -> bool:
@@ -421,7 +428,7 @@ def send_password_reset_email(user_email: str, user_name: str, reset_token: str)
     ResearchSentinel
     """
     
-    return send_email(user_email, user_name, subject, html_content, text_content)
+    return send_email(user_email, user_name, subject, html_content, text_content, template="password_reset")
 
 
 # Test function
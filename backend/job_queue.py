@@ -0,0 +1,163 @@
+"""
+Durable audit job queue stored in the application database.
+
+Jobs are claimed with a conditional UPDATE, so any number of workers can
+poll the same table. A claim grants a time-limited lease that the worker
+extends with heartbeats; a job whose lease expires (worker crashed or was
+restarted) becomes claimable again. Failed jobs are retried with exponential
+backoff and dead-lettered once they run out of attempts.
+"""
+import datetime
+import os
+import random
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+import models
+
+AUDIT_JOB_LEASE_SECONDS = int(os.getenv('AUDIT_JOB_LEASE_SECONDS', '120'))
+AUDIT_JOB_MAX_ATTEMPTS = int(os.getenv('AUDIT_JOB_MAX_ATTEMPTS', '3'))
+AUDIT_JOB_BACKOFF_SECONDS = int(os.getenv('AUDIT_JOB_BACKOFF_SECONDS', '30'))
+AUDIT_JOB_MAX_BACKOFF_SECONDS = int(os.getenv('AUDIT_JOB_MAX_BACKOFF_SECONDS', '3600'))
+
+Job = models.AuditJob
+
+
+def _claimable(now: datetime.datetime):
+    return or_(
+        and_(Job.status == models.JobStatus.QUEUED, Job.available_at <= now),
+        and_(Job.status == models.JobStatus.RUNNING, Job.lease_expires_at < now, Job.attempts < Job.max_attempts)
+    )
+
+
+def enqueue(db: Session, submission_id: int, file_path: str, github_url: Optional[str] = None,
+            dataset_path: Optional[str] = None, cache_key: Optional[str] = None, commit: bool = True) -> models.AuditJob:
+    """Add an audit job. Pass commit=False to enqueue inside the caller's transaction."""
+    now = datetime.datetime.utcnow()
+    job = Job(
+        submission_id=submission_id,
+        file_path=file_path,
+        github_url=github_url,
+        dataset_path=dataset_path,
+        cache_key=cache_key,
+        status=models.JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=AUDIT_JOB_MAX_ATTEMPTS,
+        available_at=now,
+        created_at=now,
+        updated_at=now
+    )
+    db.add(job)
+    if commit:
+        db.commit()
+    return job
+
+
+def claim(db: Session, worker_id: str, lease_seconds: int = AUDIT_JOB_LEASE_SECONDS) -> Optional[models.AuditJob]:
+    """Lease the next available job to worker_id, or return None when the queue is empty"""
+    reap_expired(db)
+    now = datetime.datetime.utcnow()
+    candidates = db.query(Job.id).filter(_claimable(now)).order_by(Job.available_at, Job.id).limit(5).all()
+    for (job_id,) in candidates:
+        # Only one worker's UPDATE can match while the job is still claimable
+        claimed = db.query(Job).filter(Job.id == job_id, _claimable(now)).update({
+            Job.status: models.JobStatus.RUNNING,
+            Job.lease_owner: worker_id,
+            Job.lease_expires_at: now + datetime.timedelta(seconds=lease_seconds),
+            Job.heartbeat_at: now,
+            Job.attempts: Job.attempts + 1,
+            Job.updated_at: now
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return db.query(Job).filter(Job.id == job_id).first()
+    return None
+
+
+def heartbeat(db: Session, job_id: int, worker_id: str, lease_seconds: int = AUDIT_JOB_LEASE_SECONDS) -> bool:
+    """Extend the lease. Returns False if the worker no longer holds it."""
+    now = datetime.datetime.utcnow()
+    extended = db.query(Job).filter(
+        Job.id == job_id, Job.lease_owner == worker_id, Job.status == models.JobStatus.RUNNING
+    ).update({
+        Job.lease_expires_at: now + datetime.timedelta(seconds=lease_seconds),
+        Job.heartbeat_at: now,
+        Job.updated_at: now
+    }, synchronize_session=False)
+    db.commit()
+    return bool(extended)
+
+
+def complete(db: Session, job_id: int, worker_id: str, commit: bool = True) -> bool:
+    """Mark a job done. Pass commit=False to finish it in the same transaction as its report."""
+    now = datetime.datetime.utcnow()
+    done = db.query(Job).filter(Job.id == job_id, Job.lease_owner == worker_id).update({
+        Job.status: models.JobStatus.COMPLETED,
+        Job.lease_expires_at: None,
+        Job.updated_at: now
+    }, synchronize_session=False)
+    if commit:
+        db.commit()
+    return bool(done)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped"""
+    delay = min(AUDIT_JOB_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)), AUDIT_JOB_MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def fail(db: Session, job_id: int, worker_id: str, error: str) -> Optional[str]:
+    """Record a failed attempt. Returns the job's new status (queued for retry, or dead)."""
+    job = db.query(Job).filter(Job.id == job_id, Job.lease_owner == worker_id).first()
+    if job is None:
+        return None
+    now = datetime.datetime.utcnow()
+    job.last_error = error[:2000]
+    job.lease_expires_at = None
+    job.updated_at = now
+    if job.attempts >= job.max_attempts:
+        _dead_letter(db, job)
+    else:
+        job.status = models.JobStatus.QUEUED
+        job.available_at = now + datetime.timedelta(seconds=backoff_seconds(job.attempts))
+    db.commit()
+    return job.status
+
+
+def reap_expired(db: Session) -> int:
+    """Dead-letter jobs whose lease expired on their final attempt"""
+    now = datetime.datetime.utcnow()
+    expired = db.query(Job).filter(
+        Job.status == models.JobStatus.RUNNING,
+        Job.lease_expires_at < now,
+        Job.attempts >= Job.max_attempts
+    ).all()
+    for job in expired:
+        job.last_error = job.last_error or "Lease expired on final attempt"
+        _dead_letter(db, job)
+    if expired:
+        db.commit()
+    return len(expired)
+
+
+def _dead_letter(db: Session, job: models.AuditJob):
+    job.status = models.JobStatus.DEAD
+    job.updated_at = datetime.datetime.utcnow()
+    submission = db.query(models.Submission).filter(models.Submission.id == job.submission_id).first()
+    if submission:
+        submission.status = models.SubmissionStatus.FAILED
+    print(f"Audit job {job.id} dead-lettered after {job.attempts} attempts: {job.last_error}")
+
+
+def queue_depth(db: Session) -> int:
+    """Jobs waiting to be claimed"""
+    return db.query(Job).filter(Job.status == models.JobStatus.QUEUED).count()
+
+
+def status_counts(db: Session) -> Dict[str, int]:
+    """Number of jobs in each status"""
+    rows = db.query(Job.status, func.count(Job.id)).group_by(Job.status).all()
+    return {getattr(status, 'value', status): count for status, count in rows}
@@ -0,0 +1,156 @@
+"""
+Abstract and keyphrase extraction for audit reports.
+
+The abstract is the text under an "Abstract" heading, up to the keywords line
+or the introduction. Keyphrases are the author's own "Keywords:" line when
+the paper has one, topped up with phrases scored by RAKE (word degree over
+frequency within stopword-delimited candidate phrases) and weighted by
+inverse document frequency from the similarity index's corpus statistics, so
+terms every paper uses rank below the ones specific to this paper.
+
+One regex pass over the text (without its reference list) builds the
+candidates; the only I/O is a single IDF lookup for the candidate words.
+"""
+import math
+import re
+import sqlite3
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import similarity_index
+
+KEYWORD_COUNT = 8
+MAX_PHRASE_WORDS = 3
+MAX_ABSTRACT_CHARS = 3000
+# Abstracts and keyword lines are on the first pages
+FRONT_MATTER_CHARS = 10000
+
+STOPWORDS = similarity_index.STOPWORDS | frozenset("""
+a an as at be by do if in is it of on or so to up we us i me my no nor new one two three via per vs based show shows
+shown propose proposed present presents presented paper study studies work results result approach method methods
+first second different many well also able given make made provide provides find found obtain obtained
+""".split())
+
+_ABSTRACT_HEADING = re.compile(r'^[ \t]*abstract\b[ \t]*[:.\-—–]?[ \t]*', re.IGNORECASE | re.MULTILINE)
+_ABSTRACT_END = re.compile(
+    r'^[ \t]*(?:keywords|key\s+words|index\s+terms|(?:1|i)\.?[ \t]+introduction|introduction)\b',
+    re.IGNORECASE | re.MULTILINE
+)
+_KEYWORDS_LINE = re.compile(r'\b(?:keywords|key\s+words|index\s+terms)\s*[:.\-—–]\s*([^\n]+)',
+                            re.IGNORECASE)
+_KEYWORD_SPLIT = re.compile(r'\s*[;,·•]\s*')
+_REFERENCES_HEADING = re.compile(r'^[ \t]*(?:references|bibliography|works\s+cited)[ \t]*$', re.IGNORECASE | re.MULTILINE)
+# Punctuation and digits end a candidate phrase; stopwords split it further
+_FRAGMENT = re.compile(r'[a-z][a-z\-]*[a-z](?:[ \t\n]+[a-z][a-z\-]*[a-z])*')
+_TOKEN = re.compile(r'[a-z][a-z\-]*[a-z]')
+_SPACE = re.compile(r'\s+')
+
+
+def _stems(phrase: str) -> set:
+    # So "graph neural network" counts as covered by "graph neural networks"
+    return {w[:-1] if len(w) > 3 and w.endswith('s') else w for w in phrase.lower().split()}
+
+
+def detect_abstract(text: str) -> str:
+    """The paper's abstract, or an empty string when it has no "Abstract" heading"""
+    front = text[:FRONT_MATTER_CHARS]
+    heading = _ABSTRACT_HEADING.search(front)
+    if heading is None:
+        return ''
+    end = _ABSTRACT_END.search(front, heading.end())
+    abstract = front[heading.end():end.start() if end else heading.end() + MAX_ABSTRACT_CHARS]
+    return _SPACE.sub(' ', abstract).strip()[:MAX_ABSTRACT_CHARS]
+
+
+def author_keywords(text: str) -> List[str]:
+    """Keywords from the paper's own "Keywords:" line"""
+    match = _KEYWORDS_LINE.search(text[:FRONT_MATTER_CHARS])
+    if match is None:
+        return []
+    keywords = []
+    for keyword in _KEYWORD_SPLIT.split(match.group(1).strip().rstrip('.')):
+        if 2 <= len(keyword) <= 60 and keyword.lower() not in (k.lower() for k in keywords):
+            keywords.append(keyword)
+    return keywords
+
+
+def candidate_phrases(lower: str) -> List[Tuple[str, ...]]:
+    """Runs of up to MAX_PHRASE_WORDS content words between stopwords and punctuation"""
+    phrases = []
+    for fragment in _FRAGMENT.finditer(lower):
+        run: List[str] = []
+        for word in _TOKEN.findall(fragment.group()):
+            if word in STOPWORDS or len(word) < 3:
+                if 0 < len(run) <= MAX_PHRASE_WORDS:
+                    phrases.append(tuple(run))
+                run = []
+            else:
+                run.append(word)
+        if 0 < len(run) <= MAX_PHRASE_WORDS:
+            phrases.append(tuple(run))
+    return phrases
+
+
+def _idf(words: List[str]) -> Dict[str, float]:
+    try:
+        return similarity_index.get_index().idf(words)
+    except sqlite3.Error as e:
+        print(f"Keyphrase IDF lookup failed: {e}")
+        return dict.fromkeys(words, 1.0)
+
+
+def score_phrases(lower: str, abstract: str = '') -> List[Tuple[str, float]]:
+    """Candidate phrases by RAKE score times mean IDF, best first"""
+    phrases = candidate_phrases(lower)
+    counts = Counter(phrases)
+    in_abstract = set(candidate_phrases(abstract.lower())) if abstract else set()
+    # A phrase seen once outside the abstract is usually noise, not a topic
+    kept = [p for p, n in counts.items() if n > 1 or p in in_abstract]
+    if not kept:
+        return []
+
+    frequency: Counter = Counter()
+    degree: Counter = Counter()
+    for phrase in phrases:
+        for word in phrase:
+            frequency[word] += 1
+            degree[word] += len(phrase)
+    idf = _idf(sorted({w for p in kept for w in p}))
+
+    scored = []
+    for phrase in kept:
+        rake = sum(degree[w] / frequency[w] for w in phrase)
+        weight = sum(idf[w] for w in phrase) / len(phrase)
+        scored.append((' '.join(phrase), rake * weight * (1 + math.log(counts[phrase]))))
+    scored.sort(key=lambda kv: kv[1], reverse=True)
+    return scored
+
+
+def extract_keywords(text: str, lower: str, abstract: str = '', count: int = KEYWORD_COUNT) -> List[str]:
+    """The author's keywords first, then the best scored phrases not already covered by one"""
+    keywords = author_keywords(text)[:count]
+    chosen = [_stems(k) for k in keywords]
+    body = lower
+    references = list(_REFERENCES_HEADING.finditer(lower))
+    if references:
+        body = lower[:references[-1].start()]
+    for phrase, _ in score_phrases(body, abstract):
+        if len(keywords) >= count:
+            break
+        # Skip phrases inside a chosen one ("neural" under "graph neural networks") and vice versa
+        words = _stems(phrase)
+        if any(words <= k or k <= words for k in chosen):
+            continue
+        keywords.append(phrase)
+        chosen.append(words)
+    return keywords
+
+
+def extract_metadata(text: str, lower: Optional[str] = None) -> Dict:
+    """Abstract and keyphrases as stored under "metadata" in the audit report"""
+    lower = text.lower() if lower is None else lower
+    abstract = detect_abstract(text)
+    return {
+        'abstract': abstract,
+        'keywords': extract_keywords(text, lower, abstract)
+    }
@@ -1,10 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
-from routers import auth, submissions, analytics, ai_features
+from database import engine, Base, add_missing_columns, add_missing_indexes, dispose_async_engine
+from routers import auth, submissions, analytics, ai_features, metrics as metrics_router
+import audit_executor
+import audit_worker
+import citation_verifier
+import metrics
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+add_missing_indexes(engine)
 
 app = FastAPI(title="ResearchSentinel API")
 
@@ -15,13 +21,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Submission list pagination
 )
 
+# Request count and latency per route, served on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Routers
 app.include_router(auth.router)
 app.include_router(submissions.router)
 app.include_router(analytics.router)
 app.include_router(ai_features.router)
+app.include_router(metrics_router.router)
+
+embedded_worker = None
+
+@app.on_event("startup")
+def start_embedded_audit_worker():
+    # Lets a single `uvicorn main:app` process run audits; set AUDIT_EMBEDDED_WORKERS=0
+    # when audits are handled by standalone `python audit_worker.py` processes
+    global embedded_worker
+    if audit_worker.AUDIT_EMBEDDED_WORKERS > 0:
+        embedded_worker = audit_worker.AuditWorker(concurrency=audit_worker.AUDIT_EMBEDDED_WORKERS)
+        embedded_worker.start()
+
+@app.on_event("shutdown")
+async def close_crossref_client():
+    await citation_verifier.close_shared_client()
+
+@app.on_event("shutdown")
+async def close_async_database():
+    await dispose_async_engine()
+
+@app.on_event("shutdown")
+def shutdown_audit_executor():
+    if embedded_worker is not None:
+        embedded_worker.stop(timeout=5)
+    audit_executor.shutdown_executor(wait=False)
 
 @app.get("/")
 def read_root():
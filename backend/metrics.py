@@ -0,0 +1,299 @@
+"""
+In-process metrics, exposed in the Prometheus text format.
+
+Counters, gauges and histograms are kept in plain dicts keyed by label
+values. Recording a sample takes one uncontended lock and a couple of dict
+updates, with no I/O, so it is cheap enough to leave on the hot path.
+
+Audits run in separate worker processes (audit_executor). Each worker drains
+what it recorded with drain() and sends it back with the audit result; the
+API or worker process that waits for the result merges it with merge(), so a
+single scrape of /metrics covers both.
+"""
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers fast API routes up to slow audits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, object] = {}
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests served. Label values are passed positionally."""
+    kind = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, values: Dict[LabelValues, float]) -> None:
+        with self._lock:
+            for labels, amount in values.items():
+                self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self.snapshot().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down, e.g. queue depth. Not shipped between processes."""
+    kind = 'gauge'
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def replace(self, values: Dict[LabelValues, float]) -> None:
+        """Set every series at once, dropping label sets that are no longer present"""
+        with self._lock:
+            self._values = dict(values)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (seconds by default) in cumulative buckets"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels: str) -> '_Timer':
+        """Context manager observing the wall time of its block"""
+        return _Timer(self, labels)
+
+    def snapshot(self) -> Dict[LabelValues, list]:
+        with self._lock:
+            return {labels: [list(counts), total, count] for labels, (counts, total, count) in self._values.items()}
+
+    def merge(self, values: Dict[LabelValues, list]) -> None:
+        with self._lock:
+            for labels, (counts, total, count) in values.items():
+                series = self._values.get(labels)
+                if series is None:
+                    series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                if len(counts) != len(series[0]):
+                    # Recorded with different buckets (e.g. mid-deploy); keep only the totals
+                    counts = [0] * len(self.buckets) + [count]
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        bounds = self.buckets + (float('inf'),)
+        for labels, (counts, total, count) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                bucket_labels = _labels(self.label_names + ('le',), labels + (_number(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: LabelValues):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def drain(self) -> Dict[str, Dict]:
+        """Counter and histogram samples recorded since the last drain, resetting them"""
+        drained = {}
+        for name, metric in self._metrics.items():
+            if isinstance(metric, Gauge):
+                continue
+            with metric._lock:
+                values, metric._values = metric._values, {}
+            if values:
+                drained[name] = values
+        return drained
+
+    def merge(self, drained: Optional[Dict[str, Dict]]) -> None:
+        """Add samples drained in another process"""
+        for name, values in (drained or {}).items():
+            metric = self._metrics.get(name)
+            if metric is not None and not isinstance(metric, Gauge):
+                metric.merge(values)
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help_text, labels))
+
+
+def gauge(name: str, help_text: str, labels: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help_text, labels))
+
+
+def histogram(name: str, help_text: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help_text, labels, buckets))
+
+
+render = REGISTRY.render
+drain = REGISTRY.drain
+merge = REGISTRY.merge
+
+
+# Every metric the application records. Declared here so all processes share one catalogue.
+HTTP_REQUESTS = counter('http_requests_total', 'HTTP requests by route and status', ['method', 'route', 'status'])
+HTTP_REQUEST_DURATION = histogram('http_request_duration_seconds', 'HTTP request latency by route', ['method', 'route'])
+
+AUDITS = counter('audits_total', 'Audit jobs finished by outcome', ['outcome'])
+AUDIT_DURATION = histogram('audit_duration_seconds', 'Time from handing an audit to the executor to its result')
+AUDIT_QUEUE_WAIT = histogram('audit_queue_wait_seconds', 'Time audit jobs waited in the queue before being claimed')
+AUDIT_STAGE_DURATION = histogram('audit_stage_duration_seconds', 'Wall time of each audit stage', ['stage'])
+AUDIT_STAGES_REUSED = counter('audit_stages_reused_total', 'Stages whose output was reused from a parent revision', ['stage'])
+AUDIT_JOBS = gauge('audit_jobs', 'Audit jobs in the queue by status', ['status'])
+
+CROSSREF_REQUESTS = counter('crossref_requests_total', 'Crossref API requests by kind and HTTP status ("error" for transport failures)',
+                            ['kind', 'status'])
+CROSSREF_REQUEST_DURATION = histogram('crossref_request_duration_seconds', 'Crossref API request latency', ['kind'])
+CROSSREF_HARVESTED = counter('crossref_index_harvested_total', 'Works from live Crossref responses added to the local index')
+RECOMMENDATIONS = counter('recommendations_total', 'Recommendation searches by where the results came from', ['source'])
+CITATION_CACHE_LOOKUPS = counter('citation_cache_lookups_total', 'Citation cache lookups by result', ['result'])
+AUDIT_CACHE_LOOKUPS = counter('audit_cache_lookups_total', 'Audit result cache lookups by result', ['result'])
+RECOMMENDATION_CACHE_LOOKUPS = counter('recommendation_cache_lookups_total', 'Recommendation cache lookups by result',
+                                       ['result'])
+
+EMAILS = counter('emails_total', 'Emails by template and outcome', ['template', 'outcome'])
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count and latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = ['500']
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = str(message['status'])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; raw paths would explode the label set
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            HTTP_REQUESTS.inc(scope['method'], route, status[0])
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, scope['method'], route)
+
+
+def serve(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Serve /metrics from a background thread, for processes without an API (standalone audit workers)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
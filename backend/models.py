@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Float, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Float, Enum, LargeBinary, Index
+from sqlalchemy.orm import relationship, deferred
 from database import Base
 import datetime
 import enum
@@ -15,6 +15,12 @@ class SubmissionStatus(str, enum.Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    DEAD = "dead" # Out of retries
+
 class User(Base):
     __tablename__ = "users"
 
@@ -43,15 +49,34 @@ class Submission(Base):
     status = Column(String, default=SubmissionStatus.PENDING)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    parent_id = Column(Integer, ForeignKey("submissions.id"), nullable=True, index=True) # Earlier revision of the same paper
+    batch_id = Column(Integer, ForeignKey("submission_batches.id"), nullable=True, index=True) # Cohort upload it arrived in
 
     owner = relationship("User", back_populates="submissions")
     report = relationship("AuditReport", back_populates="submission", uselist=False)
 
+    # Listings page by (created_at, id), optionally filtered on one of these columns first
+    __table_args__ = (
+        Index("ix_submissions_created_id", "created_at", "id"),
+        Index("ix_submissions_owner_created_id", "owner_id", "created_at", "id"),
+        Index("ix_submissions_status_created_id", "status", "created_at", "id"),
+        Index("ix_submissions_domain_created_id", "domain", "created_at", "id"),
+    )
+
+class SubmissionBatch(Base):
+    __tablename__ = "submission_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    name = Column(String, nullable=True)
+    total = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
 class AuditReport(Base):
     __tablename__ = "audit_reports"
 
     id = Column(Integer, primary_key=True, index=True)
-    submission_id = Column(Integer, ForeignKey("submissions.id"))
+    submission_id = Column(Integer, ForeignKey("submissions.id"), index=True)
     
     integrity_score = Column(Float)
     citation_score = Column(Float)
@@ -64,3 +89,56 @@ class AuditReport(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     submission = relationship("Submission", back_populates="report")
+
+class AuditCacheEntry(Base):
+    __tablename__ = "audit_cache"
+
+    cache_key = Column(String, primary_key=True) # sha256 of engine version + upload hashes
+    engine_version = Column(String, index=True)
+    results_json = Column(Text) # Serialized analyze_paper() output
+    size_bytes = Column(Integer, default=0)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+class AuditJob(Base):
+    __tablename__ = "audit_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    submission_id = Column(Integer, ForeignKey("submissions.id"), index=True)
+    file_path = Column(String)
+    github_url = Column(String, nullable=True)
+    dataset_path = Column(String, nullable=True)
+    cache_key = Column(String, nullable=True)
+
+    status = Column(String, default=JobStatus.QUEUED, index=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    available_at = Column(DateTime, default=datetime.datetime.utcnow, index=True) # Not claimable before this (backoff)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ExtractedText(Base):
+    __tablename__ = "extracted_texts"
+
+    content_hash = Column(String, primary_key=True) # sha256 of the UTF-8 text
+    codec = Column(String, default="zlib")
+    data = deferred(Column(LargeBinary)) # Compressed text, only loaded when accessed
+    raw_bytes = Column(Integer, default=0)
+    stored_bytes = Column(Integer, default=0)
+    page_offsets = Column(Text) # JSON list of page start offsets
+    failed_pages = Column(Text, nullable=True) # JSON list of 1-based page numbers
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    corrections = deferred(Column(LargeBinary, nullable=True)) # Packed correction_index offsets
+    correction_counts = Column(Text, nullable=True) # JSON {type: count}
+    corrections_version = Column(String, nullable=True)
+
+class SubmissionText(Base):
+    __tablename__ = "submission_texts"
+
+    submission_id = Column(Integer, ForeignKey("submissions.id"), primary_key=True)
+    content_hash = Column(String, ForeignKey("extracted_texts.content_hash"), index=True)
@@ -0,0 +1,142 @@
+"""
+Page-wise PDF text extraction.
+
+Pages are extracted individually in a process pool, so a page that stalls the
+parser can be abandoned after PDF_PAGE_TIMEOUT, and joined once at the end.
+Long documents fan out across several processes, short ones use one. The
+result keeps per-page text and the character offset where each page starts,
+so later stages can map a position in the text back to a page number.
+"""
+import bisect
+import multiprocessing
+import os
+import queue
+from typing import Dict, List, Optional
+
+import PyPDF2
+
+
+def default_workers(audit_workers: int) -> int:
+    """Extraction processes per audit when audit_workers audits run side by side"""
+    return max(1, (os.cpu_count() or 1) // max(1, audit_workers))
+
+
+# Every audit worker process runs its own extraction pool, so they split the CPUs
+# (AuditExecutor sets this from its actual worker count unless PDF_EXTRACT_WORKERS is given)
+PDF_EXTRACT_WORKERS = int(
+    os.getenv('PDF_EXTRACT_WORKERS') or default_workers(int(os.getenv('AUDIT_WORKERS', '2')))
+)
+# Seconds without a finished page before the rest are skipped (0 extracts in-process, without a timeout)
+PDF_PAGE_TIMEOUT = float(os.getenv('PDF_PAGE_TIMEOUT', '20'))
+# Below this many pages more than one extraction process costs more than it saves
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '16'))
+
+PAGE_SEPARATOR = "\n"
+
+
+class ExtractedDocument:
+    """Full text plus per-page text and start offsets"""
+
+    def __init__(self, pages: List[str], failed_pages: Optional[List[int]] = None):
+        self.pages = pages
+        self.failed_pages = failed_pages or []
+        self.page_offsets: List[int] = []
+        offset = 0
+        for page in pages:
+            self.page_offsets.append(offset)
+            offset += len(page) + len(PAGE_SEPARATOR)
+        self.text = PAGE_SEPARATOR.join(pages) + (PAGE_SEPARATOR if pages else "")
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def page_for_offset(self, offset: int) -> int:
+        """1-based page number containing a character offset"""
+        return max(1, bisect.bisect_right(self.page_offsets, offset))
+
+    def to_dict(self) -> Dict:
+        return {
+            'page_count': self.page_count,
+            'page_offsets': self.page_offsets,
+            'failed_pages': self.failed_pages
+        }
+
+
+# Per-worker reader, opened once by the pool initializer
+_reader: Optional[PyPDF2.PdfReader] = None
+
+
+def _init_worker(file_path: str):
+    global _reader
+    _reader = PyPDF2.PdfReader(file_path)
+
+
+def _extract_page(index: int):
+    try:
+        return index, _reader.pages[index].extract_text() or "", None
+    except Exception as e:
+        return index, "", str(e)
+
+
+def _extract_serial(reader: PyPDF2.PdfReader) -> ExtractedDocument:
+    pages = []
+    failed = []
+    for i, page in enumerate(reader.pages):
+        try:
+            pages.append(page.extract_text() or "")
+        except Exception as e:
+            print(f"Error extracting PDF page {i + 1}: {e}")
+            pages.append("")
+            failed.append(i + 1)
+    return ExtractedDocument(pages, failed)
+
+
+def _extract_parallel(file_path: str, page_count: int, workers: int, page_timeout: float) -> ExtractedDocument:
+    pages = [""] * page_count
+    failed = []
+    done: "queue.Queue" = queue.Queue()
+    pool = multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=(file_path,))
+    stalled = False
+    try:
+        for i in range(page_count):
+            pool.apply_async(_extract_page, (i,), callback=done.put,
+                             error_callback=lambda e, i=i: done.put((i, "", str(e))))
+        pending = set(range(page_count))
+        while pending:
+            try:
+                index, text, error = done.get(timeout=page_timeout)
+            except queue.Empty:
+                # No page finished within the timeout: give up on whatever is left
+                print(f"PDF extraction stalled; skipping pages {sorted(p + 1 for p in pending)}")
+                failed.extend(p + 1 for p in pending)
+                stalled = True
+                break
+            pending.discard(index)
+            pages[index] = text
+            if error:
+                print(f"Error extracting PDF page {index + 1}: {error}")
+                failed.append(index + 1)
+    finally:
+        if stalled:
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+    return ExtractedDocument(pages, sorted(failed))
+
+
+def extract_pdf(file_path: str, workers: Optional[int] = None, page_timeout: Optional[float] = None) -> ExtractedDocument:
+    """Extract a PDF page by page with a stall timeout, in parallel for long documents"""
+    workers = workers if workers is not None else PDF_EXTRACT_WORKERS
+    page_timeout = page_timeout if page_timeout is not None else PDF_PAGE_TIMEOUT
+
+    reader = PyPDF2.PdfReader(file_path)
+    page_count = len(reader.pages)
+    if page_timeout <= 0 or page_count == 0:
+        return _extract_serial(reader)
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        # A page stuck in the parser cannot be interrupted in this process,
+        # so even short documents use a worker
+        workers = 1
+    return _extract_parallel(file_path, page_count, max(1, min(workers, page_count)), page_timeout)
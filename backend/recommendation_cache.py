@@ -0,0 +1,109 @@
+"""
+In-memory cache for reference recommendations, with stale-while-revalidate.
+
+Entries are keyed by the normalized set of search terms. A fresh entry is
+returned as is. A stale entry is returned at once while a single background
+task refreshes it. Only a miss, or an entry past its stale window, waits for
+the loader, and concurrent misses for the same key share one load. A load
+that fails (returns None) is not cached, so a stale entry keeps being served
+until Crossref answers again.
+
+All methods run on the API's event loop, so no locking is needed.
+"""
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, Iterable, Optional, Set, TypeVar
+
+import metrics
+
+RECOMMENDATION_FRESH_SECONDS = int(os.getenv('RECOMMENDATION_FRESH_SECONDS', '3600'))
+RECOMMENDATION_STALE_SECONDS = int(os.getenv('RECOMMENDATION_STALE_SECONDS', str(7 * 86400)))
+RECOMMENDATION_CACHE_ENTRIES = int(os.getenv('RECOMMENDATION_CACHE_ENTRIES', '2000'))
+
+V = TypeVar('V')
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize_terms(terms: Iterable[str]) -> str:
+    """Cache key for a set of search terms: case, spacing, order and duplicates do not matter"""
+    words = {' '.join(_WORD.findall(term.lower())) for term in terms if term}
+    return '|'.join(sorted(w for w in words if w))
+
+
+class RecommendationCache(Generic[V]):
+    def __init__(self, fresh_seconds: float = RECOMMENDATION_FRESH_SECONDS,
+                 stale_seconds: float = RECOMMENDATION_STALE_SECONDS,
+                 max_entries: int = RECOMMENDATION_CACHE_ENTRIES):
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()  # key -> (value, stored_at)
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+
+    def _store(self, key: str, value: V):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Optional[V]]]) -> Optional[V]:
+        try:
+            value = await loader()
+        except Exception as e:
+            print(f"Recommendation refresh failed for {key!r}: {e}")
+            value = None
+        finally:
+            self._loading.pop(key, None)
+        if value is not None:
+            self._store(key, value)
+        return value
+
+    def _start_load(self, key: str, loader: Callable[[], Awaitable[Optional[V]]]) -> asyncio.Task:
+        task = self._loading.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = self._loading[key] = asyncio.get_running_loop().create_task(self._load(key, loader))
+        return task
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Optional[V]]]) -> Optional[V]:
+        """Cached value for key, loading or refreshing it with loader() as needed. None if nothing could be loaded."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.fresh_seconds:
+                self._entries.move_to_end(key)
+                metrics.RECOMMENDATION_CACHE_LOOKUPS.inc('fresh')
+                return value
+            if age < self.fresh_seconds + self.stale_seconds:
+                metrics.RECOMMENDATION_CACHE_LOOKUPS.inc('stale')
+                task = self._start_load(key, loader)
+                # Keep a reference so the refresh is not garbage collected mid-flight
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+                return value
+
+        metrics.RECOMMENDATION_CACHE_LOOKUPS.inc('miss')
+        # Shielded: a client disconnecting does not cancel a load other requests may be waiting on
+        value = await asyncio.shield(self._start_load(key, loader))
+        if value is None and entry is not None:
+            return entry[0]
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+
+_default_cache: Optional[RecommendationCache] = None
+
+
+def get_cache() -> RecommendationCache:
+    """Process-wide cache instance"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RecommendationCache()
+    return _default_cache
@@ -0,0 +1,143 @@
+"""
+Reference section locator and entry parser.
+
+Works line by line in a single pass and only applies anchored, bounded
+patterns to individual lines or entries, so runtime is linear in the size of
+the document (no pattern can backtrack across the whole text). Handles
+numbered ("[1] ...", "1. ..."), author-year ("Smith, J. (2020). ...") and
+DOI-bearing entries, including entries broken across PDF lines.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from citation_verifier import extract_doi
+
+MAX_LINE_CHARS = 2000
+MAX_ENTRY_CHARS = 1000
+
+_HEADING = re.compile(
+    r'^(?:[0-9ivxIVX]{1,4}[.)]?\s+)?(references|bibliography|works cited|literature cited|reference list|cited literature)\s*:?$',
+    re.IGNORECASE
+)
+# Headings that end a reference section
+_END_HEADING = re.compile(
+    r'^(?:[0-9A-Za-z]{1,4}[.)]?\s+)?(appendix|appendices|supplementary|acknowledg|about the author|biograph)',
+    re.IGNORECASE
+)
+_NUMBERED = re.compile(r'^(?:\[(\d{1,3})\]|(\d{1,3})[.)])\s+(?=\S)')
+# "Surname, A." / "Surname A." / "van der Berg, A." / "Surname, Firstname"
+_AUTHOR_START = re.compile(r"^(?:[a-z]{1,4} ){0,2}[A-Z][\w'’\-]{1,40},?(?: [A-Z][\w'’\-]{1,40})?,? [A-Z][.\w]")
+_YEAR = re.compile(r'\b(1[89]\d\d|20\d\d)[a-z]?\b')
+_PAREN_YEAR = re.compile(r'\((1[89]\d\d|20\d\d)[a-z]?\)\.?\s*')
+_INITIAL_END = re.compile(r'\b[A-Z]$')
+_QUOTED = re.compile(r'["“]([^"”]{10,300})["”]')
+
+
+def find_reference_section(text: str) -> Optional[Tuple[int, int]]:
+    """(start, end) character offsets of the last reference section, or None"""
+    start = end = None
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        if len(stripped) <= 40:
+            if _HEADING.match(stripped):
+                # Keep the last heading; earlier hits are usually a table of contents
+                start, end = offset + len(line), None
+            elif start is not None and end is None and _END_HEADING.match(stripped):
+                end = offset
+        offset += len(line)
+    if start is None:
+        return None
+    return start, end if end is not None else len(text)
+
+
+def _join(entry: str, line: str) -> str:
+    if not entry:
+        return line
+    if entry.endswith('-') and ('10.' in entry[-60:] or 'http' in entry[-60:]):
+        # DOI or URL broken across lines
+        return entry + line
+    if entry.endswith('-') and line[:1].islower():
+        # Hyphenated word
+        return entry[:-1] + line
+    return entry + ' ' + line
+
+
+def split_entries(section: str) -> List[str]:
+    """Split a reference section into entries"""
+    lines = [line.strip()[:MAX_LINE_CHARS] for line in section.splitlines()]
+    numbered = sum(1 for line in lines if _NUMBERED.match(line))
+    use_numbers = numbered >= 2
+
+    entries: List[str] = []
+    current = ''
+    for line in lines:
+        if not line:
+            if current and not use_numbers:
+                entries.append(current)
+                current = ''
+            continue
+        if use_numbers:
+            starts = bool(_NUMBERED.match(line))
+        else:
+            # Author-year: a new author list after an entry that already has its year
+            starts = bool(_AUTHOR_START.match(line)) and (not current or bool(_YEAR.search(current)))
+        if starts and current:
+            entries.append(current)
+            current = ''
+        current = _join(current, line)
+    if current:
+        entries.append(current)
+    return [e[:MAX_ENTRY_CHARS] for e in entries if len(e) >= 15]
+
+
+def _title(entry: str, body: str) -> Optional[str]:
+    quoted = _QUOTED.search(entry)
+    if quoted:
+        return quoted.group(1).strip(' ,.')
+    paren = _PAREN_YEAR.search(body)
+    if paren:
+        # Author (2020). Title. Venue
+        rest = body[paren.end():]
+        return rest.split('. ', 1)[0].strip(' ,.') or None
+    # Authors. Title. Venue, year
+    parts = [p.strip() for p in body.split('. ') if p.strip()]
+    candidates = [
+        p for p in parts[1:]
+        if len(p.split()) >= 2
+        and not _INITIAL_END.search(p)  # Still in the author list ("Smith, A")
+        and not _YEAR.fullmatch(p)
+        and not p.lower().startswith(('in ', 'doi', 'http', 'vol'))
+    ]
+    if candidates:
+        return candidates[0].strip(' ,.')
+    return None
+
+
+def parse_entry(entry: str) -> Dict:
+    """Split one reference into text, doi, title and year"""
+    numbered = _NUMBERED.match(entry)
+    body = entry[numbered.end():] if numbered else entry
+    year = _YEAR.search(body)
+    title = _title(entry, body)
+    return {
+        'text': body.strip(),
+        'number': int(numbered.group(1) or numbered.group(2)) if numbered else None,
+        'doi': extract_doi(body),
+        'title': title[:300] if title else None,
+        'year': int(year.group(1)) if year else None
+    }
+
+
+def parse_references(text: str, limit: Optional[int] = None) -> List[Dict]:
+    """Parsed entries of the reference section; falls back to numbered lines anywhere in the text"""
+    bounds = find_reference_section(text)
+    if bounds is not None:
+        entries = split_entries(text[bounds[0]:bounds[1]])
+    else:
+        entries = split_entries('\n'.join(
+            line for line in text.splitlines() if _NUMBERED.match(line.strip()) and line.lstrip().startswith('[')
+        ))
+    if limit:
+        entries = entries[:limit]
+    return [parse_entry(e) for e in entries]
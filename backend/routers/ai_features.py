@@ -1,46 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import json
 import re
-from database import get_db
+from collections import OrderedDict
+from database import get_async_db, get_db
 from auth import get_current_user
 from models import User, Submission
+from pdf_extraction import ExtractedDocument
+import citation_verifier
+import crossref_index
+import metrics
+import recommendation_cache
+import text_store
+from correction_index import CORRECTION_TYPES
 
 router = APIRouter(prefix="/api/ai", tags=["AI Features"])
 
 
-def analyze_text_for_corrections(text: str, issues: List[Dict]) -> List[Dict[str, Any]]:
-    """
-    Analyze research paper text and provide specific correction suggestions
-    """
+def load_audit_report(submission: Submission) -> Dict[str, Any]:
+    """The submission's detailed audit report JSON, or {} before the audit has finished"""
+    if submission.report is None or not submission.report.json_content:
+        return {}
+    return json.loads(submission.report.json_content)
+
+
+def report_issues(report: Dict[str, Any]) -> List[Dict]:
+    """Citation and methodology issues from an audit report, tagged with their category"""
+    issues = []
+    for issue in report.get("citations", {}).get("issues", []):
+        issues.append(dict(issue, category="citation", description=issue.get("issue", "")))
+    for issue in report.get("methodology", {}).get("issues", []):
+        issues.append(dict(issue, category="methodology"))
+    return issues
+
+
+# Corrections derived from audit issues rather than the text; listed before the text ones
+ISSUE_CORRECTION_TYPES = ("citation_error", "methodology_issue")
+MAX_CORRECTIONS_PAGE = 500
+
+
+def issue_corrections(issues: List[Dict]) -> List[Dict[str, Any]]:
+    """Corrections for the citation and methodology issues found by the audit"""
     corrections = []
-    
-    # Check for common writing issues
-    common_issues = {
-        "passive_voice": r"\b(is|are|was|were|been|being)\s+\w+ed\b",
-        "weak_verbs": r"\b(is|are|was|were|seems|appears)\b",
-        "redundancy": r"\b(very unique|completely finished|absolutely essential|past history)\b",
-        "informal_language": r"\b(a lot of|kind of|sort of|basically|actually)\b",
-    }
-    
-    for issue_type, pattern in common_issues.items():
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        for match in matches:
-            start_pos = max(0, match.start() - 50)
-            end_pos = min(len(text), match.end() + 50)
-            context = text[start_pos:end_pos]
-            
-            corrections.append({
-                "type": issue_type,
-                "severity": "medium",
-                "location": f"Position {match.start()}-{match.end()}",
-                "context": context.strip(),
-                "issue": match.group(),
-                "suggestion": get_suggestion_for_issue(issue_type, match.group()),
-                "explanation": get_explanation_for_issue(issue_type)
-            })
-    
-    # Add corrections based on audit issues
     for issue in issues:
         if "citation" in issue.get("category", "").lower():
             corrections.append({
@@ -60,10 +64,43 @@ def analyze_text_for_corrections(text: str, issues: List[Dict]) -> List[Dict[str
                 "suggestion": "Provide more detailed description of your research methods, including sample size, data collection procedures, and analysis techniques.",
                 "explanation": "Clear methodology allows other researchers to replicate your study and validates your findings."
             })
-    
     return corrections
 
 
+def text_correction(issue_type: str, start: int, end: int, document: ExtractedDocument) -> Dict[str, Any]:
+    """Correction for one writing-issue match at text[start:end]"""
+    text = document.text
+    matched = text[start:end]
+    location = f"Position {start}-{end}"
+    if document.page_count > 1:
+        location = f"Page {document.page_for_offset(start)}, {location.lower()}"
+    return {
+        "type": issue_type,
+        "severity": "medium",
+        "location": location,
+        "start": start,
+        "end": end,
+        "context": text[max(0, start - 50):min(len(text), end + 50)].strip(),
+        "issue": matched,
+        "suggestion": get_suggestion_for_issue(issue_type, matched),
+        "explanation": get_explanation_for_issue(issue_type)
+    }
+
+
+def parse_correction_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """
+    (start, rank) of the last correction already served. Issue corrections come first
+    as (-1, number served); text corrections are (offset, type rank).
+    """
+    if not cursor:
+        return -1, 0
+    try:
+        start, rank = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return start, rank
+
+
 def get_suggestion_for_issue(issue_type: str, text: str) -> str:
     """Get specific suggestion for each issue type"""
     suggestions = {
@@ -86,67 +123,138 @@ def get_explanation_for_issue(issue_type: str) -> str:
     return explanations.get(issue_type, "This improves the quality of your research paper")
 
 
-def recommend_similar_papers(title: str, abstract: str, keywords: List[str]) -> List[Dict[str, Any]]:
-    """
-    Recommend similar research papers that could be used as references
-    Uses Crossref API to find related papers
-    """
-    import requests
+# Submission id -> (title, abstract, keywords) for completed audits, so repeat views skip parsing the report
+_recommendation_inputs: "OrderedDict[int, Tuple[str, str, List[str]]]" = OrderedDict()
+MAX_RECOMMENDATION_INPUTS = 5000
+RECOMMENDATION_COUNT = 5
+
+
+def recommendation_query(title: str, keywords: List[str]) -> List[str]:
+    """Search terms for a paper: its first three keywords, or the title when it has none"""
+    return keywords[:3] if keywords else [title[:100]]
+
+
+def parse_recommendation(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Crossref work item into a recommendation"""
+    paper_title = item.get("title", [""])[0] if item.get("title") else "Unknown Title"
+    authors = []
+    for author in item.get("author", [])[:3]:
+        given = author.get("given", "")
+        family = author.get("family", "")
+        if given and family:
+            authors.append(f"{given} {family}")
     
-    recommendations = []
+    year = item.get("published-print", {}).get("date-parts", [[None]])[0][0] or \
+           item.get("published-online", {}).get("date-parts", [[None]])[0][0] or \
+           "Unknown Year"
     
-    # Search using Crossref API
+    doi = item.get("DOI", "")
+    journal = item.get("container-title", [""])[0] if item.get("container-title") else "Unknown Journal"
+    
+    return {
+        "title": paper_title,
+        "authors": authors,
+        "year": year,
+        "journal": journal,
+        "doi": doi,
+        "url": f"https://doi.org/{doi}" if doi else None,
+        "relevance_score": 0.85,  # Placeholder - would use ML in production
+        "citation_format": f"{', '.join(authors)} ({year}). {paper_title}. {journal}. https://doi.org/{doi}" if doi else None,
+        "reason": "Highly relevant to your research topic and methodology"
+    }
+
+
+def local_recommendation(work: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a work from the local Crossref index (see CrossrefIndex.recommend) into a recommendation"""
+    authors = [a for a in (work["authors"] or "").split("; ") if a][:3]
+    year = work["year"] or "Unknown Year"
+    journal = work["venue"] or "Unknown Journal"
+    doi = work["doi"]
+    return {
+        "title": work["title"] or "Unknown Title",
+        "authors": authors,
+        "year": year,
+        "journal": journal,
+        "doi": doi,
+        "url": f"https://doi.org/{doi}",
+        "relevance_score": work["coverage"],
+        "citation_format": f"{', '.join(authors)} ({year}). {work['title']}. {journal}. https://doi.org/{doi}",
+        "reason": "Closely matches your paper's keywords among works already seen in Crossref"
+    }
+
+
+def log_harvest_failure(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Crossref harvest failed: {future.exception()!r}")
+
+
+async def search_crossref_recommendations(terms: List[str]) -> Optional[List[Dict[str, Any]]]:
+    """Top Crossref journal articles for the search terms, or None if Crossref could not be reached"""
     try:
-        # Search by keywords
-        search_query = " ".join(keywords[:3]) if keywords else title[:100]
-        
-        response = requests.get(
-            "https://api.crossref.org/works",
-            params={
-                "query": search_query,
+        response = await citation_verifier.get_works(
+            citation_verifier.shared_client(),
+            {
+                "query": " ".join(terms),
                 "rows": 10,
                 "sort": "relevance",
                 "filter": "type:journal-article"
             },
-            headers={"User-Agent": "ResearchSentinel/1.0 (mailto:support@researchsentinel.com)"},
-            timeout=10
+            "recommend"
         )
-        
-        if response.status_code == 200:
-            data = response.json()
-            items = data.get("message", {}).get("items", [])
-            
-            for item in items[:5]:
-                # Extract paper details
-                paper_title = item.get("title", [""])[0] if item.get("title") else "Unknown Title"
-                authors = []
-                for author in item.get("author", [])[:3]:
-                    given = author.get("given", "")
-                    family = author.get("family", "")
-                    if given and family:
-                        authors.append(f"{given} {family}")
-                
-                year = item.get("published-print", {}).get("date-parts", [[None]])[0][0] or \
-                       item.get("published-online", {}).get("date-parts", [[None]])[0][0] or \
-                       "Unknown Year"
-                
-                doi = item.get("DOI", "")
-                journal = item.get("container-title", [""])[0] if item.get("container-title") else "Unknown Journal"
-                
-                recommendations.append({
-                    "title": paper_title,
-                    "authors": authors,
-                    "year": year,
-                    "journal": journal,
-                    "doi": doi,
-                    "url": f"https://doi.org/{doi}" if doi else None,
-                    "relevance_score": 0.85,  # Placeholder - would use ML in production
-                    "citation_format": f"{', '.join(authors)} ({year}). {paper_title}. {journal}. https://doi.org/{doi}" if doi else None,
-                    "reason": "Highly relevant to your research topic and methodology"
-                })
-    
     except Exception as e:
         print(f"Error fetching recommendations: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"Error fetching recommendations: Crossref returned {response.status_code}")
+        return None
+    items = response.json().get("message", {}).get("items", [])
+    # Off the event loop and not awaited: the index write is not part of the response
+    harvest = asyncio.get_running_loop().run_in_executor(
+        None, crossref_index.harvest, items, crossref_index.SOURCE_SEARCH
+    )
+    harvest.add_done_callback(log_harvest_failure)
+    return [parse_recommendation(item) for item in items[:RECOMMENDATION_COUNT]]
+
+
+async def find_recommendations(terms: List[str]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Recommendations ranked with BM25 from the local Crossref index, topped up from a live
+    Crossref search only when too few local works match. None if neither had any.
+    """
+    index = crossref_index.get_index()
+    local = []
+    if index is not None:
+        try:
+            local = await asyncio.to_thread(index.recommend, " ".join(terms), RECOMMENDATION_COUNT)
+        except Exception as e:
+            print(f"Error searching local Crossref index: {e}")
+    recommendations = [local_recommendation(work) for work in local]
+    if len(recommendations) >= RECOMMENDATION_COUNT:
+        metrics.RECOMMENDATIONS.inc("local")
+        return recommendations
+
+    remote = await search_crossref_recommendations(terms)
+    if remote is None:
+        metrics.RECOMMENDATIONS.inc("local" if recommendations else "unavailable")
+        return recommendations or None
+    metrics.RECOMMENDATIONS.inc("mixed" if recommendations else "crossref")
+    seen = {r["doi"].lower() for r in recommendations}
+    recommendations.extend(r for r in remote if (r["doi"] or "").lower() not in seen)
+    return recommendations[:RECOMMENDATION_COUNT] or None
+
+
+async def recommend_similar_papers(title: str, abstract: str, keywords: List[str]) -> List[Dict[str, Any]]:
+    """
+    Recommend similar research papers that could be used as references.
+    Ranks works from the local Crossref index and searches Crossref only when local recall is too low
+    (see find_recommendations); results are cached by normalized search terms and refreshed in the
+    background once stale (see recommendation_cache).
+    """
+    terms = recommendation_query(title, keywords)
+    recommendations = await recommendation_cache.get_cache().get(
+        recommendation_cache.normalize_terms(terms),
+        lambda: find_recommendations(terms)
+    )
     
     # Add some general recommendations if API fails
     if not recommendations:
@@ -164,14 +272,33 @@ def recommend_similar_papers(title: str, abstract: str, keywords: List[str]) ->
     return recommendations
 
 
+def recommendation_inputs(submission: Submission) -> Tuple[str, str, List[str]]:
+    """Title, abstract and keywords of a submission, remembered once its audit has finished"""
+    remembered = _recommendation_inputs.get(submission.id)
+    if remembered is not None:
+        return remembered
+    audit_result = load_audit_report(submission)
+    metadata = audit_result.get("metadata", {})
+    inputs = (submission.title or "Research Paper", metadata.get("abstract", ""), metadata.get("keywords", []))
+    if audit_result:
+        _recommendation_inputs[submission.id] = inputs
+        while len(_recommendation_inputs) > MAX_RECOMMENDATION_INPUTS:
+            _recommendation_inputs.popitem(last=False)
+    return inputs
+
+
 @router.get("/suggest-corrections/{submission_id}")
-async def suggest_corrections(
+def suggest_corrections(
     submission_id: int,
+    types: Optional[str] = Query(None, description="Comma-separated correction types to include"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=MAX_CORRECTIONS_PAGE),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get AI-powered correction suggestions for a submission
+    Get AI-powered correction suggestions for a submission, one page at a time.
+    Writing issues are indexed when the paper is audited, so pages are served without rescanning the text.
     """
     submission = db.query(Submission).filter(Submission.id == submission_id).first()
     
@@ -179,25 +306,54 @@ async def suggest_corrections(
         raise HTTPException(status_code=404, detail="Submission not found")
     
     # Check permissions
-    if submission.user_id != current_user.id and current_user.role not in ["faculty", "admin"]:
+    if submission.owner_id != current_user.id and current_user.role not in ["faculty", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized to view this submission")
     
-    # Extract text and issues from submission
-    extracted_text = submission.extracted_text or ""
-    audit_result = submission.audit_result or {}
-    issues = audit_result.get("issues", [])
+    all_types = ISSUE_CORRECTION_TYPES + CORRECTION_TYPES
+    selected = [t.strip() for t in types.split(",") if t.strip()] if types else list(all_types)
+    unknown = sorted(set(selected) - set(all_types))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown correction types {unknown}; expected any of {list(all_types)}")
+    after_start, after_rank = parse_correction_cursor(cursor)
+    
+    # Text and its correction index were saved at audit time; only this endpoint loads them
+    loaded = text_store.load_corrections(db, submission_id)
+    from_issues = issue_corrections(report_issues(load_audit_report(submission)))
+    
+    counts = {t: 0 for t in all_types}
+    for correction in from_issues:
+        counts[correction["type"]] += 1
+    if loaded is not None:
+        counts.update(loaded[0].counts())
+    issues = [c for c in from_issues if c["type"] in selected]
     
-    # Generate corrections
-    corrections = analyze_text_for_corrections(extracted_text, issues)
+    page = []
+    if after_start < 0:
+        page = issues[after_rank:after_rank + limit]
+        last = (-1, after_rank + len(page))
+    else:
+        last = (after_start, after_rank)
+    text_types = [t for t in CORRECTION_TYPES if t in selected]
+    if loaded is not None and len(page) < limit and text_types:
+        index, document = loaded
+        spans = index.page(text_types, None if last[0] < 0 else last, limit - len(page))
+        page.extend(text_correction(kind, start, end, document) for start, end, kind in spans)
+        if spans:
+            last = (spans[-1][0], CORRECTION_TYPES.index(spans[-1][2]))
+    
+    total = sum(counts[t] for t in selected)
+    next_cursor = f"{last[0]}:{last[1]}" if len(page) == limit else None
     
     return {
         "submission_id": submission_id,
-        "total_corrections": len(corrections),
-        "corrections": corrections,
+        "total_corrections": total,
+        "counts": counts,
+        "corrections": page,
+        "next_cursor": next_cursor,
         "summary": {
-            "high_priority": len([c for c in corrections if c.get("severity") == "high"]),
-            "medium_priority": len([c for c in corrections if c.get("severity") == "medium"]),
-            "low_priority": len([c for c in corrections if c.get("severity") == "low"]),
+            "high_priority": sum(counts[t] for t in ISSUE_CORRECTION_TYPES if t in selected),
+            "medium_priority": sum(counts[t] for t in CORRECTION_TYPES if t in selected),
+            "low_priority": 0,
         }
     }
 
@@ -206,28 +362,25 @@ async def suggest_corrections(
 async def recommend_references(
     submission_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get AI-powered reference recommendations for a submission
     """
-    submission = db.query(Submission).filter(Submission.id == submission_id).first()
+    submission = await db.get(Submission, submission_id, options=[selectinload(Submission.report)])
     
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
     
     # Check permissions
-    if submission.user_id != current_user.id and current_user.role not in ["faculty", "admin"]:
+    if submission.owner_id != current_user.id and current_user.role not in ["faculty", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized to view this submission")
     
     # Extract metadata
-    audit_result = submission.audit_result or {}
-    title = submission.title or "Research Paper"
-    abstract = audit_result.get("metadata", {}).get("abstract", "")
-    keywords = audit_result.get("metadata", {}).get("keywords", [])
+    title, abstract, keywords = recommendation_inputs(submission)
     
-    # Get recommendations
-    recommendations = recommend_similar_papers(title, abstract, keywords)
+    # Get recommendations (from memory when these keywords were searched recently)
+    recommendations = await recommend_similar_papers(title, abstract, keywords)
     
     return {
         "submission_id": submission_id,
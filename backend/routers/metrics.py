@@ -0,0 +1,26 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+
+import database
+import job_queue
+import metrics
+
+# When set, scrapers must send "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics(db: Session = Depends(database.get_db), authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    # The queue lives in the database, so its depth is read at scrape time rather than tracked
+    metrics.AUDIT_JOBS.replace({(status,): count for status, count in job_queue.status_counts(db).items()})
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
-import models, schemas, database, auth, audit_engine
-from email_service import send_audit_complete_email
-import shutil
+from typing import List, Optional, Tuple
+import datetime
+import models, schemas, database, auth, audit_cache, job_queue, batch_upload
+from audit_worker import finish_from_cache, notify_audit_complete
 import os
 import uuid
 
@@ -15,47 +18,10 @@ router = APIRouter(
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def process_audit_task(submission_id: int, file_path: str, dataset_path: str, db: Session):
-    # Re-create session for background task
-    # Note: In production, pass db session carefully or use a new one
-    try:
-        results = audit_engine.analyze_paper(file_path, dataset_path)
-        
-        report = models.AuditReport(
-            submission_id=submission_id,
-            integrity_score=results["integrity_score"],
-            citation_score=results["citation_score"],
-            methodology_score=results["methodology_score"],
-            reproducibility_score=results["reproducibility_score"],
-            novelty_score=results["novelty_score"],
-            ai_probability_score=results["ai_probability_score"],
-            json_content=results["json_content"]
-        )
-        
-        db.add(report)
-        
-        submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
-        submission.status = models.SubmissionStatus.COMPLETED
-        db.commit()
-        db.refresh(submission)
-        
-        # Send audit complete email
-        user = db.query(models.User).filter(models.User.id == submission.owner_id).first()
-        if user:
-            report_url = f"http://localhost:3000/report/{submission_id}"
-            send_audit_complete_email(
-                user_email=user.email,
-                user_name=user.full_name or "Researcher",
-                paper_title=submission.title,
-                integrity_score=int(results["integrity_score"]),
-                report_url=report_url
-            )
-        
-    except Exception as e:
-        print(f"Audit failed: {e}")
-        submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
-        submission.status = models.SubmissionStatus.FAILED
-        db.commit()
+def finish_cached_submission(submission_id: int, cached: dict, cache_key: str) -> Optional[dict]:
+    # Reruns the corpus comparisons, so it gets its own session off the event loop
+    with database.SessionLocal() as session:
+        return finish_from_cache(session, submission_id, cached, cache_key)
 
 @router.post("/", response_model=schemas.Submission)
 async def create_submission(
@@ -63,27 +29,34 @@ async def create_submission(
     domain: str = Form(...),
     degree_level: str = Form(...),
     github_url: Optional[str] = Form(None),
+    parent_id: Optional[int] = Form(None),
     file: UploadFile = File(...),
     dataset: Optional[UploadFile] = File(None),
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
-    # Save file
+    # A revision re-audits only what changed since its parent
+    if parent_id is not None:
+        parent = await db.get(models.Submission, parent_id)
+        if parent is None:
+            raise HTTPException(status_code=404, detail="Parent submission not found")
+        if parent.owner_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to revise this submission")
+
+    # Save file, hashing it on the way to disk (blocking file I/O, so off the event loop)
     file_ext = file.filename.split(".")[-1]
     file_name = f"{uuid.uuid4()}.{file_ext}"
     file_path = os.path.join(UPLOAD_DIR, file_name)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    paper_hash = await run_in_threadpool(audit_cache.save_upload, file.file, file_path)
         
     dataset_path = None
+    dataset_hash = None
     if dataset:
         ds_ext = dataset.filename.split(".")[-1]
         ds_name = f"{uuid.uuid4()}_data.{ds_ext}"
         dataset_path = os.path.join(UPLOAD_DIR, ds_name)
-        with open(dataset_path, "wb") as buffer:
-            shutil.copyfileobj(dataset.file, buffer)
+        dataset_hash = await run_in_threadpool(audit_cache.save_upload, dataset.file, dataset_path)
 
     new_submission = models.Submission(
         title=title,
@@ -93,25 +66,200 @@ async def create_submission(
         file_path=file_path,
         dataset_path=dataset_path,
         owner_id=current_user.id,
+        parent_id=parent_id,
         status=models.SubmissionStatus.PROCESSING # Set to processing immediately for this demo
     )
     
-    db.add(new_submission)
-    db.commit()
-    db.refresh(new_submission)
+    # Identical uploads reuse the cached report instead of re-running the audit
+    cache_key = audit_cache.make_cache_key(paper_hash, github_url, dataset_hash)
+
+    def store(session: Session):
+        cached = audit_cache.get_cached_result(session, cache_key)
+        session.add(new_submission)
+        if cached is None:
+            # Submission and its audit job are committed together
+            session.flush()
+            job_queue.enqueue(session, new_submission.id, file_path, github_url, dataset_path, cache_key, commit=False)
+        session.commit()
+        session.refresh(new_submission)
+        return cached
 
-    # Trigger background audit
-    background_tasks.add_task(process_audit_task, new_submission.id, file_path, dataset_path, db)
+    # The cache and queue helpers are sync; run_sync drives them over the async connection
+    cached = await db.run_sync(store)
+    if cached is not None:
+        print(f"Audit cache hit for submission {new_submission.id}")
+        results = await run_in_threadpool(finish_cached_submission, new_submission.id, cached, cache_key)
+        if results is not None:
+            background_tasks.add_task(notify_audit_complete, current_user.email, current_user.full_name, new_submission.id, new_submission.title, results["integrity_score"])
 
+    # Loaded here: the response needs the report and the async session cannot lazy-load later
+    await db.refresh(new_submission, attribute_names=["status", "report"])
     return new_submission
 
+@router.post("/batch", response_model=schemas.BatchCreated)
+def create_batch(
+    files: List[UploadFile] = File(...),
+    manifest: Optional[UploadFile] = File(None),
+    name: Optional[str] = Form(None),
+    domain: str = Form("General"),
+    degree_level: str = Form("Unknown"),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Submit a cohort at once: a zip archive and/or several PDF/DOCX files, with an optional
+    manifest.csv / manifest.json (filename, title, domain, degree_level, github_url, owner_email)
+    given as its own upload or inside the archive.
+    """
+    if current_user.role not in [models.UserRole.FACULTY, models.UserRole.ADMIN]:
+        raise HTTPException(status_code=403, detail="Only faculty can submit batches")
+
+    try:
+        manifest_upload = (manifest.filename, batch_upload.read_manifest(manifest.file, manifest.filename)) if manifest else None
+        papers, skipped = batch_upload.collect(
+            [(f.filename or "", f.file) for f in files], UPLOAD_DIR, manifest_upload
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not papers:
+        raise HTTPException(status_code=400, detail="No PDF or DOCX files in the upload")
+
+    # Papers can be filed under their students' accounts
+    emails = {p.meta["owner_email"].lower() for p in papers if p.meta.get("owner_email")}
+    owners = {}
+    if emails:
+        owners = {u.email.lower(): u.id for u in db.query(models.User).filter(func.lower(models.User.email).in_(emails))}
+        unknown = sorted(emails - set(owners))
+        if unknown:
+            for paper in papers:
+                os.remove(paper.file_path)
+            raise HTTPException(status_code=400, detail=f"Unknown owner_email: {', '.join(unknown)}")
+
+    # Cache lookups commit on their own, so they run before the batch transaction starts
+    cache_keys = [audit_cache.make_cache_key(p.content_hash, p.meta.get("github_url")) for p in papers]
+    cached = [audit_cache.get_cached_result(db, key) for key in cache_keys]
+
+    batch = models.SubmissionBatch(owner_id=current_user.id, name=name, total=len(papers))
+    db.add(batch)
+    db.flush()
+
+    submissions = []
+    for paper in papers:
+        submission = models.Submission(
+            title=paper.meta.get("title") or os.path.splitext(paper.name)[0],
+            domain=paper.meta.get("domain") or domain,
+            degree_level=paper.meta.get("degree_level") or degree_level,
+            github_url=paper.meta.get("github_url"),
+            file_path=paper.file_path,
+            owner_id=owners.get(paper.meta.get("owner_email", "").lower(), current_user.id),
+            batch_id=batch.id,
+            status=models.SubmissionStatus.PROCESSING
+        )
+        db.add(submission)
+        submissions.append(submission)
+    db.flush()
+
+    # Rows and jobs are committed together
+    for submission, key, result in zip(submissions, cache_keys, cached):
+        if result is None:
+            job_queue.enqueue(db, submission.id, submission.file_path, submission.github_url, None, key, commit=False)
+    db.commit()
+
+    # Cache hits still compare against the corpus, which includes papers earlier in this batch
+    finished = 0
+    for submission, key, result in zip(submissions, cache_keys, cached):
+        if result is not None and finish_from_cache(db, submission.id, result, key) is not None:
+            finished += 1
+
+    queued = len(papers) - finished
+    print(f"Batch {batch.id}: {len(papers)} papers, {queued} queued, {finished} from cache")
+    return {
+        "batch_id": batch.id,
+        "total": len(papers),
+        "queued": queued,
+        "cached": finished,
+        "submission_ids": [s.id for s in submissions],
+        "skipped": skipped
+    }
+
+@router.get("/batch/{batch_id}", response_model=schemas.BatchProgress)
+def read_batch_progress(batch_id: int, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+    batch = db.query(models.SubmissionBatch).filter(models.SubmissionBatch.id == batch_id).first()
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if batch.owner_id != current_user.id and current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized to view this batch")
+
+    # One aggregate query however large the batch is
+    counts = dict(
+        db.query(models.Submission.status, func.count(models.Submission.id))
+        .filter(models.Submission.batch_id == batch_id)
+        .group_by(models.Submission.status)
+        .all()
+    )
+    average_score = (
+        db.query(func.avg(models.AuditReport.integrity_score))
+        .join(models.Submission, models.Submission.id == models.AuditReport.submission_id)
+        .filter(models.Submission.batch_id == batch_id)
+        .scalar()
+    )
+    completed = counts.get(models.SubmissionStatus.COMPLETED.value, 0)
+    failed = counts.get(models.SubmissionStatus.FAILED.value, 0)
+    total = sum(counts.values())
+    return {
+        "batch_id": batch.id,
+        "name": batch.name,
+        "total": total,
+        "completed": completed,
+        "failed": failed,
+        "in_progress": total - completed - failed,
+        "percent_complete": round(100 * (completed + failed) / total, 1) if total else 100.0,
+        "average_integrity_score": round(average_score, 1) if average_score is not None else None,
+        "created_at": batch.created_at
+    }
+
+MAX_SUBMISSIONS_PAGE = 500
+
+def parse_submission_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """(created_at, id) of the last submission already served, from a "<ISO timestamp>:<id>" cursor"""
+    try:
+        created_at, submission_id = cursor.rsplit(":", 1)
+        return datetime.datetime.fromisoformat(created_at), int(submission_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/", response_model=List[schemas.Submission])
-def read_submissions(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db), current_user: models.User = Depends(auth.get_current_user)):
+def read_submissions(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: int = Query(100, ge=1, le=MAX_SUBMISSIONS_PAGE),
+    owner_id: Optional[int] = None,
+    status: Optional[str] = None,
+    domain: Optional[str] = None,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """
+    Newest submissions first. Pages are keyed on (created_at, id) rather than an offset, so
+    every page is one index range scan; pass the X-Next-Cursor response header as cursor
+    to get the next one (the header is absent on the last page).
+    """
+    query = db.query(models.Submission)
     if current_user.role == models.UserRole.STUDENT:
-        submissions = db.query(models.Submission).filter(models.Submission.owner_id == current_user.id).offset(skip).limit(limit).all()
-    else:
-        # Faculty/Admin sees all (simplified for now)
-        submissions = db.query(models.Submission).offset(skip).limit(limit).all()
+        owner_id = current_user.id
+    if owner_id is not None:
+        query = query.filter(models.Submission.owner_id == owner_id)
+    if status is not None:
+        query = query.filter(models.Submission.status == status)
+    if domain is not None:
+        query = query.filter(models.Submission.domain == domain)
+    if cursor:
+        query = query.filter(tuple_(models.Submission.created_at, models.Submission.id) < parse_submission_cursor(cursor))
+
+    submissions = query.order_by(models.Submission.created_at.desc(), models.Submission.id.desc()).limit(limit).all()
+    if len(submissions) == limit:
+        last = submissions[-1]
+        response.headers["X-Next-Cursor"] = f"{last.created_at.isoformat()}:{last.id}"
     return submissions
 
 @router.get("/{submission_id}", response_model=schemas.Submission)
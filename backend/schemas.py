@@ -51,7 +51,28 @@ class Submission(SubmissionBase):
     status: str
     created_at: datetime
     owner_id: int
+    parent_id: Optional[int] = None
+    batch_id: Optional[int] = None
     report: Optional[AuditReportBase] = None
 
     class Config:
         orm_mode = True
+
+class BatchCreated(BaseModel):
+    batch_id: int
+    total: int
+    queued: int
+    cached: int
+    submission_ids: List[int]
+    skipped: List[str] = []
+
+class BatchProgress(BaseModel):
+    batch_id: int
+    name: Optional[str] = None
+    total: int
+    completed: int
+    failed: int
+    in_progress: int
+    percent_complete: float
+    average_integrity_score: Optional[float] = None
+    created_at: datetime
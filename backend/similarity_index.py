@@ -0,0 +1,180 @@
+"""
+Local TF-IDF similarity index over completed submissions.
+
+Each document is stored as its top weighted terms in an inverted index
+(term -> postings) in a sidecar SQLite file, together with its vector norm.
+Corpus document frequencies count every distinct term of a document, not
+just the ones it keeps postings for. Inserts are incremental, the file
+survives restarts, and a top-k cosine query only touches the postings of the
+query's own terms.
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+SIMILARITY_INDEX_PATH = os.getenv('SIMILARITY_INDEX_PATH', './similarity_index.db')
+# Terms kept per document; the rest contribute little to cosine similarity
+MAX_TERMS_PER_DOC = int(os.getenv('SIMILARITY_MAX_TERMS', '200'))
+
+_TERM = re.compile(r'[a-z][a-z\-]{2,}')
+STOPWORDS = frozenset("""
+about above after again against all also although among and any are because been before being below between both
+but can could did does doing down during each either etc few for from further had has have having her here hers
+him his how however into its itself just may might more most much must not now off once only other our ours out
+over own same several she should since some such than that the their theirs them then there therefore these they
+this those through thus too under until upon very was were what when where whether which while who whom whose why
+will with within without would yet you your table figure fig section chapter page pages et al eg ie using used use
+""".split())
+
+
+def term_frequencies(text: str) -> Dict[str, int]:
+    """Raw term counts for lowercased text, without stopwords"""
+    return dict(Counter(t for t in _TERM.findall(text) if t not in STOPWORDS))
+
+
+class SimilarityIndex:
+    """Incremental inverted index with cosine top-k queries"""
+
+    def __init__(self, path: str = SIMILARITY_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " doc_id INTEGER PRIMARY KEY, title TEXT, year INTEGER, norm REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL, doc_id INTEGER NOT NULL, tfw REAL NOT NULL,"
+            " PRIMARY KEY (term, doc_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS ix_postings_doc ON postings (doc_id);"
+            "CREATE TABLE IF NOT EXISTS df (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;"
+        )
+        if 'terms' not in {row[1] for row in conn.execute("PRAGMA table_info(docs)")}:
+            # Distinct terms counted in df, so remove() can take them back out
+            conn.execute("ALTER TABLE docs ADD COLUMN terms BLOB")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def doc_count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def idf(self, terms: List[str]) -> Dict[str, float]:
+        """Smoothed inverse document frequency of each term over the indexed corpus"""
+        conn = self._conn()
+        n = self.doc_count()
+        df = {}
+        for i in range(0, len(terms), 500):
+            batch = terms[i:i + 500]
+            placeholders = ','.join('?' * len(batch))
+            df.update(conn.execute(f"SELECT term, df FROM df WHERE term IN ({placeholders})", batch).fetchall())
+        return {t: math.log((n + 1) / (df.get(t, 0) + 1)) + 1 for t in terms}
+
+    def vectorize(self, tf: Dict[str, int]) -> Dict[str, float]:
+        """Top MAX_TERMS_PER_DOC tf-idf weights for a term-count dict"""
+        idf = self.idf(list(tf))
+        weights = {t: (1 + math.log(c)) * idf[t] for t, c in tf.items() if c > 0}
+        top = sorted(weights.items(), key=lambda kv: kv[1], reverse=True)[:MAX_TERMS_PER_DOC]
+        return dict(top)
+
+    def add(self, doc_id: int, tf: Dict[str, int], title: str = '', year: Optional[int] = None) -> None:
+        """Insert or replace a document from all of its term counts"""
+        conn = self._conn()
+        self.remove(doc_id, commit=False)
+        vector = self.vectorize(tf)
+        if not vector:
+            conn.commit()
+            return
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        terms = sorted(t for t, c in tf.items() if c > 0)
+        conn.execute(
+            "INSERT INTO docs (doc_id, title, year, norm, terms) VALUES (?, ?, ?, ?, ?)",
+            (doc_id, title, year, norm, zlib.compress('\n'.join(terms).encode()))
+        )
+        conn.executemany(
+            "INSERT INTO postings (term, doc_id, tfw) VALUES (?, ?, ?)",
+            [(t, doc_id, 1 + math.log(tf[t])) for t in vector]
+        )
+        conn.executemany(
+            "INSERT INTO df (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+            [(t,) for t in terms]
+        )
+        conn.commit()
+
+    def remove(self, doc_id: int, commit: bool = True) -> None:
+        conn = self._conn()
+        row = conn.execute("SELECT terms FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is not None and row[0] is not None:
+            terms = zlib.decompress(row[0]).decode().split('\n')
+        else:
+            # Added before all terms were recorded: only its posting terms were counted
+            terms = [t for (t,) in conn.execute("SELECT term FROM postings WHERE doc_id = ?", (doc_id,))]
+        if terms:
+            conn.executemany("UPDATE df SET df = df - 1 WHERE term = ?", [(t,) for t in terms])
+        conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+        if commit:
+            conn.commit()
+
+    def query(self, tf: Dict[str, int], k: int = 5, exclude: Iterable[int] = ()) -> List[Dict]:
+        """Top-k stored documents by cosine similarity to a term-count dict, skipping the excluded ids"""
+        query = self.vectorize(tf)
+        if not query:
+            return []
+        idf = self.idf(list(query))
+        q_norm = math.sqrt(sum(w * w for w in query.values()))
+        terms = list(query)
+        conn = self._conn()
+        scores: Dict[int, float] = {}
+        for i in range(0, len(terms), 500):
+            batch = terms[i:i + 500]
+            placeholders = ','.join('?' * len(batch))
+            for term, doc_id, tfw in conn.execute(
+                f"SELECT term, doc_id, tfw FROM postings WHERE term IN ({placeholders})", batch
+            ):
+                scores[doc_id] = scores.get(doc_id, 0.0) + query[term] * tfw * idf[term]
+        for doc_id in exclude:
+            scores.pop(doc_id, None)
+
+        doc_ids = list(scores)
+        cosine = {}
+        meta = {}
+        for i in range(0, len(doc_ids), 500):
+            batch = doc_ids[i:i + 500]
+            placeholders = ','.join('?' * len(batch))
+            for doc_id, title, year, norm in conn.execute(
+                f"SELECT doc_id, title, year, norm FROM docs WHERE doc_id IN ({placeholders})", batch
+            ):
+                cosine[doc_id] = min(1.0, scores[doc_id] / (q_norm * norm))
+                meta[doc_id] = (title, year)
+
+        best = sorted(cosine.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        return [
+            {'doc_id': doc_id, 'title': meta[doc_id][0], 'year': meta[doc_id][1], 'similarity': round(sim, 4)}
+            for doc_id, sim in best
+        ]
+
+
+_default_index: Optional[SimilarityIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_index() -> SimilarityIndex:
+    """Process-wide index, opened on first use"""
+    global _default_index
+    if _default_index is None:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = SimilarityIndex()
+    return _default_index
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BACKEND, os.path.join(BACKEND, 'benchmarks')]
+
+# Read by the modules at import time, so set before anything imports them
+_workdir = tempfile.mkdtemp(prefix='sentinel_tests_')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(_workdir, 'test.db')}",
+    'AUDIT_EMBEDDED_WORKERS': '0',
+    'CITATION_RESOLVER': 'local_only',
+    'CROSSREF_HARVEST': '0',
+    'CITATION_CACHE_PATH': os.path.join(_workdir, 'citation_cache.db'),
+    'CROSSREF_INDEX_PATH': os.path.join(_workdir, 'crossref_index.db'),
+    'SIMILARITY_INDEX_PATH': os.path.join(_workdir, 'similarity_index.db'),
+    'DUPLICATE_INDEX_PATH': os.path.join(_workdir, 'duplicate_index.db'),
+})
+
+import uuid  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import auth  # noqa: E402
+import main  # noqa: E402
+import models  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from routers import submissions  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(submissions, 'UPLOAD_DIR', str(tmp_path))
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def make_user(db):
+    """make_user(role) adds a user and returns (user, auth headers)"""
+    def make(role: models.UserRole = models.UserRole.STUDENT):
+        user = models.User(email=f"{uuid.uuid4().hex}@example.edu", hashed_password='-', full_name='Test User', role=role)
+        db.add(user)
+        db.commit()
+        return user, {'Authorization': f"Bearer {auth.create_access_token({'sub': user.email})}"}
+    return make
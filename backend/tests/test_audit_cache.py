@@ -0,0 +1,56 @@
+import json
+
+import audit_worker
+import job_queue
+import models
+from synthetic_corpus import generate_paper
+
+
+def upload(client, headers, path):
+    with open(path, 'rb') as f:
+        response = client.post(
+            '/api/submissions/', headers=headers,
+            data={'title': 'Paper', 'domain': 'CS', 'degree_level': 'MSc'},
+            files={'file': ('paper.pdf', f, 'application/pdf')}
+        )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def run_queued_job(db):
+    job = job_queue.claim(db, 'test')
+    assert job is not None
+    audit_worker.AuditWorker(concurrency=1).run_job(db, job, 'test')
+
+
+def test_cache_hit_from_another_owner_is_flagged_as_duplicate(tmp_path, client, db, make_user):
+    path, _ = generate_paper(str(tmp_path), 'pdf', pages=3, references=10)
+    first = upload(client, make_user()[1], path)
+    assert first['status'] == 'processing'
+    run_queued_job(db)
+
+    # Same bytes from someone else: served from the audit cache, but compared with the corpus afresh
+    second = upload(client, make_user()[1], path)
+    assert second['status'] == 'completed'
+    report = json.loads(second['report']['json_content'])
+    assert report['duplicates']['match_count'] >= 1
+    assert first['id'] in [m['submission_id'] for m in report['duplicates']['matches']]
+    assert report['novelty']['score'] < 100
+
+    # And it is indexed, so later papers are compared against it too
+    third = upload(client, make_user()[1], path)
+    report = json.loads(third['report']['json_content'])
+    assert second['id'] in [m['submission_id'] for m in report['duplicates']['matches']]
+
+
+def test_result_of_a_lost_lease_is_not_cached(tmp_path, client, db, make_user):
+    path, _ = generate_paper(str(tmp_path), 'pdf', pages=2, references=5, seed=2)
+    submission = upload(client, make_user()[1], path)
+    job = job_queue.claim(db, 'test')
+    # Another worker reclaimed the job while this one was still auditing
+    db.query(models.AuditJob).filter(models.AuditJob.id == job.id).update({models.AuditJob.lease_owner: 'other'})
+    db.commit()
+    audit_worker.AuditWorker(concurrency=1).run_job(db, job, 'test')
+
+    assert db.query(models.AuditCacheEntry).filter(models.AuditCacheEntry.cache_key == job.cache_key).first() is None
+    assert db.query(models.AuditReport).filter(models.AuditReport.submission_id == submission['id']).first() is None
@@ -0,0 +1,125 @@
+import io
+import json
+import os
+import uuid
+import zipfile
+
+import pytest
+
+import batch_upload
+import models
+
+
+def paper_bytes() -> bytes:
+    # Distinct bytes per paper, so no upload is served from the audit cache
+    return b'%PDF-1.4 ' + uuid.uuid4().bytes
+
+
+def zip_upload(entries: dict):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    return ('files', ('cohort.zip', buffer.getvalue(), 'application/zip'))
+
+
+def post_batch(client, headers, files):
+    return client.post('/api/submissions/batch', headers=headers, files=files, data={'domain': 'CS'})
+
+
+def test_zip_with_manifest_files_papers_under_their_owners(client, db, make_user):
+    faculty, headers = make_user(models.UserRole.FACULTY)
+    student, _ = make_user()
+    manifest = [
+        {'filename': 'a.pdf', 'title': 'Thesis A', 'owner_email': student.email.upper()},
+        {'filename': 'b.docx', 'title': 'Thesis B'},
+    ]
+    files = [zip_upload({
+        'cohort/a.pdf': paper_bytes(), 'cohort/b.docx': paper_bytes(),
+        'cohort/notes.txt': b'ignored', 'cohort/manifest.json': json.dumps(manifest),
+    })]
+
+    response = post_batch(client, headers, files)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body['total'], body['queued'], body['cached']) == (2, 2, 0)
+    assert body['skipped'] == ['cohort/notes.txt']
+    rows = db.query(models.Submission).filter(models.Submission.id.in_(body['submission_ids'])).all()
+    assert {(s.title, s.owner_id, s.domain) for s in rows} == {
+        ('Thesis A', student.id, 'CS'), ('Thesis B', faculty.id, 'CS')
+    }
+    progress = client.get(f"/api/submissions/batch/{body['batch_id']}", headers=headers)
+    assert progress.status_code == 200
+
+
+def test_unknown_owner_email_rejects_the_batch(client, make_user, tmp_path):
+    _, headers = make_user(models.UserRole.FACULTY)
+    manifest = 'filename,owner_email\na.pdf,nobody@example.edu\n'
+    files = [('files', ('a.pdf', paper_bytes(), 'application/pdf')),
+             ('manifest', ('manifest.csv', manifest, 'text/csv'))]
+
+    response = post_batch(client, headers, files)
+
+    assert response.status_code == 400
+    assert 'nobody@example.edu' in response.json()['detail']
+    assert os.listdir(tmp_path) == []
+
+
+def test_students_cannot_submit_batches(client, make_user):
+    _, headers = make_user()
+    response = post_batch(client, headers, [('files', ('a.pdf', paper_bytes(), 'application/pdf'))])
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize('manifest', [
+    '["a.pdf"]',
+    '{"a.pdf": "Thesis A"}',
+    '"a.pdf"',
+    '{not json',
+])
+def test_malformed_json_manifest_is_rejected(client, make_user, tmp_path, manifest):
+    _, headers = make_user(models.UserRole.FACULTY)
+    files = [('files', ('a.pdf', paper_bytes(), 'application/pdf')),
+             ('manifest', ('manifest.json', manifest, 'application/json'))]
+
+    response = post_batch(client, headers, files)
+
+    assert response.status_code == 400
+    assert os.listdir(tmp_path) == []
+
+
+def test_oversized_papers_are_rejected(client, make_user, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_upload, 'MAX_FILE_SIZE_MB', 1)
+    _, headers = make_user(models.UserRole.FACULTY)
+    large = b'%PDF-1.4 ' + b'0' * (1024 * 1024)
+
+    plain = post_batch(client, headers, [('files', ('a.pdf', paper_bytes(), 'application/pdf')),
+                                         ('files', ('large.pdf', large, 'application/pdf'))])
+    zipped = post_batch(client, headers, [zip_upload({'a.pdf': paper_bytes(), 'large.pdf': large})])
+
+    for response in (plain, zipped):
+        assert response.status_code == 400
+        assert 'larger than 1 MB' in response.json()['detail']
+    assert os.listdir(tmp_path) == []
+
+
+def test_oversized_manifest_is_rejected(client, make_user, monkeypatch):
+    monkeypatch.setattr(batch_upload, 'MAX_MANIFEST_BYTES', 64)
+    _, headers = make_user(models.UserRole.FACULTY)
+    manifest = 'filename,title\n' + 'a.pdf,Thesis A\n' * 10
+
+    for field in ('manifest', 'files'):
+        files = [('files', ('a.pdf', paper_bytes(), 'application/pdf')),
+                 (field, ('manifest.csv', manifest, 'text/csv'))]
+        response = post_batch(client, headers, files)
+        assert response.status_code == 400
+        assert 'too large for a manifest' in response.json()['detail']
+
+
+def test_size_limit_is_enforced_while_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_upload, 'MAX_FILE_SIZE_MB', 1)
+    source = io.BytesIO(b'0' * (2 * 1024 * 1024))
+    with pytest.raises(batch_upload.BatchError):
+        batch_upload._save(source, 'a.pdf', str(tmp_path))
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,92 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import citation_cache
+import citation_verifier
+
+
+@pytest.fixture
+def crossref(monkeypatch):
+    """
+    Local /works endpoint answering every request with the status in server.status.
+    doi: filter requests return the DOIs listed in server.known; searches return nothing.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.server.connections.add(self.client_address)
+            params = parse_qs(urlparse(self.path).query)
+            self.server.requests.append(params)
+            items = []
+            for term in ','.join(params.get('filter', [])).split(','):
+                if term.startswith('doi:') and term[4:] in self.server.known:
+                    items.append({'DOI': term[4:], 'title': [f'Title of {term[4:]}'], 'score': 3})
+            body = json.dumps({'message': {'items': items}}).encode() if self.server.status == 200 else b''
+            self.send_response(self.server.status)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.connections = set()
+    server.requests = []
+    server.known = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(citation_verifier, 'CROSSREF_API_URL', f"http://127.0.0.1:{server.server_address[1]}")
+    yield server
+    server.shutdown()
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_crossref_failures_are_unverified_and_not_cached(crossref, status):
+    crossref.status = status
+    citations = [
+        f"Smith, J. ({status}). A study that Crossref could not check. Journal of Tests.",
+        f"Jones, K. ({status}). Another study. Journal of Tests. https://doi.org/10.5555/failure.{status}",
+    ]
+
+    results = citation_verifier.verify_citations(citations, resolver='remote')
+
+    assert [r['error'] for r in results] == [f'HTTP {status}'] * 2
+    assert not any(r['found'] for r in results)
+    keys = [k for c in citations for k in citation_cache.cache_keys(c, citation_verifier.extract_doi(c))]
+    assert citation_cache.get_cache().get_many(keys, track=False) == {}
+
+
+def test_sequential_verifications_reuse_one_connection(crossref):
+    crossref.status = 200
+    for n in range(3):
+        citation_verifier.verify_citations([f"Author {n}. An uncached study number {n}. Journal of Tests."])
+    assert len(crossref.connections) == 1
+
+
+def test_dois_are_resolved_in_batches_and_misses_searched(crossref, monkeypatch):
+    monkeypatch.setattr(citation_verifier, 'CROSSREF_DOI_BATCH', 2)
+    crossref.status = 200
+    crossref.known = {'10.5555/batch.1', '10.5555/batch.2', '10.5555/batch.3'}
+    citations = [f"Author {n}. Batched study {n}. Journal of Tests. doi:10.5555/batch.{n}" for n in range(1, 5)]
+    citations.append("Author 5. A batched study without a DOI. Journal of Tests.")
+
+    results = citation_verifier.verify_citations(citations, resolver='remote')
+
+    filters = [r['filter'][0] for r in crossref.requests if 'filter' in r]
+    searches = [r['query.bibliographic'][0] for r in crossref.requests if 'query.bibliographic' in r]
+    assert sorted(filters) == ['doi:10.5555/batch.1,doi:10.5555/batch.2', 'doi:10.5555/batch.3,doi:10.5555/batch.4']
+    # The unknown DOI and the DOI-less citation fall back to search
+    assert sorted(searches) == sorted(citations[3:])
+    assert [r['doi'] for r in results[:3]] == ['10.5555/batch.1', '10.5555/batch.2', '10.5555/batch.3']
+    assert all(r['match'] == 'doi' and r['score'] == 100 for r in results[:3])
+    assert not results[3]['found'] and results[3]['doi_resolved'] is False
+    assert not results[4]['found']
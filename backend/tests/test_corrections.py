@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+import models
+import text_store
+from pdf_extraction import ExtractedDocument
+
+PAGE = ("The sample was collected by hand. It seems that a lot of work is needed. "
+        "Our approach is very unique and basically new. ")
+
+
+@pytest.fixture
+def submission(db, make_user):
+    """A student's audited submission with two issue corrections and a stored, indexed three-page text"""
+    user, headers = make_user()
+    submission = models.Submission(title='Paged', file_path='-', owner_id=user.id,
+                                   status=models.SubmissionStatus.COMPLETED)
+    db.add(submission)
+    db.flush()
+    report = {
+        'citations': {'issues': [{'issue': 'Reference 3 not found'}]},
+        'methodology': {'issues': [{'description': 'Sample size not stated'}]}
+    }
+    db.add(models.AuditReport(submission_id=submission.id, json_content=json.dumps(report)))
+    document = ExtractedDocument([PAGE * 3, PAGE * 2, PAGE], [])
+    text_store.save_text(db, submission.id, text_store.pack_document(document))
+    db.commit()
+    return submission.id, headers
+
+
+def fetch_pages(client, submission_id, headers, limit, **params):
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(f'/api/ai/suggest-corrections/{submission_id}', headers=headers,
+                              params=dict(params, limit=limit, **({'cursor': cursor} if cursor else {})))
+        assert response.status_code == 200
+        body = response.json()
+        pages.append(body)
+        cursor = body['next_cursor']
+        if cursor is None:
+            return pages
+        assert len(pages) < 100
+
+
+def keys(corrections):
+    return [(c['type'], c.get('start'), c['issue']) for c in corrections]
+
+
+@pytest.mark.parametrize('limit', [1, 3, 7])
+def test_pages_cover_every_correction_once(client, submission, limit):
+    submission_id, headers = submission
+    everything = fetch_pages(client, submission_id, headers, 500)
+    assert len(everything) == 1
+    expected = keys(everything[0]['corrections'])
+    assert len(expected) == everything[0]['total_corrections'] > 20
+    assert [t for t, _, _ in expected[:2]] == ['citation_error', 'methodology_issue']
+
+    pages = fetch_pages(client, submission_id, headers, limit)
+    served = [k for page in pages for k in keys(page['corrections'])]
+    assert served == expected
+    assert all(len(page['corrections']) == limit for page in pages[:-1])
+    assert len(pages[-1]['corrections']) <= limit
+
+
+def test_type_filter_pages(client, submission):
+    submission_id, headers = submission
+    pages = fetch_pages(client, submission_id, headers, 2, types='informal_language,redundancy')
+    served = [c for page in pages for c in page['corrections']]
+    assert {c['type'] for c in served} == {'informal_language', 'redundancy'}
+    # "a lot of" and "basically" and "very unique" on each of the six repetitions
+    assert len(served) == pages[0]['total_corrections'] == 18
+    assert [c['start'] for c in served] == sorted(c['start'] for c in served)
+
+
+@pytest.mark.parametrize('cursor', ['nonsense', '12', '1:2:3'])
+def test_invalid_cursor_is_rejected(client, submission, cursor):
+    submission_id, headers = submission
+    response = client.get(f'/api/ai/suggest-corrections/{submission_id}', headers=headers, params={'cursor': cursor})
+    assert response.status_code == 400
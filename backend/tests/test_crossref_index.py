@@ -0,0 +1,25 @@
+import crossref_index
+
+
+def item(doi, title, family, year):
+    return {
+        'DOI': doi, 'title': [title], 'author': [{'given': 'A.', 'family': family}],
+        'container-title': ['Journal of Tests'], 'published': {'date-parts': [[year]]}
+    }
+
+
+CITATION = "Okafor, C. (2019). Optimization strategies for sparse models. Journal of Tests."
+
+
+def test_harvested_short_title_does_not_verify_unrelated_citation(tmp_path):
+    index = crossref_index.CrossrefIndex(str(tmp_path / 'index.db'))
+    index.add_items([item('10.1/search', 'Optimization', 'Lindqvist', 2011)], source=crossref_index.SOURCE_SEARCH)
+    assert index.resolve(CITATION) is None
+
+
+def test_harvested_work_verifies_citation_naming_its_author(tmp_path):
+    index = crossref_index.CrossrefIndex(str(tmp_path / 'index.db'))
+    index.add_items([item('10.1/match', 'Optimization strategies for sparse models', 'Okafor', 2019)],
+                    source=crossref_index.SOURCE_CITATION)
+    assert index.resolve(CITATION)['doi'] == '10.1/match'
+
@@ -0,0 +1,71 @@
+import csv
+
+import dataset_profiler
+
+
+def test_one_long_cell_does_not_widen_the_column(tmp_path):
+    path = tmp_path / 'data.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['age', 'notes'])
+        for i in range(20000):
+            writer.writerow([20 + i % 50, 'x' * 100000 if i == 0 else f'note {i % 7}'])
+
+    profile = dataset_profiler.profile_dataset(str(path))
+
+    assert profile['status'] == 'Analyzed'
+    assert profile['rows'] == 20000
+    age, notes = profile['columns']
+    assert age['type'] == 'numeric' and age['max'] == 69
+    assert notes['type'] == 'text' and notes['distinct'] == 8
+
+
+def test_truncated_cell_is_not_numeric():
+    stats = dataset_profiler.ColumnStats('value', None)
+    stats.update(['1' * (dataset_profiler.MAX_CELL_CHARS + 10), ' 2 '])
+    assert stats.numeric == 1 and stats.maximum == 2
+
+
+def write_rows(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'value'])
+        writer.writerows(rows)
+
+
+def test_saturated_duplicate_filter_reports_no_duplicates(tmp_path, monkeypatch):
+    # A filter far too small for the file: nearly every row looks seen
+    monkeypatch.setattr(dataset_profiler, 'DUPLICATE_FILTER_MAX_BITS', 4096)
+    monkeypatch.setattr(dataset_profiler, 'DATASET_CHUNK_ROWS', 1000)
+    path = tmp_path / 'unique.csv'
+    write_rows(path, [[i, i * 7 % 1000] for i in range(20000)])
+
+    profile = dataset_profiler.profile_dataset(str(path))
+
+    assert profile['duplicate_rows'] > 10000
+    assert not any('duplicate rows' in a for a in profile['anomalies'])
+
+
+def test_duplicate_rows_are_reported(tmp_path):
+    path = tmp_path / 'duplicates.csv'
+    write_rows(path, [[i % 19000, i % 19000 * 7 % 1000] for i in range(20000)])
+
+    profile = dataset_profiler.profile_dataset(str(path))
+
+    assert profile['duplicate_rows'] == 1000
+    assert 'About 1000 duplicate rows (5.0%)' in profile['anomalies']
+
+
+def test_wide_file_rows_are_not_ragged(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_profiler, 'DATASET_MAX_COLUMNS', 5)
+    path = tmp_path / 'wide.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([f'c{i}' for i in range(8)])
+        writer.writerows([[row * i for i in range(8)] for row in range(100)])
+
+    profile = dataset_profiler.profile_dataset(str(path))
+
+    assert profile['ragged_rows'] == 0
+    assert profile['column_count'] == 5 and len(profile['columns']) == 5
+    assert not any('different number of fields' in a for a in profile['anomalies'])
@@ -0,0 +1,19 @@
+import random
+
+import duplicate_detector
+
+
+def reference_minhash(hashes):
+    # The original scalar definition; stored signatures were computed with it
+    unique = set(hashes)
+    if not unique:
+        return [duplicate_detector._MAX_HASH] * duplicate_detector.NUM_PERM
+    return [min((a * h + b) % duplicate_detector._PRIME for h in unique) & duplicate_detector._MAX_HASH
+            for a, b in duplicate_detector._PERMUTATIONS]
+
+
+def test_minhash_matches_scalar_definition():
+    rng = random.Random(7)
+    for size in (0, 1, 1000, duplicate_detector._MINHASH_CHUNK + 1):
+        hashes = [rng.getrandbits(32) for _ in range(size)] + [0, (1 << 32) - 1] * (size > 0)
+        assert duplicate_detector.minhash(hashes) == reference_minhash(hashes)
@@ -0,0 +1,70 @@
+import time
+
+import reference_parser
+
+BODY = "Introduction\nPrior work [1] and [2] is discussed here.\n\n"
+
+
+def test_numbered_entries_broken_across_lines():
+    text = BODY + (
+        "References\n"
+        "[1] A. Smith, B. Jones. Learning to detect plagi-\n"
+        "arism in student theses. Journal of Tests, 2019.\n"
+        "[2] C. Brown. \"Checking citations against Crossref at scale\". In Proc. Tests, 2021.\n"
+        "https://doi.org/10.5555/abc-\n"
+        "def.1\n"
+        "Appendix A\n"
+        "[3] Not a reference, this is in the appendix. 2020.\n"
+    )
+    refs = reference_parser.parse_references(text)
+
+    assert [r['number'] for r in refs] == [1, 2]
+    assert refs[0]['title'] == 'Learning to detect plagiarism in student theses'
+    assert refs[0]['year'] == 2019 and refs[0]['doi'] is None
+    assert refs[1]['title'] == 'Checking citations against Crossref at scale'
+    assert refs[1]['doi'] == '10.5555/abc-def.1'
+
+
+def test_author_year_entries():
+    text = BODY + (
+        "Bibliography\n"
+        "Smith, J. (2020). A survey of research integrity tools. Journal of Tests,\n"
+        "12(3), 45-67.\n"
+        "van der Berg, A. (2018). Duplicate detection for\n"
+        "theses. Proceedings of Tests. doi:10.1234/VDB.2018.7\n"
+    )
+    refs = reference_parser.parse_references(text)
+
+    assert len(refs) == 2
+    assert refs[0]['number'] is None
+    assert refs[0]['title'] == 'A survey of research integrity tools'
+    assert refs[0]['year'] == 2020
+    assert refs[1]['title'] == 'Duplicate detection for theses'
+    assert refs[1]['year'] == 2018 and refs[1]['doi'] == '10.1234/vdb.2018.7'
+
+
+def test_last_heading_wins_over_table_of_contents():
+    text = "Contents\nReferences\nIntroduction\n" + BODY + (
+        "References\n"
+        "1. A. Smith. First cited paper on the topic. Journal of Tests, 2015.\n"
+        "2. B. Jones. Second cited paper on the topic. Journal of Tests, 2016.\n"
+    )
+    refs = reference_parser.parse_references(text)
+    assert [(r['number'], r['year']) for r in refs] == [(1, 2015), (2, 2016)]
+
+
+def test_without_heading_falls_back_to_bracketed_lines():
+    text = BODY + (
+        "[1] A. Smith. A paper cited without a heading. Journal of Tests, 2011.\n"
+        "Some unrelated paragraph text in between.\n"
+        "[2] B. Jones. Another paper cited without a heading. Journal of Tests, 2012.\n"
+    )
+    refs = reference_parser.parse_references(text, limit=1)
+    assert [(r['number'], r['year']) for r in refs] == [(1, 2011)]
+
+
+def test_pathological_input_parses_in_linear_time():
+    text = "References\n" + ("Smith, " * 20000 + "\n") * 5 + ("a" * 50000 + "\n") * 5
+    started = time.perf_counter()
+    reference_parser.parse_references(text)
+    assert time.perf_counter() - started < 2
@@ -0,0 +1,15 @@
+import similarity_index
+
+
+def test_document_frequency_counts_terms_without_postings(tmp_path):
+    index = similarity_index.SimilarityIndex(str(tmp_path / 'index.db'))
+    tf = {f"term{chr(97 + i // 26)}{chr(97 + i % 26)}": 1 + i % 3 for i in range(similarity_index.MAX_TERMS_PER_DOC * 2)}
+    index.add(1, tf)
+    index.add(2, tf)
+    conn = index._conn()
+
+    assert conn.execute("SELECT COUNT(*) FROM postings WHERE doc_id = 1").fetchone()[0] == similarity_index.MAX_TERMS_PER_DOC
+    assert dict(conn.execute("SELECT term, df FROM df")) == dict.fromkeys(tf, 2)
+
+    index.remove(1)
+    assert set(dict(conn.execute("SELECT term, df FROM df")).values()) == {1}
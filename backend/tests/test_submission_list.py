@@ -0,0 +1,56 @@
+import datetime
+
+import pytest
+
+import models
+
+
+@pytest.fixture
+def owner(db, make_user):
+    """A student with seven submissions; four share one created_at so the id breaks the tie"""
+    user, headers = make_user()
+    base = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    stamps = [base, base, base, base, base + datetime.timedelta(seconds=1),
+              base + datetime.timedelta(microseconds=1), base - datetime.timedelta(days=1)]
+    for n, created_at in enumerate(stamps):
+        db.add(models.Submission(title=f'Paper {n}', domain='Biology', degree_level='PhD', file_path='-',
+                                 owner_id=user.id, created_at=created_at))
+    db.commit()
+    rows = db.query(models.Submission).filter(models.Submission.owner_id == user.id).all()
+    newest_first = sorted(rows, key=lambda s: (s.created_at, s.id), reverse=True)
+    return [s.id for s in newest_first], headers
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 7, 8])
+def test_keyset_pages_neither_repeat_nor_skip(client, owner, limit):
+    expected, headers = owner
+    served, pages, cursor = [], 0, None
+    while True:
+        response = client.get('/api/submissions/', headers=headers,
+                              params=dict(limit=limit, **({'cursor': cursor} if cursor else {})))
+        assert response.status_code == 200
+        page = [s['id'] for s in response.json()]
+        served.extend(page)
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+        assert len(page) == limit
+    assert served == expected
+    # A full last page still hands out a cursor, which then yields an empty final page
+    assert pages == len(expected) // limit + 1
+
+
+def test_students_only_page_through_their_own(client, owner, make_user):
+    _, headers = make_user()
+    response = client.get('/api/submissions/', headers=headers, params={'limit': 2})
+    assert response.json() == []
+    assert 'X-Next-Cursor' not in response.headers
+
+
+@pytest.mark.parametrize('cursor', ['nonsense', '2026-13-01T12:00:00:5', '2026-01-01T12:00:00:abc', 'yesterday:5'])
+def test_invalid_cursor_is_rejected(client, owner, cursor):
+    _, headers = owner
+    response = client.get('/api/submissions/', headers=headers, params={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invalid cursor'
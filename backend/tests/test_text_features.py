@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+import audit_engine
+import text_features
+from bench_text_features import synthetic_text
+
+
+def test_trie_pattern_factors_shared_prefixes():
+    assert text_features._trie_pattern(['code', 'control', 'p <', 'p']) == r'(?:co(?:de|ntrol)|p(?:\ <)?)'
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_single_scan_matches_str_count(seed):
+    # Prefixes, suffixes, self-overlap ("aa" in "aaa") and keywords inside other keywords
+    rng = random.Random(seed)
+    keywords = ['aa', 'a', 'aaa', 'ab', 'b', 'ba', 'abab', 'x.', '(x', '']
+    for _ in range(500):
+        text = ''.join(rng.choice('abx .(') for _ in range(rng.randint(0, 40)))
+        chosen = rng.sample(keywords, rng.randint(1, len(keywords)))
+        counts = text_features.TextFeatures(text, chosen).keyword_counts
+        assert counts == {k: text.count(k) for k in chosen}, (text, chosen)
+
+
+def test_audit_keywords_on_a_paper():
+    features = audit_engine.build_text_features(synthetic_text(0.2) + " Hyperparameter and P-value, n=12.")
+    assert features.keyword_counts == {k.lower(): features.lower.count(k.lower()) for k in audit_engine.AUDIT_KEYWORDS}
+    assert features.count('parameter') == 2 and features.has('p-value')
@@ -0,0 +1,135 @@
+"""
+Precomputed text features shared by every audit analyzer.
+
+The lowercased text, whitespace tokens, sentence boundaries and keyword hit
+counts are computed once per paper, so analyzers never copy or rescan the
+full text for a keyword check. Substring keywords are all counted in one scan
+of a pattern shaped like a trie of the keywords, so the cost per position does
+not grow with the number of keywords, with the same results as a str.count
+per keyword; whole-word terms share one compiled alternation.
+"""
+import re
+from typing import Dict, Iterable, List, Union
+
+_WORD_PATTERNS: Dict[tuple, 're.Pattern'] = {}
+_KEYWORD_SCANNERS: Dict[tuple, '_KeywordScanner'] = {}
+
+
+def _word_pattern(words: tuple) -> 're.Pattern':
+    pattern = _WORD_PATTERNS.get(words)
+    if pattern is None:
+        alternation = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+        pattern = re.compile(rf"\b(?:{alternation})\b")
+        _WORD_PATTERNS[words] = pattern
+    return pattern
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex matching the longest of the words, with shared prefixes factored out (c(?:ode|ontrol))"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A word ends here but longer ones continue: the rest is optional
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
+
+
+class _KeywordScanner:
+    """
+    Counts several substring keywords in one left-to-right pass. After each hit the search resumes
+    one character later, so keywords inside or overlapping other keywords are still found; a hit also
+    credits the shorter keywords that are its prefixes. Each keyword's own occurrences are counted
+    non-overlapping, exactly like str.count.
+    """
+
+    def __init__(self, keywords: tuple):
+        self.keywords = keywords
+        searched = [k for k in keywords if k]
+        self.pattern = re.compile(_trie_pattern(searched)) if searched else None
+        self.prefixes: Dict[str, List[str]] = {k: [p for p in searched if k.startswith(p)] for k in searched}
+
+    def counts(self, text: str) -> Dict[str, int]:
+        counts = dict.fromkeys(self.keywords, 0)
+        if '' in counts:
+            counts[''] = len(text) + 1
+        if self.pattern is None:
+            return counts
+        free_from = dict.fromkeys(self.keywords, 0)
+        search = self.pattern.search
+        match = search(text)
+        while match:
+            start = match.start()
+            for keyword in self.prefixes[match.group()]:
+                if start >= free_from[keyword]:
+                    counts[keyword] += 1
+                    free_from[keyword] = start + len(keyword)
+            match = search(text, start + 1)
+        return counts
+
+
+def _keyword_scanner(keywords: tuple) -> _KeywordScanner:
+    scanner = _KEYWORD_SCANNERS.get(keywords)
+    if scanner is None:
+        scanner = _KeywordScanner(keywords)
+        _KEYWORD_SCANNERS[keywords] = scanner
+    return scanner
+
+
+class TextFeatures:
+    """Lowercased text, tokens, sentence boundaries and keyword counts for one document"""
+
+    def __init__(self, text: str, keywords: Iterable[str] = (), words: Iterable[str] = ()):
+        self.text = text
+        self.lower = text.lower()
+        self.tokens: List[str] = self.lower.split()
+        self.word_count = len(self.tokens)
+        self.sentence_ends: List[int] = [m.start() for m in re.finditer(r'\.', self.lower)]
+
+        keywords = tuple(dict.fromkeys(k.lower() for k in keywords))
+        self.keyword_counts: Dict[str, int] = _keyword_scanner(keywords).counts(self.lower) if keywords else {}
+        self.word_counts: Dict[str, int] = dict.fromkeys((w.lower() for w in words), 0)
+        if self.word_counts:
+            for match in _word_pattern(tuple(self.word_counts)).finditer(self.lower):
+                self.word_counts[match.group()] += 1
+
+    @property
+    def sentence_count(self) -> int:
+        """Number of '.'-delimited segments, matching text.split('.')"""
+        return len(self.sentence_ends) + 1
+
+    def count(self, keyword: str) -> int:
+        """Occurrences of a keyword (substring match on the lowercased text)"""
+        keyword = keyword.lower()
+        if keyword not in self.keyword_counts:
+            self.keyword_counts[keyword] = self.lower.count(keyword)
+        return self.keyword_counts[keyword]
+
+    def has(self, keyword: str) -> bool:
+        return self.count(keyword) > 0
+
+    def word_count_of(self, *words: str) -> int:
+        """Whole-word occurrences of any of the given words"""
+        total = 0
+        for w in words:
+            w = w.lower()
+            if w not in self.word_counts:
+                self.word_counts[w] = len(re.findall(rf'\b{re.escape(w)}\b', self.lower))
+            total += self.word_counts[w]
+        return total
+
+
+def ensure_features(text: Union[str, TextFeatures], keywords: Iterable[str] = (), words: Iterable[str] = ()) -> TextFeatures:
+    """Accept either raw text or an existing TextFeatures object"""
+    if isinstance(text, TextFeatures):
+        return text
+    return TextFeatures(text, keywords, words)
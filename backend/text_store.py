@@ -0,0 +1,134 @@
+"""
+Compressed store for extracted paper text.
+
+The text analyze_paper() extracted is zlib-compressed in the audit worker
+process and saved once, content-addressed by its sha256, so identical uploads
+share one row. Page offsets are kept alongside it. The text lives in its own
+table and is only read by endpoints that ask for it, never by submission or
+report listings.
+
+The correction index (correction_index.py) is built from the same text in the
+worker and stored on the same row.
+"""
+import datetime
+import hashlib
+import json
+import zlib
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import models
+from correction_index import CORRECTIONS_VERSION, CorrectionIndex, build_index
+from pdf_extraction import ExtractedDocument, PAGE_SEPARATOR
+
+TEXT_COMPRESSION_LEVEL = 6
+
+
+def pack_document(document: ExtractedDocument) -> Dict:
+    """Compressed, content-addressed form of an extracted document (see save_text)"""
+    raw = document.text.encode('utf-8')
+    return {
+        'content_hash': hashlib.sha256(raw).hexdigest(),
+        'codec': 'zlib',
+        'data': zlib.compress(raw, TEXT_COMPRESSION_LEVEL),
+        'raw_bytes': len(raw),
+        'page_offsets': document.page_offsets,
+        'failed_pages': document.failed_pages,
+        'corrections': build_index(document.text)
+    }
+
+
+def without_data(packed: Dict) -> Dict:
+    """The packed document minus the compressed text and index, small enough to keep in cached results"""
+    return {k: v for k, v in packed.items() if k not in ('data', 'corrections')}
+
+
+def _set_corrections(row: models.ExtractedText, corrections: Dict):
+    row.corrections = corrections['data']
+    row.correction_counts = json.dumps(corrections['counts'])
+    row.corrections_version = corrections['version']
+
+
+def save_text(db: Session, submission_id: int, packed: Dict) -> bool:
+    """
+    Link a submission to its extracted text, storing the text if it is new.
+    Does not commit. Returns False if the text is neither given nor already stored.
+    """
+    content_hash = packed['content_hash']
+    exists = db.query(models.ExtractedText.content_hash).filter(
+        models.ExtractedText.content_hash == content_hash
+    ).first()
+    if not exists:
+        if packed.get('data') is None:
+            return False
+        row = models.ExtractedText(
+            content_hash=content_hash,
+            codec=packed['codec'],
+            data=packed['data'],
+            raw_bytes=packed['raw_bytes'],
+            stored_bytes=len(packed['data']),
+            page_offsets=json.dumps(packed['page_offsets']),
+            failed_pages=json.dumps(packed.get('failed_pages') or []),
+            created_at=datetime.datetime.utcnow()
+        )
+        if packed.get('corrections'):
+            _set_corrections(row, packed['corrections'])
+        db.add(row)
+
+    link = db.query(models.SubmissionText).filter(models.SubmissionText.submission_id == submission_id).first()
+    if link is None:
+        db.add(models.SubmissionText(submission_id=submission_id, content_hash=content_hash))
+    else:
+        link.content_hash = content_hash
+    return True
+
+
+def _text_row(db: Session, submission_id: int) -> Optional[models.ExtractedText]:
+    return db.query(models.ExtractedText).join(
+        models.SubmissionText, models.SubmissionText.content_hash == models.ExtractedText.content_hash
+    ).filter(models.SubmissionText.submission_id == submission_id).first()
+
+
+def _document(row: models.ExtractedText) -> ExtractedDocument:
+    if row.codec != 'zlib':
+        raise ValueError(f"Unknown text codec {row.codec!r}")
+
+    text = zlib.decompress(row.data).decode('utf-8')
+    offsets = json.loads(row.page_offsets or '[]')
+    # ExtractedDocument appends a separator after every page
+    ends = offsets[1:] + [len(text)]
+    pages = [text[start:end - len(PAGE_SEPARATOR)] for start, end in zip(offsets, ends)]
+    return ExtractedDocument(pages, json.loads(row.failed_pages or '[]'))
+
+
+def load_document(db: Session, submission_id: int) -> Optional[ExtractedDocument]:
+    """Decompress a submission's extracted text, or None if it was never stored"""
+    row = _text_row(db, submission_id)
+    return _document(row) if row is not None else None
+
+
+def load_corrections(db: Session, submission_id: int) -> Optional[Tuple[CorrectionIndex, ExtractedDocument]]:
+    """
+    A submission's correction index and text, or None if no text was stored.
+    Texts saved before the index existed (or with an older version of it) are indexed now and saved.
+    """
+    row = _text_row(db, submission_id)
+    if row is None:
+        return None
+    document = _document(row)
+    if row.corrections is None or row.corrections_version != CORRECTIONS_VERSION:
+        _set_corrections(row, build_index(document.text))
+        db.commit()
+    return CorrectionIndex.from_bytes(row.corrections, json.loads(row.correction_counts)), document
+
+
+def load_stored_text(db: Session, content_hash: str) -> Optional[str]:
+    """Text stored under a content hash (e.g. one kept in a cached audit result), or None"""
+    row = db.query(models.ExtractedText).filter(models.ExtractedText.content_hash == content_hash).first()
+    return _document(row).text if row is not None else None
+
+
+def load_text(db: Session, submission_id: int) -> Optional[str]:
+    document = load_document(db, submission_id)
+    return document.text if document is not None else None